@@ -1,17 +1,20 @@
+import time
+
 import streamlit as st
-import pandas as pd
-from datetime import datetime
 
-# Import modules
-from modules import auth, data, ui, visualization, hevy_api
+# Import the modules needed by every page, the analysis modules (pandas, numpy, plotly)
+# are only imported once logged in so the login page starts fast
+from modules import auth, profiling, telemetry, ui
 
 # Set up the app
 ui.set_page_config()
+telemetry.configure_logging()
+profiling.start_run()
 ui.apply_custom_css()
 ui.display_header()
 
 # Main app logic
-is_logged_in, user_folder = auth.check_login_status()
+is_logged_in, _ = auth.check_login_status()
 
 if not is_logged_in:
     # Login form
@@ -34,6 +37,8 @@ if not is_logged_in:
 
 else:
     # User is logged in, show the main interface
+    import pandas as pd
+    from modules import adherence, client_storage, cube, data, export, feed, heatmap, history, muscle_attribution, query, records, relative_strength, training_load, visualization, hevy_api
     
     # Sidebar with sync button and logout option
     sync_clicked, logout_clicked = ui.display_sidebar_data_management()
@@ -43,8 +48,7 @@ else:
             success, message = auth.sync_data()
             if success:
                 st.success(message)
-                # Clear cache to reload data
-                st.cache_data.clear()
+                # The synced data has a new version, the cached results of the old one are not reused
                 st.rerun()
             else:
                 st.error(message)
@@ -56,15 +60,21 @@ else:
         else:
             st.error("Error logging out")
     
-    # Load data
+    # Load data, cached per version of the stored workouts
+    version = data.dataset_version(auth.get_user_id())
     try:
-        df = data.load_workout_data(user_folder)
+        with profiling.stage("load_workout_data"):
+            df = data.load_workout_data(version)
     except Exception as e:
         st.error(f"Error loading data: {e}")
         st.info("Please make sure you have synced your workout data from Hevy.")
         df = pd.DataFrame()
     
     if not df.empty:
+        # Personal records are computed over the whole history, independent of the filters
+        with profiling.stage("load_personal_records"):
+            set_records, records_state = data.load_personal_records(version, df)
+        
         # Get data for filters
         workout_types = df['title'].unique()
         exercises = df['exercise_title'].unique()
@@ -79,38 +89,66 @@ else:
         # Apply filters
         filtered_df = data.filter_data(df, date_range, selected_workout_types, selected_exercises)
         
+        # Totals by date, exercise, muscle group, equipment and workout type come from the pre-aggregated cube
+        with profiling.stage("filter_cube"):
+            workout_cube = data.load_cube(version, df)
+            cube_cells = cube.filter_cube(workout_cube, date_range, selected_workout_types, selected_exercises)
+            cube_workouts = cube.filter_workouts(workout_cube, date_range, selected_workout_types, selected_exercises)
+        
         # Main content
-        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Overview", "Exercise Analysis", "Progress Tracking", "Workout Details", "Muscle Analysis", "Equipment Analysis"])
+        tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11 = st.tabs(["Overview", "Exercise Analysis", "Progress Tracking", "Workout Details", "Muscle Analysis", "Equipment Analysis", "Personal Records", "Training Load", "Routine Adherence", "Feed", "Query"])
         
-        with tab1:
+        with tab1, profiling.stage("Overview"):
             st.markdown('<h2 class="sub-header">Workout Overview</h2>', unsafe_allow_html=True)
             
             # Summary metrics
-            total_workouts = filtered_df['workout_date'].nunique()
-            total_exercises = filtered_df['exercise_title'].nunique()
-            avg_duration = filtered_df.groupby('workout_date')['workout_duration'].first().mean()
-            total_volume = filtered_df['volume'].sum()
+            total_workouts = len(cube_workouts)
+            total_exercises = cube_cells['exercise_title'].nunique()
+            avg_duration = cube_workouts['workout_duration'].mean()
+            total_volume = cube_cells['volume'].sum()
             
             ui.display_summary_metrics(total_workouts, total_exercises, avg_duration, total_volume)
             
             # Workout frequency by day of week
             st.markdown('<h3>Workout Frequency by Day of Week</h3>', unsafe_allow_html=True)
-            workout_days = filtered_df.drop_duplicates('workout_date')
-            fig = visualization.create_workout_frequency_chart(workout_days)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_workout_frequency_chart(cube_workouts)
+            ui.display_chart(fig)
             
             # Workout duration trend
             st.markdown('<h3>Workout Duration Trend</h3>', unsafe_allow_html=True)
-            workout_duration_df = filtered_df.drop_duplicates('workout_date')[['workout_date', 'workout_duration', 'title']]
+            workout_duration_df = cube_workouts[['workout_date', 'workout_duration', 'title']]
             fig = visualization.create_workout_duration_chart(workout_duration_df)
-            st.plotly_chart(fig, use_container_width=True)
+            ui.display_chart(fig)
             
             # Workout type distribution
             st.markdown('<h3>Workout Type Distribution</h3>', unsafe_allow_html=True)
-            fig = visualization.create_workout_type_pie_chart(filtered_df)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_workout_type_pie_chart(cube_cells)
+            ui.display_chart(fig)
+            
+            # Whole history binned per day once, a muscle group or exercise is binned from its own sets
+            st.markdown('<h3>Training Calendar</h3>', unsafe_allow_html=True)
+            calendar = data.load_calendar(version, df)
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                calendar_year = st.selectbox("Year", heatmap.years(calendar), key="calendar_year")
+            with col2:
+                calendar_measure = st.selectbox("Measure", list(heatmap.MEASURES), format_func=heatmap.MEASURES.get,
+                                                key="calendar_measure")
+            with col3:
+                calendar_column = st.selectbox("Show", [None] + list(heatmap.BREAKDOWNS),
+                                               format_func=lambda column: heatmap.BREAKDOWNS.get(column, "All training"),
+                                               key="calendar_breakdown")
+            calendar_name = None
+            if calendar_column:
+                with col4:
+                    calendar_name = st.selectbox(heatmap.BREAKDOWNS[calendar_column],
+                                                 calendar["groups"][calendar_column]["names"], key=f"calendar_{calendar_column}")
+            daily = heatmap.daily_values(calendar, calendar_measure, calendar_column, calendar_name)
+            fig = visualization.create_calendar_heatmap(heatmap.year_grid(calendar, daily, calendar_year),
+                                                        heatmap.MEASURES[calendar_measure])
+            ui.display_chart(fig)
         
-        with tab2:
+        with tab2, profiling.stage("Exercise Analysis"):
             st.markdown('<h2 class="sub-header">Exercise Analysis</h2>', unsafe_allow_html=True)
             
             # Filter by selected exercises if any
@@ -121,23 +159,23 @@ else:
             
             # Most common exercises
             st.markdown('<h3>Most Common Exercises</h3>', unsafe_allow_html=True)
-            fig = visualization.create_exercise_frequency_chart(filtered_df)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_exercise_frequency_chart(cube_cells)
+            ui.display_chart(fig)
             
             # Exercise volume by type
             st.markdown('<h3>Exercise Volume by Type</h3>', unsafe_allow_html=True)
-            fig = visualization.create_exercise_volume_chart(filtered_df)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_exercise_volume_chart(cube_cells)
+            ui.display_chart(fig)
             
             # Average RPE by exercise
             st.markdown('<h3>Average RPE by Exercise</h3>', unsafe_allow_html=True)
             fig = visualization.create_exercise_rpe_chart(filtered_df)
             if fig:
-                st.plotly_chart(fig, use_container_width=True)
+                ui.display_chart(fig)
             else:
                 st.info("No RPE data available in the selected date range.")
         
-        with tab3:
+        with tab3, profiling.stage("Progress Tracking"):
             st.markdown('<h2 class="sub-header">Progress Tracking</h2>', unsafe_allow_html=True)
             
             # Select exercise for progress tracking
@@ -156,111 +194,127 @@ else:
                 if weight_fig:
                     # Weight progression
                     st.markdown('<h3>Weight Progression</h3>', unsafe_allow_html=True)
-                    st.plotly_chart(weight_fig, use_container_width=True)
+                    ui.display_chart(weight_fig)
                     
                     # Volume progression
                     st.markdown('<h3>Volume Progression</h3>', unsafe_allow_html=True)
-                    st.plotly_chart(volume_fig, use_container_width=True)
+                    ui.display_chart(volume_fig)
                     
                     # Rep progression
                     st.markdown('<h3>Rep Progression</h3>', unsafe_allow_html=True)
-                    st.plotly_chart(reps_fig, use_container_width=True)
+                    ui.display_chart(reps_fig)
+                    
+                    # Estimated 1RM progression with personal records
+                    exercise_records = set_records[(set_records['exercise_title'] == selected_progress_exercise) &
+                                                   set_records['workout_id'].isin(progress_df['workout_id'].unique())]
+                    e1rm_fig = visualization.create_e1rm_chart(exercise_records)
+                    if e1rm_fig:
+                        st.markdown('<h3>Estimated 1RM Progression</h3>', unsafe_allow_html=True)
+                        ui.display_chart(e1rm_fig)
                 else:
                     st.info(f"No weight data available for {selected_progress_exercise} in the selected date range.")
         
-        with tab4:
+        with tab4, profiling.stage("Workout Details"):
             st.markdown('<h2 class="sub-header">Workout Details</h2>', unsafe_allow_html=True)
             
-            # Group by workout date and title
-            workout_dates = filtered_df[['workout_date', 'title']].drop_duplicates().sort_values('workout_date', ascending=False)
-            workout_dates['display_date'] = workout_dates['workout_date'].astype(str) + ' - ' + workout_dates['title']
+            # Export of the filtered sets or of one row per workout, only encoded when asked for
+            with st.expander("Export"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    export_table = st.radio("Table", ["sets", "workouts"], format_func=str.capitalize,
+                                            horizontal=True, key="export_table")
+                with col2:
+                    export_format = st.radio("Format", list(export.FORMATS), format_func=lambda fmt: export.FORMATS[fmt][0],
+                                             horizontal=True, key="export_format")
+                export_key = (version, tuple(date_range), tuple(selected_workout_types or ()),
+                              tuple(selected_exercises or ()), export_table, export_format)
+                if st.button("Prepare export", key="export_prepare"):
+                    with st.spinner("Encoding export..."):
+                        export.prepare(export_key, filtered_df, export_table, export_format)
+                prepared_export = export.prepared(export_key)
+                if prepared_export:
+                    # Downloading does not rerun the app
+                    st.download_button(
+                        f"Download {prepared_export['rows']:,} rows ({prepared_export['size'] / 1024:,.0f} KB)",
+                        data=prepared_export["file"], file_name=export.file_name(export_table, export_format, date_range),
+                        mime=export.FORMATS[export_format][2], on_click="ignore", key="export_download")
             
-            selected_workout = st.selectbox(
-                "Select Workout",
-                options=workout_dates['display_date'].tolist()
-            )
+            # Workouts in the filtered data, newest first
+            workout_index = data.load_workout_index(version, df)
+            filtered_workouts = workout_index[workout_index.index.isin(filtered_df['workout_id'].unique())]
             
-            if selected_workout:
-                selected_date_str, selected_title = selected_workout.split(' - ', 1)
-                selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
-                
-                workout_detail = filtered_df[(filtered_df['workout_date'] == selected_date) & 
-                                            (filtered_df['title'] == selected_title)]
-                
-                # Workout summary
-                start_time = workout_detail['start_time'].min()
-                end_time = workout_detail['end_time'].max()
-                duration = (end_time - start_time).total_seconds() / 60
+            if filtered_workouts.empty:
+                st.info("No workouts in the selected date range.")
+            else:
+                # Only the workouts of the page are sliced and formatted, the pages around it are prepared after it
+                shown_exercises = tuple(selected_exercises) if selected_exercises else None
+                n_pages = history.page_count(len(filtered_workouts))
+                filter_key = (len(filtered_workouts), filtered_workouts.index[0], filtered_workouts.index[-1], shown_exercises)
+                page = history.current_page(filter_key, n_pages)
                 
-                st.markdown(f"<h3>Workout Summary</h3>", unsafe_allow_html=True)
-                col1, col2, col3 = st.columns(3)
+                col1, col2, col3 = st.columns([1, 1, 4])
                 with col1:
-                    st.markdown(f"**Date:** {selected_date}")
+                    st.button("Newer", key="history_newer_page", on_click=history.set_page, args=(page - 1,),
+                              disabled=page <= 0)
                 with col2:
-                    st.markdown(f"**Duration:** {duration:.0f} minutes")
+                    st.button("Older", key="history_older_page", on_click=history.set_page, args=(page + 1,),
+                              disabled=page >= n_pages - 1)
                 with col3:
-                    st.markdown(f"**Exercises:** {workout_detail['exercise_title'].nunique()}")
+                    st.markdown(f"Page {page + 1} of {n_pages} ({len(filtered_workouts)} workouts)")
                 
-                # Exercise details
-                st.markdown(f"<h3>Exercise Details</h3>", unsafe_allow_html=True)
+                workout_ids = history.page_ids(filtered_workouts, page)
+                for workout in data.load_history_page(version, workout_ids, shown_exercises, df, filtered_workouts):
+                    st.markdown(f"<h3>{workout['label']}</h3>", unsafe_allow_html=True)
+                    st.markdown(f"**Duration:** {workout['duration']:.0f} minutes | **Exercises:** {workout['exercises']} | "
+                                f"**Sets:** {workout['sets']} | **Volume:** {workout['volume']:,.0f} kg")
+                    # One table per workout, grouped by exercise
+                    st.dataframe(workout['table'], use_container_width=True, hide_index=True)
                 
-                for exercise in workout_detail['exercise_title'].unique():
-                    exercise_data = workout_detail[workout_detail['exercise_title'] == exercise]
-                    
-                    st.markdown(f"**{exercise}**")
-                    
-                    # Create a table for sets
-                    set_data = []
-                    for _, row in exercise_data.iterrows():
-                        set_type = row['set_type'].capitalize() if pd.notna(row['set_type']) else ''
-                        weight = f"{row['weight_kg']:.1f} kg" if pd.notna(row['weight_kg']) else '-'
-                        reps = f"{row['reps']}" if pd.notna(row['reps']) else '-'
-                        distance = f"{row['distance_km']/1000:.2f} km" if pd.notna(row['distance_km']) else '-'
-                        duration = f"{row['duration_seconds']} sec" if pd.notna(row['duration_seconds']) else '-'
-                        rpe = f"{row['rpe']}" if pd.notna(row['rpe']) else '-'
-                        
-                        set_data.append([f"Set {row['set_index']+1}", set_type, weight, reps, distance, duration, rpe])
-                    
-                    if set_data:
-                        set_df = pd.DataFrame(set_data, columns=['Set', 'Type', 'Weight', 'Reps', 'Distance', 'Duration', 'RPE'])
-                        st.dataframe(set_df, use_container_width=True)
-                    
-                    st.markdown("---")
+                history.prefetch(version, df, filtered_workouts, page, n_pages, shown_exercises)
         
-        with tab5:
+        with tab5, profiling.stage("Muscle Analysis"):
             st.markdown('<h2 class="sub-header">Muscle Analysis</h2>', unsafe_allow_html=True)
             
             # Summary metrics for muscles
             col1, col2 = st.columns(2)
             
             with col1:
-                muscle_count = filtered_df['muscle_group'].nunique()
+                muscle_count = cube_cells['muscle_group'].nunique()
                 st.metric("Muscle Groups Trained", muscle_count)
             
             with col2:
-                most_trained = filtered_df['muscle_group'].value_counts().idxmax()
+                most_trained = cube.set_counts(cube_cells, 'muscle_group').idxmax()
                 st.metric("Most Trained Muscle", most_trained.replace('_', ' ').title())
             
+            # Share of each set's volume credited to the secondary muscles of the exercise
+            secondary_weight = st.slider(
+                "Secondary Muscle Weight",
+                min_value=0.0, max_value=1.0,
+                value=muscle_attribution.DEFAULT_SECONDARY_WEIGHT, step=0.05,
+                help="Fraction of a set's volume credited to each secondary muscle worked by the exercise"
+            )
+            incidence = data.load_muscle_incidence(version, df)
+            
             # Volume by muscle group
             st.markdown('<h3>Volume by Muscle Group</h3>', unsafe_allow_html=True)
-            fig = visualization.create_muscle_volume_chart(filtered_df)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_muscle_volume_chart(cube_cells, incidence, secondary_weight, cells=True)
+            ui.display_chart(fig)
             
             # Workout frequency by muscle group
             st.markdown('<h3>Workout Frequency by Muscle Group</h3>', unsafe_allow_html=True)
-            fig = visualization.create_muscle_frequency_chart(filtered_df)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_muscle_frequency_chart(cube_cells, incidence, secondary_weight, cells=True)
+            ui.display_chart(fig)
             
             # Muscle balance analysis
             st.markdown('<h3>Muscle Balance Analysis</h3>', unsafe_allow_html=True)
-            fig = visualization.create_muscle_balance_chart(filtered_df)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_muscle_balance_chart(cube_cells, incidence, secondary_weight, cells=True)
+            ui.display_chart(fig)
             
             # Progress over time for selected muscle group
             st.markdown('<h3>Muscle Group Progress Over Time</h3>', unsafe_allow_html=True)
             
             # Get unique muscle groups
-            muscle_groups = sorted(filtered_df['muscle_group'].unique())
+            muscle_groups = sorted(cube_cells['muscle_group'].unique())
             muscle_groups = [m.replace('_', ' ').title() for m in muscle_groups]
             
             # Select muscle group for progress tracking
@@ -272,43 +326,318 @@ else:
             if selected_muscle:
                 # Convert back to original format for filtering
                 original_muscle = selected_muscle.lower().replace(' ', '_')
-                muscle_df = filtered_df[filtered_df['muscle_group'] == original_muscle].copy()
+                muscle_df = cube_cells[cube_cells['muscle_group'] == original_muscle]
                 
                 if not muscle_df.empty:
                     # Group by date and calculate total volume
                     volume_by_date = muscle_df.groupby('workout_date')['volume'].sum().reset_index()
                     
                     fig = visualization.create_workout_duration_chart(volume_by_date)
-                    st.plotly_chart(fig, use_container_width=True)
+                    ui.display_chart(fig)
                 else:
                     st.info(f"No data available for {selected_muscle} in the selected date range.")
         
-        with tab6:
+        with tab6, profiling.stage("Equipment Analysis"):
             st.markdown('<h2 class="sub-header">Equipment Analysis</h2>', unsafe_allow_html=True)
             
             # Summary metrics for equipment
             col1, col2 = st.columns(2)
             
             with col1:
-                equipment_count = filtered_df['equipment_category'].nunique()
+                equipment_count = cube_cells['equipment_category'].nunique()
                 st.metric("Equipment Types Used", equipment_count)
             
             with col2:
-                most_used = filtered_df['equipment_category'].value_counts().idxmax()
+                most_used = cube.set_counts(cube_cells, 'equipment_category').idxmax()
                 st.metric("Most Used Equipment", most_used.replace('_', ' ').title())
             
             # Volume by equipment type
             st.markdown('<h3>Volume by Equipment Type</h3>', unsafe_allow_html=True)
-            fig = visualization.create_equipment_volume_chart(filtered_df)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_equipment_volume_chart(cube_cells)
+            ui.display_chart(fig)
             
             # Exercise count by equipment type
             st.markdown('<h3>Exercise Count by Equipment Type</h3>', unsafe_allow_html=True)
-            fig = visualization.create_equipment_exercise_chart(filtered_df)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = visualization.create_equipment_exercise_chart(cube_cells)
+            ui.display_chart(fig)
+    
+        with tab7, profiling.stage("Personal Records"):
+            st.markdown('<h2 class="sub-header">Personal Records</h2>', unsafe_allow_html=True)
+            
+            pr_summary = records.personal_records_summary(set_records)
+            if selected_exercises:
+                pr_summary = pr_summary[pr_summary['exercise_title'].isin(selected_exercises)]
+            
+            if pr_summary.empty:
+                st.info("No personal records found yet.")
+            else:
+                # Current bests per exercise
+                st.markdown('<h3>Current Bests</h3>', unsafe_allow_html=True)
+                st.dataframe(
+                    pr_summary.rename(columns={
+                        'exercise_title': 'Exercise', 'weight': 'Best Weight (kg)', 'weight_date': 'Weight Date',
+                        'e1rm': 'Estimated 1RM (kg)', 'e1rm_date': '1RM Date',
+                        'volume': 'Best Set Volume (kg)', 'volume_date': 'Volume Date',
+                        'reps': 'Most Reps', 'reps_date': 'Reps Date',
+                    }).round(1),
+                    use_container_width=True, hide_index=True,
+                    column_config=ui.date_columns('Weight Date', '1RM Date', 'Volume Date', 'Reps Date')
+                )
+                
+                # Records set in the selected date range
+                st.markdown('<h3>Recent Personal Records</h3>', unsafe_allow_html=True)
+                pr_flags = ['is_weight_pr', 'is_e1rm_pr', 'is_volume_pr', 'is_reps_pr']
+                recent_prs = set_records[set_records[pr_flags].any(axis=1) &
+                                         set_records['workout_id'].isin(filtered_df['workout_id'].unique())]
+                recent_prs = recent_prs.sort_values('start_time', ascending=False).head(25)
+                st.dataframe(
+                    recent_prs[['workout_date', 'exercise_title', 'weight_kg', 'reps', 'e1rm'] + pr_flags].rename(columns={
+                        'workout_date': 'Date', 'exercise_title': 'Exercise', 'weight_kg': 'Weight (kg)',
+                        'reps': 'Reps', 'e1rm': 'Estimated 1RM (kg)', 'is_weight_pr': 'Weight PR',
+                        'is_e1rm_pr': '1RM PR', 'is_volume_pr': 'Volume PR', 'is_reps_pr': 'Reps PR',
+                    }).round(1),
+                    use_container_width=True, hide_index=True, column_config=ui.date_columns('Date')
+                )
+                
+                # Best weight for each rep count
+                st.markdown('<h3>Rep Maxes</h3>', unsafe_allow_html=True)
+                rep_maxes = records.rep_max_table(set_records)
+                st.dataframe(rep_maxes.loc[rep_maxes.index.isin(pr_summary['exercise_title'])], use_container_width=True)
+                
+                # Strength relative to the bodyweight logged in Hevy at the time of each set
+                st.markdown('<h3>Relative Strength</h3>', unsafe_allow_html=True)
+                measurements = client_storage.get_generic_data("body_measurements")
+                if st.button("Update bodyweight from Hevy" if measurements else "Load bodyweight from Hevy"):
+                    with st.spinner("Fetching body measurements from Hevy..."):
+                        hevy_api.update_generic("body_measurements")
+                    measurements = client_storage.get_generic_data("body_measurements")
+                
+                if measurements and isinstance(measurements["data"], list):
+                    relative_sets = data.load_relative_strength(
+                        version, measurements["Etag"],
+                        set_records, measurements["data"])
+                    relative_summary = relative_strength.relative_strength_summary(relative_sets)
+                    if selected_exercises and not relative_summary.empty:
+                        relative_summary = relative_summary[relative_summary['exercise_title'].isin(selected_exercises)]
+                    if relative_summary.empty:
+                        st.info("No bodyweight was logged before your sets.")
+                    else:
+                        st.dataframe(
+                            relative_summary.rename(columns={
+                                'exercise_title': 'Exercise', 'relative_e1rm': 'Estimated 1RM / Bodyweight',
+                                'e1rm': 'Estimated 1RM (kg)', 'bodyweight_kg': 'Bodyweight (kg)',
+                                'workout_date': 'Date', 'relative_volume': 'Best Set Volume / Bodyweight',
+                            }).round(2),
+                            use_container_width=True, hide_index=True, column_config=ui.date_columns('Date')
+                        )
+                
+                # Cross-check against the records Hevy keeps server side
+                if st.button("Compare with Hevy records"):
+                    with st.spinner("Fetching personal records from Hevy..."):
+                        hevy_api.update_generic("set_personal_records")
+                    hevy_records = client_storage.get_generic_data("set_personal_records")
+                    if hevy_records and isinstance(hevy_records["data"], list):
+                        comparison = records.compare_with_hevy(records_state, hevy_records["data"])
+                        mismatches = comparison[~comparison['match']]
+                        st.metric("Records matching Hevy", f"{len(comparison) - len(mismatches)} / {len(comparison)}")
+                        if not mismatches.empty:
+                            st.dataframe(mismatches, use_container_width=True, hide_index=True)
+                    else:
+                        st.warning("Could not retrieve personal records from Hevy.")
+    
+        with tab8, profiling.stage("Training Load"):
+            st.markdown('<h2 class="sub-header">Training Load</h2>', unsafe_allow_html=True)
+            
+            # Load arrays cover the whole history so the rolling windows are correct at the range start
+            load = data.load_training_load(version, df)
+            load_columns = [training_load.OVERALL] + [c for c in load["columns"] if c != training_load.OVERALL]
+            selected_load_column = st.selectbox(
+                "Muscle Group",
+                options=load_columns,
+                format_func=lambda x: x.replace('_', ' ').title()
+            )
+            
+            start_date, end_date = date_range if len(date_range) == 2 else (min_date, max_date)
+            load_df = training_load.training_load_range(load, selected_load_column, start_date, end_date)
+            
+            if load_df.empty:
+                st.info("No training load data in the selected date range.")
+            else:
+                latest = load_df.iloc[-1]
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Current ACWR", f"{latest['acwr']:.2f}" if pd.notna(latest['acwr']) else "-")
+                with col2:
+                    st.metric("Last 7 Days Tonnage (kg)", f"{latest['weekly_tonnage']:,.0f}")
+                with col3:
+                    st.metric("Training Monotony", f"{latest['monotony']:.2f}" if pd.notna(latest['monotony']) else "-")
+                
+                # Acute vs chronic workload
+                st.markdown('<h3>Acute:Chronic Workload Ratio</h3>', unsafe_allow_html=True)
+                fig = visualization.create_acwr_chart(load_df, training_load.ACWR_SWEET_SPOT)
+                ui.display_chart(fig)
+                
+                # Weekly tonnage
+                st.markdown('<h3>Weekly Tonnage</h3>', unsafe_allow_html=True)
+                weekly_volume = training_load.weekly_tonnage(load, selected_load_column, start_date, end_date)
+                fig = visualization.create_weekly_tonnage_chart(weekly_volume)
+                ui.display_chart(fig)
+                
+                # Monotony and strain
+                st.markdown('<h3>Training Monotony and Strain</h3>', unsafe_allow_html=True)
+                fig = visualization.create_monotony_chart(load_df)
+                ui.display_chart(fig)
+    
+        with tab9, profiling.stage("Routine Adherence"):
+            st.markdown('<h2 class="sub-header">Routine Adherence</h2>', unsafe_allow_html=True)
+            
+            exercise_adherence, planned_sets = data.load_adherence(version, df)
+            exercise_adherence = exercise_adherence[exercise_adherence['workout_id'].isin(filtered_df['workout_id'].unique())]
+            
+            if exercise_adherence.empty:
+                st.info("No workouts started from a saved routine in the selected date range.")
+            else:
+                workout_summary = adherence.workout_adherence(exercise_adherence)
+                routine_summary = adherence.routine_adherence(exercise_adherence, planned_sets)
+                
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Workouts From Routines", len(workout_summary))
+                with col2:
+                    st.metric("Planned Sets Completed", f"{workout_summary['set_completion'].mean():.0%}")
+                with col3:
+                    st.metric("Skipped Exercises per Workout", f"{workout_summary['skipped_exercises'].mean():.1f}")
+                
+                # Completion of the planned sets over time
+                st.markdown('<h3>Set Completion Over Time</h3>', unsafe_allow_html=True)
+                fig = visualization.create_adherence_chart(workout_summary, routine_summary)
+                ui.display_chart(fig)
+                
+                st.markdown('<h3>Routines</h3>', unsafe_allow_html=True)
+                st.dataframe(
+                    routine_summary.rename(columns={
+                        'routine_title': 'Routine', 'workouts': 'Workouts', 'last_performed': 'Last Performed',
+                        'set_completion': 'Set Completion', 'skipped_exercises': 'Skipped Exercises per Workout',
+                    }).round(2),
+                    use_container_width=True, hide_index=True
+                )
+                
+                # Planned vs. performed for each exercise of a routine
+                selected_routine = st.selectbox(
+                    "Select Routine",
+                    options=routine_summary.index.tolist(),
+                    format_func=lambda routine_id: routine_summary.at[routine_id, 'routine_title']
+                )
+                if selected_routine:
+                    st.dataframe(
+                        adherence.exercise_adherence(exercise_adherence, selected_routine).rename(columns={
+                            'planned_sets': 'Planned Sets', 'actual_sets': 'Avg. Sets',
+                            'planned_reps': 'Planned Reps', 'actual_reps': 'Avg. Reps',
+                            'planned_max_weight': 'Planned Weight (kg)', 'actual_max_weight': 'Avg. Top Weight (kg)',
+                            'skipped': 'Skipped',
+                        }).round(1),
+                        use_container_width=True
+                    )
+    
+        with tab10, profiling.stage("Feed"):
+            st.markdown('<h2 class="sub-header">Workout Feed</h2>', unsafe_allow_html=True)
+            
+            # Pages are fetched ahead in the background, so moving forward rarely waits on the network
+            pager = feed.get_pager()
+            # Callbacks run before the script, so the buttons below already reflect the new page
+            col1, col2, col3 = st.columns([1, 1, 4])
+            with col1:
+                st.button("Previous Page", on_click=pager.previous_page, disabled=pager.current <= 0)
+            with col2:
+                st.button("Next Page" if pager.page() is not None else "Load Feed", key="feed_next_page",
+                          on_click=pager.next_page, disabled=not pager.has_next())
+            
+            page = pager.page()
+            if pager.failed:
+                st.warning("Could not load the feed from Hevy, try again.")
+            if page is None:
+                if pager.exhausted:
+                    st.info("No workouts in your feed yet.")
+                elif not pager.failed:
+                    st.info("Load the workouts of the people you follow to compare them with your own.")
+            elif page["sets"].empty:
+                st.info("No workouts on this page.")
+            else:
+                with col3:
+                    st.markdown(f"Page {pager.current + 1} of {len(pager.pages)} loaded")
+                st.dataframe(
+                    feed.feed_workout_summary(page["sets"]).rename(columns={
+                        'username': 'User', 'title': 'Workout', 'workout_date': 'Date', 'exercises': 'Exercises',
+                        'sets': 'Sets', 'volume': 'Volume (kg)',
+                    }).round(0),
+                    use_container_width=True, hide_index=True, column_config=ui.date_columns('Date')
+                )
+                
+                # Feed workouts share the schema of your own data, so the same analysis applies
+                feed_sets = pager.sets()
+                st.markdown('<h3>Feed Volume by Exercise</h3>', unsafe_allow_html=True)
+                fig = visualization.create_exercise_volume_chart(feed_sets)
+                ui.display_chart(fig)
+                
+                st.markdown('<h3>Best Estimated 1RM Compared</h3>', unsafe_allow_html=True)
+                common_exercises = sorted(set(feed_sets['exercise_title']) & set(set_records['exercise_title']))
+                if not common_exercises:
+                    st.info("None of your exercises appear in the loaded feed workouts yet.")
+                else:
+                    compared_exercise = st.selectbox("Select Exercise to Compare", options=common_exercises)
+                    feed_records, _ = records.compute_personal_records(feed_sets[feed_sets['exercise_title'] == compared_exercise])
+                    usernames = feed_sets.drop_duplicates('workout_id').set_index('workout_id')['username']
+                    feed_best = feed_records.groupby(feed_records['workout_id'].map(usernames))['e1rm'].max()
+                    own_best = set_records.loc[set_records['exercise_title'] == compared_exercise, 'e1rm'].max()
+                    best_e1rm = pd.concat([pd.Series({'You': own_best}), feed_best]).dropna().sort_values(ascending=False)
+                    fig = visualization.create_user_comparison_chart(best_e1rm, 'Best Estimated 1RM (kg)')
+                    ui.display_chart(fig)
+        
+        with tab11, profiling.stage("Query"):
+            st.markdown('<h2 class="sub-header">Query Sets</h2>', unsafe_allow_html=True)
+            st.markdown("Search all your sets, regardless of the sidebar filters. Join conditions with `and`, e.g. "
+                        "`exercise = Squat (Barbell) and weight > 140 and rpe <= 8 and date >= 2025-01-01`. "
+                        f"Fields: {', '.join(query.FIELDS)}. Text fields also take `~` (contains).")
+            query_text = st.text_input("Query", key="set_query")
+            
+            if query_text.strip():
+                try:
+                    conditions = query.parse(query_text)
+                except ValueError as e:
+                    st.error(str(e))
+                    conditions = None
+                
+                if conditions:
+                    # The index is built once per dataset version, each query is binary searches and masks
+                    query_index = data.load_query_index(version, df)
+                    start = time.perf_counter()
+                    rows = query.run(query_index, conditions)
+                    query_ms = (time.perf_counter() - start) * 1000
+                    
+                    if len(rows) == 0:
+                        st.info(f"No sets match ({query_ms:.1f} ms).")
+                    else:
+                        n_pages = history.page_count(len(rows), query.PAGE_SIZE)
+                        page = history.current_page((version, query_text), n_pages, query.QUERY_PAGE_KEY)
+                        
+                        col1, col2, col3 = st.columns([1, 1, 4])
+                        with col1:
+                            st.button("Newer", key="query_newer_page", on_click=history.set_page,
+                                      args=(page - 1, query.QUERY_PAGE_KEY), disabled=page <= 0)
+                        with col2:
+                            st.button("Older", key="query_older_page", on_click=history.set_page,
+                                      args=(page + 1, query.QUERY_PAGE_KEY), disabled=page >= n_pages - 1)
+                        with col3:
+                            st.markdown(f"{len(rows):,} sets of {len(df):,} in {query_ms:.1f} ms, page {page + 1} of {n_pages}")
+                        
+                        st.dataframe(query.result_page(df, rows, page).round(1), use_container_width=True,
+                                     hide_index=True, column_config=ui.date_columns('Date'))
     
     # Display help in sidebar
     ui.display_sidebar_help()
     
     # Add footer
-    ui.display_footer()
\ No newline at end of file
+    ui.display_footer()
+
+# Profiling panel in the sidebar, only when profiling is enabled
+profiling.finish_run()
\ No newline at end of file
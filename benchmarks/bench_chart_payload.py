@@ -0,0 +1,54 @@
+"""
+Chart payload benchmark
+
+Measures the serialized size and serialization time of the long time-series
+charts with and without LTTB downsampling, for growing workout histories.
+
+Usage:
+    python benchmarks/bench_chart_payload.py [n_workouts ...]
+"""
+
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit as st
+
+from benchmarks.synthetic import make_workouts
+from modules import client_storage, data, visualization
+
+# Full resolution, i.e. downsampling disabled
+NO_DOWNSAMPLING = 10 ** 9
+
+def load_dataset(n_workouts):
+    st.session_state[client_storage.WORKOUT_DATA_KEY] = make_workouts(n_workouts)
+    return data.load_workout_data(data.DatasetVersion(f"bench_{n_workouts}", 0))
+
+def build_charts(df, max_points):
+    workout_days = df.drop_duplicates('workout_id')[['workout_date', 'workout_duration', 'title']]
+    progress_df = df[df['exercise_title'] == "Squat (Barbell)"]
+    charts = {"duration": visualization.create_workout_duration_chart(workout_days, max_points)}
+    charts.update(zip(["weight", "volume", "reps"], visualization.create_progress_charts(progress_df, max_points)))
+    return charts
+
+def measure(charts):
+    start = time.perf_counter()
+    payload = sum(len(fig.to_json()) for fig in charts.values())
+    return payload, time.perf_counter() - start
+
+def main(sizes):
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    print(f"{'workouts':>9} {'mode':>12} {'points':>8} {'payload KB':>11} {'to_json ms':>11}")
+    for n_workouts in sizes:
+        df = load_dataset(n_workouts)
+        for mode, max_points in [("full", NO_DOWNSAMPLING), ("downsampled", None)]:
+            charts = build_charts(df, max_points)
+            points = sum(len(trace.x) for fig in charts.values() for trace in fig.data)
+            payload, seconds = measure(charts)
+            print(f"{n_workouts:>9} {mode:>12} {points:>8} {payload / 1024:>11.1f} {seconds * 1000:>11.1f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [500, 1500, 3000, 6000])
@@ -0,0 +1,114 @@
+"""
+Cold start benchmark
+
+Measures how long a fresh Python process takes to import the modules of each
+page of the app (from `python -X importtime`) and to render the page for the
+first time (a streamlit AppTest run of app.py, interpreter start included),
+and which heavy libraries each page pulls in. The login page should load none
+of them.
+
+Usage:
+    python benchmarks/bench_cold_start.py [repeats]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries whose import dominates the start of the app
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "matplotlib", "requests", "pyarrow"]
+
+# Module imports of each page, as in app.py
+PAGE_IMPORTS = {
+    "login": "from modules import auth, profiling, telemetry, ui",
+    "main": "from modules import auth, profiling, telemetry, ui; import pandas; "
+            "from modules import adherence, client_storage, cube, data, export, feed, heatmap, history, muscle_attribution, query, "
+            "records, relative_strength, training_load, visualization, hevy_api",
+}
+
+# Renders app.py once in the child process, logged in with a synthetic history for the main page
+RENDER_SCRIPT = """
+import json, logging, sys, time
+logging.disable(logging.WARNING)
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=300)
+if {logged_in}:
+    from benchmarks.synthetic import make_workouts
+    at.session_state["hevy_auth_token"] = "token"
+    at.session_state["hevy_user_id"] = "bench"
+    at.session_state["hevy_workout_data"] = make_workouts(200)
+at.run()
+print(json.dumps({{"exceptions": len(at.exception), "loaded": [m for m in {heavy} if m in sys.modules]}}))
+"""
+
+def _child_env():
+    # Keep the benchmark runs out of the user's journal and metrics
+    return dict(os.environ, HEVY_JOURNAL_DIR="", HEVY_METRICS_FILE="")
+
+def import_time(statement):
+    """
+    Import time of a statement in a fresh interpreter, after streamlit is imported
+
+    Args:
+        statement (str): Import statement
+
+    Returns:
+        tuple: (milliseconds, heavy modules imported, [(milliseconds, module)] of the slowest top-level imports)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import streamlit; {statement}"],
+                            cwd=ROOT, env=_child_env(), capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative) / 1000, name.rstrip()))
+
+    # Only what is imported after streamlit counts, top-level entries include their dependencies
+    after_streamlit = entries[[name.strip() for _, name in entries].index("streamlit") + 1:]
+    top_level = [(ms, name.strip()) for ms, name in after_streamlit if not name.startswith("  ")]
+    imported = {name.strip() for _, name in after_streamlit}
+    heavy = [module for module in HEAVY_MODULES if module in imported]
+    return sum(ms for ms, _ in top_level), heavy, sorted(top_level, reverse=True)[:5]
+
+def first_render(logged_in):
+    """
+    Time a fresh process rendering app.py once
+
+    Args:
+        logged_in (bool): Render the main page with a synthetic history instead of the login page
+
+    Returns:
+        tuple: (seconds, heavy modules loaded, number of exceptions raised by the page)
+    """
+    script = RENDER_SCRIPT.format(logged_in=logged_in, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=_child_env(),
+                            capture_output=True, text=True, check=True)
+    seconds = time.perf_counter() - start
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return seconds, report["loaded"], report["exceptions"]
+
+def main(repeats):
+    print("Imports after streamlit")
+    for page, statement in PAGE_IMPORTS.items():
+        runs = [import_time(statement) for _ in range(repeats)]
+        ms = statistics.median(run[0] for run in runs)
+        print(f"  {page:>6}: {ms:8.1f} ms  heavy: {', '.join(runs[0][1]) or '-'}")
+        for module_ms, name in runs[0][2]:
+            print(f"          {module_ms:8.1f} ms  {name}")
+
+    print("Time to first render (process start included)")
+    for page, logged_in in [("login", False), ("main", True)]:
+        runs = [first_render(logged_in) for _ in range(repeats)]
+        seconds = statistics.median(run[0] for run in runs)
+        print(f"  {page:>6}: {seconds * 1000:8.1f} ms  heavy: {', '.join(runs[0][1]) or '-'}"
+              f"{'  exceptions: ' + str(runs[0][2]) if runs[0][2] else ''}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Figure payload benchmark
+
+Measures the serialized size and serialization time of every chart of the app
+as built by modules/visualization.py, and after rendering.compact_figure, for
+growing workout histories. Browser render time depends on the client, the
+serialized size is what every chart costs on each rerun.
+
+Usage:
+    python benchmarks/bench_figure_payload.py [n_workouts ...]
+"""
+
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_chart_payload import load_dataset
+from modules import cube, data, records, rendering, training_load, visualization
+
+def build_charts(df, version):
+    workout_cube = data.load_cube(version, df)
+    cells = cube.filter_cube(workout_cube)
+    workouts = cube.filter_workouts(workout_cube)
+    set_records, _ = records.compute_personal_records(df)
+    load = data.load_training_load(version, df)
+    load_df = training_load.training_load_range(load)
+    progress_df = df[df['exercise_title'] == "Squat (Barbell)"]
+
+    charts = {
+        "frequency": visualization.create_workout_frequency_chart(workouts),
+        "duration": visualization.create_workout_duration_chart(
+            workouts[['workout_date', 'workout_duration', 'title']]),
+        "type_pie": visualization.create_workout_type_pie_chart(cells),
+        "exercise_frequency": visualization.create_exercise_frequency_chart(cells),
+        "exercise_volume": visualization.create_exercise_volume_chart(cells),
+        "rpe": visualization.create_exercise_rpe_chart(df),
+        "e1rm": visualization.create_e1rm_chart(set_records[set_records['exercise_title'] == "Squat (Barbell)"]),
+        "muscle_volume": visualization.create_muscle_volume_chart(cells),
+        "equipment_volume": visualization.create_equipment_volume_chart(cells),
+        "acwr": visualization.create_acwr_chart(load_df, training_load.ACWR_SWEET_SPOT),
+        "weekly_tonnage": visualization.create_weekly_tonnage_chart(training_load.weekly_tonnage(load)),
+        "monotony": visualization.create_monotony_chart(load_df),
+    }
+    charts.update(zip(["weight", "volume", "reps"], visualization.create_progress_charts(progress_df)))
+    return {name: fig for name, fig in charts.items() if fig is not None}
+
+def main(sizes):
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    print(f"{'workouts':>9} {'chart':>18} {'points':>7} {'KB':>8} {'compact KB':>11} {'ms':>6} {'compact ms':>11} {'webgl':>6}")
+    for n_workouts in sizes:
+        df = load_dataset(n_workouts)
+        totals = [0, 0]
+        for name, fig in build_charts(df, data.DatasetVersion(f"bench_{n_workouts}", 0)).items():
+            # Warm up the serializer so the first chart is not charged for it
+            rendering.measure_figure(fig)
+            before = rendering.measure_figure(fig)
+            after = rendering.measure_figure(rendering.compact_figure(fig))
+            totals[0] += before["bytes"]
+            totals[1] += after["bytes"]
+            print(f"{n_workouts:>9} {name:>18} {before['points']:>7} {before['bytes'] / 1024:>8.1f} "
+                  f"{after['bytes'] / 1024:>11.1f} {before['seconds'] * 1000:>6.1f} "
+                  f"{after['seconds'] * 1000:>11.1f} {after['webgl_traces']:>6}")
+        print(f"{n_workouts:>9} {'total':>18} {'':>7} {totals[0] / 1024:>8.1f} {totals[1] / 1024:>11.1f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [500, 3000])
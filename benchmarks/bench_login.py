@@ -0,0 +1,121 @@
+"""
+Login benchmark
+
+Measures login-to-first-chart latency against a local stub of the Hevy API
+that answers every request after a fixed delay, so the time is dominated by
+the round trips on the critical path of the login bootstrap and the first sync.
+The app is driven with a streamlit AppTest: the login form is submitted and the
+run ends once the main page has drawn its charts.
+
+Usage:
+    python benchmarks/bench_login.py [n_workouts] [latency_ms]
+"""
+
+import collections
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_workouts
+
+# Workouts per workouts_batch page
+PAGE_SIZE = 10
+
+class StubHevyAPI(ThreadingHTTPServer):
+    """
+    Local stand-in for the Hevy API endpoints used by login and sync
+
+    Args:
+        workouts (dict): {workout_id: workout} served by workouts_batch
+        latency (float): Seconds every request waits before it is answered
+    """
+
+    daemon_threads = True
+
+    def __init__(self, workouts, latency):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.workouts = sorted(workouts.values(), key=lambda workout: workout["index"])
+        self.latency = latency
+        self.requests = collections.Counter()
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, content_type="application/json"):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Etag", f'W/"{len(payload)}"')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self):
+        server = self.server
+        path = self.path.rstrip("/")
+        server.requests[path.split("/")[1]] += 1
+        time.sleep(server.latency)
+        if path == "/login":
+            return {"auth_token": "stub-token"}
+        if path == "/account":
+            return {"id": "bench", "username": "bench", "profile_pic": f"{server.base_url}/profile.png"}
+        if path == "/profile.png":
+            return b"\x89PNG stub"
+        if path == "/workout_count":
+            return {"workout_count": len(server.workouts)}
+        if path.startswith("/workouts_batch/"):
+            start = int(path.rsplit("/", 1)[1])
+            return [workout for workout in server.workouts if workout["index"] >= start][:PAGE_SIZE]
+        if path in ("/workouts_sync_batch", "/routines_sync_batch"):
+            return {"updated": [], "deleted": [], "isMore": False}
+        return None
+
+    def do_GET(self):
+        body = self._route()
+        if body is None:
+            self.send_error(404)
+        else:
+            self._send(body, "image/png" if isinstance(body, bytes) else "application/json")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+def main(n_workouts, latency_ms):
+    server = StubHevyAPI(make_workouts(n_workouts), latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # The API base, journal and metrics are read when the modules are imported by the app
+    os.environ["HEVY_API_BASE"] = server.base_url
+    os.environ["HEVY_JOURNAL_DIR"] = tempfile.mkdtemp()
+    os.environ["HEVY_METRICS_FILE"] = ""
+    logging.disable(logging.WARNING)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py"),
+                           default_timeout=300)
+    at.run()
+    at.text_input[0].input("bench")
+    at.text_input[1].input("password")
+    start = time.perf_counter()
+    at.button[0].click().run()
+    seconds = time.perf_counter() - start
+    server.shutdown()
+
+    pages = -(-n_workouts // PAGE_SIZE) + 1
+    print(f"{n_workouts} workouts ({pages} workouts_batch pages), {latency_ms} ms per request")
+    print(f"login to first chart: {seconds * 1000:.0f} ms, {len(at.get('plotly_chart'))} charts, "
+          f"{len(at.exception)} exceptions")
+    print("requests: " + ", ".join(f"{path or '/'} {count}" for path, count in sorted(server.requests.items())))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30, int(sys.argv[2]) if len(sys.argv) > 2 else 100)
\ No newline at end of file
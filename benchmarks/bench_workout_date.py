@@ -0,0 +1,71 @@
+"""
+Workout date benchmark
+
+Compares the groupbys, distinct counts and date filters of the pipeline keyed by
+the workout day as Python datetime.date objects (object dtype, the former key)
+and as normalized datetime64[ns] days (the current key), for growing workout
+histories.
+
+Usage:
+    python benchmarks/bench_workout_date.py [n_workouts ...]
+"""
+
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from benchmarks.bench_chart_payload import load_dataset
+
+# Timing repeats, the best one is reported
+REPEATS = 5
+
+def operations(df, date_range):
+    """
+    Operations on the workout date key, as run by the app and the cube
+
+    Args:
+        df (pd.DataFrame): Set-level workout data, 'workout_date' in the key type being measured
+        date_range (list): Start and end date of the filter
+
+    Returns:
+        dict: {name: callable}
+    """
+    start_date, end_date = date_range
+    if df['workout_date'].dtype == object:
+        def date_filter():
+            dates = df['start_time'].dt.date
+            return df[(dates >= start_date) & (dates <= end_date)]
+    else:
+        def date_filter():
+            return df[(df['workout_date'] >= pd.Timestamp(start_date)) & (df['workout_date'] <= pd.Timestamp(end_date))]
+
+    return {
+        "groupby sum": lambda: df.groupby('workout_date')['volume'].sum(),
+        "groupby 2 keys": lambda: df.groupby(['workout_date', 'muscle_group']).size(),
+        "nunique": lambda: df['workout_date'].nunique(),
+        "drop_duplicates": lambda: df.drop_duplicates('workout_date'),
+        "date filter": date_filter,
+    }
+
+def best_ms(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEATS)) * 1000
+
+def main(sizes):
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    print(f"{'workouts':>9} {'sets':>8} {'operation':>16} {'date ms':>9} {'datetime64 ms':>14} {'speedup':>8}")
+    for n_workouts in sizes:
+        df = load_dataset(n_workouts)
+        object_df = df.assign(workout_date=df['start_time'].dt.date)
+        date_range = [df['start_time'].min().date(), df['start_time'].max().date()]
+        object_ops = operations(object_df, date_range)
+        for name, func in operations(df, date_range).items():
+            before, after = best_ms(object_ops[name]), best_ms(func)
+            print(f"{n_workouts:>9} {len(df):>8} {name:>16} {before:>9.2f} {after:>14.2f} {before / after:>7.1f}x")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [500, 1500, 3000, 6000])
\ No newline at end of file
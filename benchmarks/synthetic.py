@@ -0,0 +1,79 @@
+"""
+Synthetic Hevy workout histories for the benchmarks
+
+Generates workouts shaped like the ones returned by workouts_batch, so the
+benchmarks can exercise the real data and visualization code without an account.
+"""
+
+import random
+import uuid
+
+# (title, template id, primary muscle, secondary muscles, equipment)
+EXERCISES = [
+    ("Squat (Barbell)", "D04AC939", "quadriceps", ["glutes", "hamstrings"], "barbell"),
+    ("Bench Press (Barbell)", "79D0BB3A", "chest", ["triceps", "shoulders"], "barbell"),
+    ("Deadlift (Barbell)", "C6272009", "hamstrings", ["lower_back", "glutes"], "barbell"),
+    ("Overhead Press (Barbell)", "7B8D84E8", "shoulders", ["triceps"], "barbell"),
+    ("Lat Pulldown (Cable)", "6A6C31A5", "lats", ["biceps"], "machine"),
+    ("Bent Over Row (Barbell)", "55E6546F", "upper_back", ["lats", "biceps"], "barbell"),
+    ("Bicep Curl (Dumbbell)", "37FCC2BB", "biceps", [], "dumbbell"),
+    ("Triceps Pushdown", "93A552C6", "triceps", [], "machine"),
+    ("Leg Press (Machine)", "C7973E0E", "quadriceps", ["glutes"], "machine"),
+    ("Standing Calf Raise", "06745E58", "calves", [], "machine"),
+    ("Plank", "C6C9B8A0", "abdominals", [], "none"),
+]
+
+WORKOUT_TITLES = ["Push", "Pull", "Legs", "Upper", "Lower"]
+
+def make_workouts(n_workouts, seed=0, start_time=1420070400):
+    """
+    Generate a workout history
+
+    Args:
+        n_workouts (int): Number of workouts
+        seed (int): Random seed
+        start_time (int): Unix timestamp of the first workout
+
+    Returns:
+        dict: {workout_id: workout} like client_storage.get_workout_data
+    """
+    rng = random.Random(seed)
+    workouts = {}
+    timestamp = start_time
+    for index in range(n_workouts):
+        timestamp += rng.choice([1, 1, 2, 2, 3]) * 86400
+        workout_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        exercises = []
+        for title, template_id, muscle, other_muscles, equipment in rng.sample(EXERCISES, 5):
+            bodyweight = equipment == "none"
+            sets = [{
+                "indicator": "warmup" if set_index == 0 and not bodyweight else "normal",
+                "weight_kg": None if bodyweight else round(rng.uniform(20, 160) * 2) / 2,
+                "reps": None if bodyweight else rng.randint(3, 12),
+                "distance_meters": None,
+                "duration_seconds": rng.randint(30, 90) if bodyweight else None,
+                "rpe": rng.choice([None, None, 7, 7.5, 8, 8.5, 9]),
+            } for set_index in range(rng.randint(3, 5))]
+            exercises.append({
+                "title": title,
+                "exercise_template_id": template_id,
+                "superset_id": None,
+                "notes": "",
+                "muscle_group": muscle,
+                "other_muscles": other_muscles,
+                "exercise_type": "duration" if bodyweight else "weight_reps",
+                "equipment_category": equipment,
+                "sets": sets,
+            })
+        workouts[workout_id] = {
+            "id": workout_id,
+            "index": index,
+            "name": rng.choice(WORKOUT_TITLES),
+            "description": "",
+            "start_time": timestamp,
+            "end_time": timestamp + rng.randint(2700, 5400),
+            "updated_at": "2024-01-01T00:00:00.000Z",
+            "routine_id": None,
+            "exercises": exercises,
+        }
+    return workouts
@@ -0,0 +1,181 @@
+"""
+Routine Adherence
+
+Compares performed workouts with the routines they were started from. Routines
+are flattened into a planned set table once, and planned and performed sets are
+aggregated per exercise template and matched with joins on
+(routine_id, exercise_template_id), so every workout of the history is compared
+with its routine in a few column-wise passes.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Set types left out of both the plan and the performed sets
+EXCLUDED_SET_TYPES = ["warmup"]
+
+# Match status of an exercise in a workout
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+STATUS_ADDED = "added"
+
+_PLANNED_COLUMNS = ['routine_id', 'routine_title', 'exercise_template_id', 'exercise_title',
+                    'set_index', 'set_type', 'weight_kg', 'reps']
+
+def flatten_routines(routines):
+    """
+    Flatten routines into one row per planned set
+
+    Args:
+        routines (dict): {routine_id: routine} like client_storage.get_routine_data
+
+    Returns:
+        pd.DataFrame: Planned sets with routine_id, routine_title, exercise_template_id,
+        exercise_title, set_index, set_type, weight_kg and reps
+    """
+    rows = []
+    for routine_id, routine in (routines or {}).items():
+        routine_title = routine.get('title', routine.get('name', 'Untitled'))
+        for exercise in routine.get('exercises', []):
+            for i, set_data in enumerate(exercise.get('sets', [])):
+                reps = set_data.get('reps')
+                # Sets planned as a rep range count with the bottom of the range
+                if reps is None and isinstance(set_data.get('rep_range'), dict):
+                    reps = set_data['rep_range'].get('start')
+                rows.append((routine_id, routine_title, exercise.get('exercise_template_id'),
+                             exercise.get('title', 'Unknown Exercise'), i,
+                             set_data.get('indicator', 'normal'), set_data.get('weight_kg'), reps))
+    planned = pd.DataFrame(rows, columns=_PLANNED_COLUMNS)
+    planned[['weight_kg', 'reps']] = planned[['weight_kg', 'reps']].astype(float)
+    return planned
+
+def _per_exercise(sets, keys):
+    sets = sets[~sets['set_type'].isin(EXCLUDED_SET_TYPES)]
+    sets = sets.assign(set_volume=sets['weight_kg'] * sets['reps'])
+    return sets.groupby(keys, sort=False).agg(
+        exercise_title=('exercise_title', 'first'),
+        sets=('set_index', 'size'),
+        reps=('reps', 'sum'),
+        max_weight=('weight_kg', 'max'),
+        volume=('set_volume', 'sum'),
+    )
+
+def build_adherence(df, planned):
+    """
+    Match every exercise of every workout started from a routine with the routine's plan
+
+    Args:
+        df (pd.DataFrame): Set-level workout data from load_workout_data
+        planned (pd.DataFrame): Planned sets from flatten_routines
+
+    Returns:
+        pd.DataFrame: One row per (workout, exercise template) with planned_* and actual_*
+        sets, reps, max_weight and volume, a status (done, skipped or added) and set_completion
+    """
+    from_routine = df[df['routine_id'].notna() & df['routine_id'].isin(planned['routine_id'].unique())]
+    keys = ['routine_id', 'exercise_template_id']
+
+    plan = _per_exercise(planned, keys).add_prefix('planned_')
+    actual = _per_exercise(from_routine, ['workout_id'] + keys).add_prefix('actual_')
+
+    # Each workout expects every exercise of its routine: broadcast the plan over the workouts
+    workouts = from_routine.drop_duplicates('workout_id')[['workout_id', 'routine_id', 'start_time', 'title']]
+    expected = workouts.merge(plan.reset_index(), on='routine_id', how='inner')
+    expected = expected.set_index(['workout_id'] + keys)
+
+    # The outer join keeps planned exercises that were skipped and exercises added on the day
+    adherence = expected.join(actual, how='outer')
+    workout_info = workouts.set_index('workout_id')[['start_time', 'title']]
+    adherence = adherence.drop(columns=['start_time', 'title']).join(workout_info, on='workout_id')
+
+    adherence['exercise_title'] = adherence['planned_exercise_title'].fillna(adherence['actual_exercise_title'])
+    adherence = adherence.drop(columns=['planned_exercise_title', 'actual_exercise_title'])
+    for column in ['planned_sets', 'actual_sets']:
+        adherence[column] = adherence[column].fillna(0).astype(int)
+
+    adherence['status'] = np.select(
+        [adherence['planned_sets'] == 0, adherence['actual_sets'] == 0],
+        [STATUS_ADDED, STATUS_SKIPPED], STATUS_DONE)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adherence['set_completion'] = np.where(
+            adherence['planned_sets'] > 0,
+            np.minimum(adherence['actual_sets'], adherence['planned_sets']) / adherence['planned_sets'],
+            np.nan)
+    return adherence.reset_index().sort_values(['start_time', 'workout_id'], kind='stable', ignore_index=True)
+
+def workout_adherence(adherence):
+    """
+    Summarise adherence per workout
+
+    Args:
+        adherence (pd.DataFrame): Exercise-level adherence from build_adherence
+
+    Returns:
+        pd.DataFrame: One row per workout with planned and completed sets, set completion,
+        and the number of skipped and added exercises
+    """
+    adherence = adherence.assign(
+        completed_sets=np.minimum(adherence['actual_sets'], adherence['planned_sets']),
+        skipped=adherence['status'] == STATUS_SKIPPED,
+        added=adherence['status'] == STATUS_ADDED,
+    )
+    summary = adherence.groupby('workout_id', sort=False).agg(
+        routine_id=('routine_id', 'first'),
+        start_time=('start_time', 'first'),
+        title=('title', 'first'),
+        planned_sets=('planned_sets', 'sum'),
+        completed_sets=('completed_sets', 'sum'),
+        skipped_exercises=('skipped', 'sum'),
+        added_exercises=('added', 'sum'),
+    )
+    summary['set_completion'] = summary['completed_sets'] / summary['planned_sets'].where(summary['planned_sets'] > 0)
+    return summary
+
+def routine_adherence(adherence, planned):
+    """
+    Summarise adherence per routine
+
+    Args:
+        adherence (pd.DataFrame): Exercise-level adherence from build_adherence
+        planned (pd.DataFrame): Planned sets from flatten_routines
+
+    Returns:
+        pd.DataFrame: One row per performed routine with its title, number of workouts,
+        average set completion and skipped exercises per workout
+    """
+    per_workout = workout_adherence(adherence)
+    summary = per_workout.groupby('routine_id').agg(
+        workouts=('title', 'size'),
+        last_performed=('start_time', 'max'),
+        set_completion=('set_completion', 'mean'),
+        skipped_exercises=('skipped_exercises', 'mean'),
+    )
+    titles = planned.drop_duplicates('routine_id').set_index('routine_id')['routine_title']
+    summary.insert(0, 'routine_title', titles.reindex(summary.index))
+    return summary.sort_values('last_performed', ascending=False)
+
+def exercise_adherence(adherence, routine_id):
+    """
+    Compare the plan of a routine with the average performance of each exercise
+
+    Args:
+        adherence (pd.DataFrame): Exercise-level adherence from build_adherence
+        routine_id (str): Routine to summarise
+
+    Returns:
+        pd.DataFrame: One row per exercise of the routine with planned values, average actual
+        values over the workouts where it was done, and how often it was skipped
+    """
+    rows = adherence[(adherence['routine_id'] == routine_id) & (adherence['status'] != STATUS_ADDED)]
+    done = rows['status'] == STATUS_DONE
+    rows = rows.assign(actual_sets=rows['actual_sets'].where(done), skipped=~done)
+    return rows.groupby('exercise_template_id', sort=False).agg(
+        exercise_title=('exercise_title', 'first'),
+        planned_sets=('planned_sets', 'first'),
+        actual_sets=('actual_sets', 'mean'),
+        planned_reps=('planned_reps', 'first'),
+        actual_reps=('actual_reps', 'mean'),
+        planned_max_weight=('planned_max_weight', 'first'),
+        actual_max_weight=('actual_max_weight', 'mean'),
+        skipped=('skipped', 'mean'),
+    ).set_index('exercise_title')
\ No newline at end of file
@@ -1,5 +1,12 @@
+import logging
+import os
+import threading
+import time
+
 import streamlit as st
-from modules import client_storage, hevy_api
+from modules import client_storage, hevy_api, journal, telemetry
+
+logger = logging.getLogger(__name__)
 
 def check_login_status():
     """
@@ -17,6 +24,15 @@ def check_login_status():
     
     return False, None
 
+def get_user_id():
+    """
+    Get the ID of the logged in Hevy user
+    
+    Returns:
+        str or None: User ID if logged in
+    """
+    return client_storage.get_auth_data()[1]
+
 def login(username, password):
     """
     Login to Hevy with username and password
@@ -31,38 +47,18 @@ def login(username, password):
     # Call the Hevy API login function
     status_code = hevy_api.login(username, password)
     
-    # If login successful, store auth data in client-side storage
+    # hevy_api.login has stored the auth data, account, profile image and workout count, restored
+    # previously synced workouts from the local journal and stored the first new page, so the
+    # sync below only has to fetch what is left
     if status_code == 200:
-        # Get auth token and user ID from the API response
-        login_status = hevy_api.is_logged_in()
-        if login_status[0]:
-            auth_token = login_status[2]
-            user_id = login_status[1].split('_')[-1] if login_status[1] else ''
-            
-            # Store in client-side storage
-            client_storage.store_auth_data(auth_token, user_id)
-            
-            # Also store account data if available
-            try:
-                account_data = hevy_api.update_generic("account")
-                if isinstance(account_data, dict) and "data" in account_data:
-                    client_storage.store_account_data(account_data["data"], account_data.get("Etag", ""))
-                
-                # Store workout count data
-                workout_count = hevy_api.update_generic("workout_count")
-                if isinstance(workout_count, dict) and "data" in workout_count:
-                    client_storage.store_workout_count(workout_count["data"], workout_count.get("Etag", ""))
-                    
-                # Automatically sync workout data after successful login
-                with st.spinner("Syncing your workouts..."):
-                    sync_success, sync_message = sync_data()
-                    if not sync_success:
-                        st.warning(f"Could not sync workout data: {sync_message}")
-                    # Clear cache to reload data
-                    if 'cache_data' in dir(st) and callable(getattr(st, 'cache_data', {}).get('clear', None)):
-                        st.cache_data.clear()
-            except Exception as e:
-                st.warning(f"Could not retrieve all account data: {e}")
+        try:
+            # Automatically sync workout data after successful login
+            with st.spinner("Syncing your workouts..."):
+                sync_success, sync_message = sync_data()
+                if not sync_success:
+                    st.warning(f"Could not sync workout data: {sync_message}")
+        except Exception as e:
+            st.warning(f"Could not sync workout data: {e}")
     
     return status_code
 
@@ -73,45 +69,129 @@ def logout():
     Returns:
         bool: True if logout successful
     """
-    # Clear all client-side storage
+    # Stop fetching the feed with the old token and clear all client-side storage
+    from modules import feed
+    feed.reset_pager()
     client_storage.clear_all_data()
     return True
 
+# Seconds after a successful sync during which syncs of the same user are answered with its result
+SYNC_COOLDOWN_SECONDS = float(os.environ.get("HEVY_SYNC_COOLDOWN", "30"))
+
+# Seconds a session waits for the sync of another session of the same user before giving up
+SYNC_WAIT_SECONDS = float(os.environ.get("HEVY_SYNC_WAIT", "120"))
+
+# Sync in flight or last finished per user id, shared by all sessions of the process:
+# {"done": threading.Event, "result": (success, message), "workouts", "routines", "generation", "finished_at"}
+_flights = {}
+_flights_lock = threading.Lock()
+
 def sync_data():
     """
     Sync workout data from Hevy
     
+    Only one sync runs at a time per user: a session asking for a sync while another
+    session of the same user is syncing waits for that sync and takes over its data,
+    for at most SYNC_WAIT_SECONDS.
+    Within SYNC_COOLDOWN_SECONDS of a successful sync, the data and result of that
+    sync are reused instead of syncing again.
+    
     Returns:
         tuple: (success, message) - Boolean indicating success and status message
     """
-    # First try to get any new workouts in a loop until there are no more new workouts
-    has_more_workouts = True
-    while has_more_workouts:
-        status, has_new = hevy_api.batch_download()
-        if status != 200:
-            return False, f"Error syncing workouts: {status}"
-        # If no new workouts were found, exit the loop
-        if not has_new:
-            has_more_workouts = False
+    # requests is first imported by the first API call, not by the login page (see benchmarks/bench_cold_start.py)
+    import requests
+
+    user_id = get_user_id()
+    with _flights_lock:
+        # Finished syncs past their cooldown no longer hold on to their data
+        for finished_user_id in [uid for uid, f in _flights.items() if f["done"].is_set() and not _in_cooldown(f)]:
+            del _flights[finished_user_id]
+        flight = _flights.get(user_id)
+        leader = flight is None
+        if leader:
+            flight = {"done": threading.Event(), "result": None, "workouts": None, "routines": None,
+                      "generation": None, "finished_at": None}
+            _flights[user_id] = flight
     
-    # Then check for updates to existing workouts in a loop until there are no more updates
-    has_more_updates = True
-    while has_more_updates:
-        update_status, need_more = hevy_api.workouts_sync_batch()
-        if update_status != 200:
-            return False, f"Error syncing workout updates: {update_status}"
-        # If no more updates are needed, exit the loop
-        if not need_more:
-            has_more_updates = False
+    if not leader:
+        if not flight["done"].wait(timeout=SYNC_WAIT_SECONDS):
+            telemetry.count("syncs_wait_expired")
+            return False, "Sync already in progress"
+        telemetry.count("syncs_coalesced")
+        success, message = flight["result"]
+        # The session that ran the sync already holds its data
+        if success and client_storage.get_data_generation() != flight["generation"]:
+            client_storage.store_synced_data(flight["workouts"], flight["routines"], flight["generation"])
+        return success, message
     
-    # Also sync routines in a loop until there are no more routine updates
-    has_more_routines = True
-    while has_more_routines:
-        routine_status, routine_more = hevy_api.routines_sync_batch()
-        if routine_status != 200:
-            return False, f"Error syncing routines: {routine_status}"
-        # If no more routine updates are needed, exit the loop
-        if not routine_more:
-            has_more_routines = False
+    try:
+        # Requests, bytes and items of the whole sync are summarised in the telemetry
+        with telemetry.sync_span("sync_data") as summary:
+            success, message = _sync_streams()
+            if not success:
+                summary["status"] = message
+        if success:
+            flight["workouts"] = dict(client_storage.get_workout_data())
+            flight["routines"] = dict(client_storage.get_routine_data())
+            flight["generation"] = client_storage.get_data_generation()
+        flight["result"] = (success, message)
+    except requests.RequestException as e:
+        # e.g. a request past hevy_api.REQUEST_TIMEOUT, the sync can be retried
+        success, message = False, f"Error syncing workout data: {e}"
+        flight["result"] = (success, message)
+    except Exception as e:
+        flight["result"] = (False, f"Error syncing workout data: {e}")
+        raise
+    finally:
+        # Also set when the script run was stopped mid-sync, waiting sessions must not hang
+        if flight["result"] is None:
+            flight["result"] = (False, "The sync was interrupted")
+        flight["finished_at"] = time.monotonic()
+        flight["done"].set()
+    return success, message
+
+def _in_cooldown(flight):
+    return flight["result"][0] and time.monotonic() - flight["finished_at"] < SYNC_COOLDOWN_SECONDS
+
+# Sync stages in order: (stage name, hevy_api function syncing one page, error message prefix)
+SYNC_STAGES = [
+    ("download", "batch_download", "Error syncing workouts"),
+    ("workouts", "workouts_sync_batch", "Error syncing workout updates"),
+    ("routines", "routines_sync_batch", "Error syncing routines"),
+]
+
+# Seconds during which a failed sync is resumed, later syncs start over so skipped stages catch up
+SYNC_RESUME_SECONDS = 15 * 60
+
+def _sync_streams():
+    # Each stage pages until the API reports nothing more. The stage in progress is saved
+    # after every page, so a sync that failed resumes at that stage instead of starting over
+    user_id = get_user_id()
+    progress = journal.load_cursors(user_id).get("sync") or {}
+    if time.time() - progress.get("saved_at", 0) > SYNC_RESUME_SECONDS:
+        progress = {}
+    stage_names = [name for name, _, _ in SYNC_STAGES]
+    first_stage = stage_names.index(progress["stage"]) if progress.get("stage") in stage_names else 0
+    if first_stage or progress.get("pages"):
+        logger.info("resuming sync at %s after %d pages", stage_names[first_stage], progress.get("pages", 0))
+    
+    for i in range(first_stage, len(SYNC_STAGES)):
+        name, function_name, error_message = SYNC_STAGES[i]
+        pages = progress.get("pages", 0) if i == first_stage else 0
+        has_more = True
+        while has_more:
+            status, has_more = getattr(hevy_api, function_name)()
+            if status != 200:
+                return False, f"{error_message}: {status}"
+            pages += 1
+            if has_more:
+                journal.save_cursor(user_id, "sync", {"stage": name, "pages": pages, "saved_at": time.time()})
+        
+        # Stage complete, a failure from here on resumes at the next one
+        next_stage = None
+        if i + 1 < len(SYNC_STAGES):
+            next_stage = {"stage": SYNC_STAGES[i + 1][0], "pages": 0, "saved_at": time.time()}
+        journal.save_cursor(user_id, "sync", next_stage)
     
     return True, "All workout data synced successfully!"
\ No newline at end of file
@@ -1,6 +1,7 @@
 import streamlit as st
 import json
 import base64
+import itertools
 
 # Define storage keys
 AUTH_TOKEN_KEY = "hevy_auth_token"
@@ -10,6 +11,12 @@ ACCOUNT_DATA_KEY = "hevy_account_data"
 WORKOUT_COUNT_KEY = "hevy_workout_count"
 ROUTINE_DATA_KEY = "hevy_routine_data"
 PROFILE_IMAGE_KEY = "hevy_profile_image"
+GENERIC_DATA_KEY_PREFIX = "hevy_generic_"
+DATA_GENERATION_KEY = "hevy_data_generation"
+SYNC_CURSORS_KEY = "hevy_sync_cursors"
+
+# Generations are unique across the sessions of the process, whose caches are shared
+_generations = itertools.count(1)
 
 def store_auth_data(auth_token, user_id):
     """
@@ -76,6 +83,7 @@ def store_workout_data(workout_id, workout_data):
         
         # Store workout data with workout ID as key
         st.session_state[WORKOUT_DATA_KEY][workout_id] = workout_data
+        bump_data_generation()
         return True
     except Exception as e:
         st.error(f"Error storing workout data: {e}")
@@ -100,6 +108,27 @@ def get_workout_data(workout_id=None):
         st.error(f"Error retrieving workout data: {e}")
         return None
 
+def delete_workout_data(workout_id):
+    """
+    Delete workout data from client-side storage
+    
+    Args:
+        workout_id (str): ID of the workout to delete
+        
+    Returns:
+        bool: True if the workout was stored and has been deleted
+    """
+    try:
+        workout_data = st.session_state.get(WORKOUT_DATA_KEY, {})
+        if workout_id in workout_data:
+            del workout_data[workout_id]
+            bump_data_generation()
+            return True
+        return False
+    except Exception as e:
+        st.error(f"Error deleting workout data: {e}")
+        return False
+
 def store_account_data(account_data, etag):
     """
     Store account data in client-side storage
@@ -178,6 +207,7 @@ def store_routine_data(routine_id, routine_data):
         
         # Store routine data with routine ID as key
         st.session_state[ROUTINE_DATA_KEY][routine_id] = routine_data
+        bump_data_generation()
         return True
     except Exception as e:
         st.error(f"Error storing routine data: {e}")
@@ -202,6 +232,61 @@ def get_routine_data(routine_id=None):
         st.error(f"Error retrieving routine data: {e}")
         return None
 
+def delete_routine_data(routine_id):
+    """
+    Delete routine data from client-side storage
+    
+    Args:
+        routine_id (str): ID of the routine to delete
+        
+    Returns:
+        bool: True if the routine was stored and has been deleted
+    """
+    try:
+        routine_data = st.session_state.get(ROUTINE_DATA_KEY, {})
+        if routine_id in routine_data:
+            del routine_data[routine_id]
+            bump_data_generation()
+            return True
+        return False
+    except Exception as e:
+        st.error(f"Error deleting routine data: {e}")
+        return False
+
+def store_generic_data(name, data, etag):
+    """
+    Store the response of one of the generic Hevy API calls in client-side storage
+    
+    Args:
+        name (str): Name of the API call (e.g. "set_personal_records")
+        data (dict or list): Data from Hevy API
+        etag (str): ETag for data versioning
+        
+    Returns:
+        bool: True if storage successful
+    """
+    try:
+        st.session_state[GENERIC_DATA_KEY_PREFIX + name] = {
+            "data": data,
+            "Etag": etag
+        }
+        return True
+    except Exception as e:
+        st.error(f"Error storing {name} data: {e}")
+        return False
+
+def get_generic_data(name):
+    """
+    Retrieve the response of one of the generic Hevy API calls from client-side storage
+    
+    Args:
+        name (str): Name of the API call (e.g. "set_personal_records")
+        
+    Returns:
+        dict or None: {"data": ..., "Etag": ...} or None if not found
+    """
+    return st.session_state.get(GENERIC_DATA_KEY_PREFIX + name)
+
 def store_profile_image(image_data):
     """
     Store profile image in client-side storage
@@ -237,6 +322,71 @@ def get_profile_image():
         st.error(f"Error retrieving profile image: {e}")
         return None
 
+def bump_data_generation():
+    """
+    Mark the workout and routine data as changed, see get_data_generation
+    """
+    st.session_state[DATA_GENERATION_KEY] = next(_generations)
+
+def get_data_generation():
+    """
+    Get the generation of the stored workout and routine data
+    
+    Every stored or deleted workout or routine (by a sync or a restore from the
+    journal) moves the data to a new generation, unique within the process.
+    
+    Returns:
+        int: Generation, 0 while nothing has been stored
+    """
+    return st.session_state.get(DATA_GENERATION_KEY, 0)
+
+def store_synced_data(workout_data, routine_data, generation):
+    """
+    Replace the workouts and routines with the result of a sync run by another session
+    
+    The session takes over the generation of the data it copies, so the sessions of a
+    user holding the same data share cached results.
+    
+    Args:
+        workout_data (dict): {workout_id: workout}, copied
+        routine_data (dict): {routine_id: routine}, copied
+        generation (int): Generation of the data in the session that synced it
+        
+    Returns:
+        bool: True if storage successful
+    """
+    try:
+        st.session_state[WORKOUT_DATA_KEY] = dict(workout_data)
+        st.session_state[ROUTINE_DATA_KEY] = dict(routine_data)
+        st.session_state[DATA_GENERATION_KEY] = generation
+        return True
+    except Exception as e:
+        st.error(f"Error storing synced data: {e}")
+        return False
+
+def store_sync_cursor(stream, cursor):
+    """
+    Store the cursor of one sync stream in client-side storage, used while the journal is disabled
+    
+    Args:
+        stream (str): Stream name, e.g. "download"
+        cursor (dict or None): Cursor to store, None removes the stream's cursor
+    """
+    cursors = st.session_state.setdefault(SYNC_CURSORS_KEY, {})
+    if cursor is None:
+        cursors.pop(stream, None)
+    else:
+        cursors[stream] = cursor
+
+def get_sync_cursors():
+    """
+    Retrieve the sync cursors from client-side storage
+    
+    Returns:
+        dict: {stream: cursor}, empty if nothing was stored
+    """
+    return dict(st.session_state.get(SYNC_CURSORS_KEY, {}))
+
 def clear_all_data():
     """
     Clear all stored data from client-side storage
@@ -246,7 +396,8 @@ def clear_all_data():
     """
     try:
         keys = [AUTH_TOKEN_KEY, USER_ID_KEY, WORKOUT_DATA_KEY, ACCOUNT_DATA_KEY, 
-                WORKOUT_COUNT_KEY, ROUTINE_DATA_KEY, PROFILE_IMAGE_KEY]
+                WORKOUT_COUNT_KEY, ROUTINE_DATA_KEY, PROFILE_IMAGE_KEY, DATA_GENERATION_KEY, SYNC_CURSORS_KEY]
+        keys += [key for key in st.session_state if str(key).startswith(GENERIC_DATA_KEY_PREFIX)]
         for key in keys:
             if key in st.session_state:
                 del st.session_state[key]
@@ -0,0 +1,132 @@
+"""
+Workout Cube
+
+Pre-aggregated time-bucket cube of the set-level workout data, built once per
+load at day granularity x exercise x muscle group x equipment x workout title. Filters and tab totals are answered from the cube cells, so their
+cost grows with the number of buckets instead of the number of sets.
+
+Cube cells keep the column names of the set-level frame for their dimensions
+('workout_date', 'exercise_title', ...) and for 'volume', so most chart builders
+accept either the filtered sets or the filtered cells.
+
+Cells of a day mix all workouts of that day, so workout counts, durations and
+titles come from a small workout-level table next to the cells instead, with
+the exercises of each workout for the exercise filter.
+"""
+
+import numpy as np
+
+DIMENSIONS = ['exercise_title', 'muscle_group', 'equipment_category', 'title']
+
+# Columns of the workout-level table
+WORKOUT_COLUMNS = ['workout_id', 'workout_date', 'start_time', 'title', 'workout_duration']
+
+# Measures kept per cell and how the sets of a cell are aggregated
+MEASURES = {
+    'volume': 'sum',
+    'set_count': 'sum',
+    'rep_count': 'sum',
+    'max_weight': 'max',
+}
+
+def build_cube(df):
+    """
+    Build the day cube of a workout DataFrame
+
+    Args:
+        df (pd.DataFrame): Set-level workout data from load_workout_data
+
+    Returns:
+        dict: {"day": cells per day sorted by 'workout_date', "workouts": one row per workout
+        sorted by 'start_time', and "workout_exercises": the distinct (workout_id, exercise_title) pairs
+    """
+    sets = df[['workout_date', 'volume', 'reps', 'weight_kg'] + DIMENSIONS].rename(
+        columns={'reps': 'rep_count', 'weight_kg': 'max_weight'})
+    sets['set_count'] = 1
+
+    day_cells = sets.groupby(['workout_date'] + DIMENSIONS, sort=True, dropna=False, observed=True).agg(MEASURES)
+
+    workouts = df[WORKOUT_COLUMNS].drop_duplicates('workout_id').sort_values('start_time', kind='stable')
+    workout_exercises = df[['workout_id', 'exercise_title']].drop_duplicates()
+
+    return {
+        "day": day_cells.reset_index(),
+        "workouts": workouts.reset_index(drop=True),
+        "workout_exercises": workout_exercises.reset_index(drop=True),
+    }
+
+def _date_slice(frame, date_range):
+    # Rows sorted by date, so the date range is a binary search and a slice
+    start_date, end_date = date_range
+    dates = frame['workout_date'].to_numpy()
+    start = np.searchsorted(dates, np.datetime64(start_date, 'ns'), side='left')
+    end = np.searchsorted(dates, np.datetime64(end_date, 'ns') + np.timedelta64(1, 'D'), side='left')
+    return frame.iloc[start:end]
+
+def filter_cube(cube, date_range=None, workout_types=None, exercises=None):
+    """
+    Filter cube cells like data.filter_data filters sets
+
+    Args:
+        cube (dict): Cube from build_cube
+        date_range (list): List containing start and end date
+        workout_types (list): List of workout types to include
+        exercises (list): List of exercises to include
+
+    Returns:
+        pd.DataFrame: Matching cube cells
+    """
+    cells = cube["day"]
+
+    if date_range and len(date_range) == 2:
+        cells = _date_slice(cells, date_range)
+
+    if workout_types and len(workout_types) > 0:
+        cells = cells[cells['title'].isin(workout_types)]
+
+    if exercises and len(exercises) > 0:
+        cells = cells[cells['exercise_title'].isin(exercises)]
+
+    return cells
+
+def filter_workouts(cube, date_range=None, workout_types=None, exercises=None):
+    """
+    Filter the workout-level table like filter_cube filters the cells
+
+    Args:
+        cube (dict): Cube from build_cube
+        date_range (list): List containing start and end date
+        workout_types (list): List of workout types to include
+        exercises (list): Keep the workouts with at least one of these exercises
+
+    Returns:
+        pd.DataFrame: Matching workouts, one row each, with the columns of WORKOUT_COLUMNS
+    """
+    workouts = cube["workouts"]
+
+    if date_range and len(date_range) == 2:
+        workouts = _date_slice(workouts, date_range)
+
+    if workout_types and len(workout_types) > 0:
+        workouts = workouts[workouts['title'].isin(workout_types)]
+
+    if exercises and len(exercises) > 0:
+        pairs = cube["workout_exercises"]
+        workouts = workouts[workouts['workout_id'].isin(pairs.loc[pairs['exercise_title'].isin(exercises), 'workout_id'])]
+
+    return workouts
+
+def set_counts(frame, by):
+    """
+    Count sets per value of a column, for either set rows or cube cells
+
+    Args:
+        frame (pd.DataFrame): Set-level rows or cube cells
+        by (str): Column to count by
+
+    Returns:
+        pd.Series: Number of sets per value, most frequent first
+    """
+    if 'set_count' in frame.columns:
+        return frame.groupby(by)['set_count'].sum().sort_values(ascending=False)
+    return frame[by].value_counts()
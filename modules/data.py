@@ -1,17 +1,65 @@
+import numpy as np
 import pandas as pd
 import os
 import json
 import glob
+import logging
+import collections
 from datetime import datetime
 import streamlit as st
 
-@st.cache_data
-def load_workout_data(user_folder):
+from modules import profiling
+
+logger = logging.getLogger(__name__)
+
+# Session state key for the incrementally maintained personal records
+PERSONAL_RECORDS_KEY = "hevy_personal_records"
+
+# Results kept by each cached loader, the least recently used (e.g. of older dataset versions) are evicted
+CACHE_ENTRIES = 32
+
+# History pages kept, several per dataset version
+HISTORY_CACHE_ENTRIES = 256
+
+# Version token of a user's workout data, the cache key of the loaders below. It is
+# hashed in constant time, whereas a DataFrame argument would be hashed whole on every call.
+DatasetVersion = collections.namedtuple('DatasetVersion', ['user_id', 'generation'])
+
+def _report_error(message):
+    # Shown in the app, logged when running headless (see modules/reports.py) or on a
+    # thread without a script run, e.g. the feed prefetch
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    if st.runtime.exists() and get_script_run_ctx(suppress_warning=True) is not None:
+        st.error(message)
+    else:
+        logger.warning(message)
+
+def dataset_version(user_id):
+    """
+    Get the version token of the workout data in the session
+    
+    Every sync or journal restore that stores or deletes a workout or routine moves
+    the data to a new generation, so cached results of older versions are not reused
+    and no cache has to be cleared.
+    
+    Args:
+        user_id (str): Hevy user ID
+        
+    Returns:
+        DatasetVersion: (user_id, generation)
+    """
+    from modules import client_storage
+    
+    return DatasetVersion(user_id, client_storage.get_data_generation())
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_workout_data(version):
     """
     Load workout data from client-side storage
     
     Args:
-        user_folder (str): Path to the user's folder (kept for compatibility)
+        version (DatasetVersion): Version of the stored data, used as the cache key
         
     Returns:
         pd.DataFrame: DataFrame containing workout data
@@ -19,10 +67,22 @@ def load_workout_data(user_folder):
     # Get data from client-side storage
     from modules import client_storage
     
-    all_workout_data = []
+    return flatten_workouts(client_storage.get_workout_data())
+
+def flatten_workouts(workout_data_dict):
+    """
+    Flatten workouts as returned by the Hevy API into one row per set
     
-    # Get all workout data from client storage
-    workout_data_dict = client_storage.get_workout_data()
+    Used for the user's own workouts and for feed workouts, so both share the
+    same columns and can go through the same analysis and chart functions.
+    
+    Args:
+        workout_data_dict (dict): {workout_id: workout} with workouts as returned by the Hevy API
+        
+    Returns:
+        pd.DataFrame: DataFrame containing workout data, sets of a workout contiguous and in chronological order
+    """
+    all_workout_data = []
     
     if not workout_data_dict:
         return pd.DataFrame()
@@ -35,6 +95,7 @@ def load_workout_data(user_folder):
             workout_start = workout.get('start_time', 0)
             workout_end = workout.get('end_time', 0)
             workout_description = workout.get('description', '')
+            routine_id = workout.get('routine_id', None)
             
             # Convert timestamps to datetime
             start_time = datetime.fromtimestamp(workout_start)
@@ -43,6 +104,7 @@ def load_workout_data(user_folder):
             # Process exercises
             for exercise in workout.get('exercises', []):
                 exercise_title = exercise.get('title', 'Unknown Exercise')
+                exercise_template_id = exercise.get('exercise_template_id', None)
                 superset_id = exercise.get('superset_id', None)
                 exercise_notes = exercise.get('notes', '')
                 muscle_group = exercise.get('muscle_group', 'other')
@@ -61,11 +123,14 @@ def load_workout_data(user_folder):
                     
                     # Create a row for this set
                     row = {
+                        'workout_id': workout_id,
+                        'routine_id': routine_id,
                         'title': workout_title,
                         'start_time': start_time.strftime('%d %b %Y, %H:%M'),
                         'end_time': end_time.strftime('%d %b %Y, %H:%M'),
                         'description': workout_description,
                         'exercise_title': exercise_title,
+                        'exercise_template_id': exercise_template_id,
                         'superset_id': superset_id,
                         'exercise_notes': exercise_notes,
                         'muscle_group': muscle_group,
@@ -82,7 +147,7 @@ def load_workout_data(user_folder):
                     }
                     all_workout_data.append(row)
         except Exception as e:
-            st.error(f"Error processing workout {workout_id}: {e}")
+            _report_error(f"Error processing workout {workout_id}: {e}")
     
     if not all_workout_data:
         return pd.DataFrame()
@@ -97,14 +162,70 @@ def load_workout_data(user_folder):
     # Calculate workout duration in minutes
     df['workout_duration'] = (df['end_time'] - df['start_time']).dt.total_seconds() / 60
     
-    # Extract date only for grouping
-    df['workout_date'] = df['start_time'].dt.date
+    # Day of the workout for grouping, kept as datetime64 (midnight) so groupbys and comparisons
+    # stay native; it is only turned into dates for display
+    df['workout_date'] = df['start_time'].dt.normalize()
     
     # Calculate volume (weight * reps) where applicable
     df['volume'] = df['weight_kg'] * df['reps']
     
+    # Chronological order, the stable sort keeps the sets of each workout contiguous and in logged order
+    df = df.sort_values('start_time', kind='stable').reset_index(drop=True)
+    
     return df
 
+def build_workout_index(df):
+    """
+    Build an index of the workouts in a DataFrame from load_workout_data
+    
+    The sets of a workout are contiguous in the DataFrame, so each workout maps
+    to a row range and its sets are a single slice: df.iloc[start:stop].
+    
+    Args:
+        df (pd.DataFrame): DataFrame containing workout data
+        
+    Returns:
+        pd.DataFrame: One row per workout indexed by workout_id, with start and stop row
+        positions, title, start_time, end_time, workout_date and a display label, newest first
+    """
+    workout_ids = df['workout_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, workout_ids[1:] != workout_ids[:-1]])
+    stops = np.r_[starts[1:], len(df)]
+    
+    index = df.iloc[starts][['workout_id', 'title', 'start_time', 'end_time', 'workout_date']].copy()
+    index['start'] = starts
+    index['stop'] = stops
+    index['label'] = index['workout_date'].dt.strftime('%Y-%m-%d') + ' - ' + index['title']
+    return index.set_index('workout_id').iloc[::-1]
+
+@profiling.profiled
+def format_set_table(workout_sets):
+    """
+    Format the sets of a workout for display
+    
+    Args:
+        workout_sets (pd.DataFrame): Sets of one workout, e.g. a row range from build_workout_index
+        
+    Returns:
+        pd.DataFrame: One row per set with Exercise, Set, Type, Weight, Reps, Distance, Duration and RPE
+    """
+    def formatted(values, fmt):
+        # Missing values are shown as '-'
+        return values.map(fmt.format, na_action='ignore').fillna('-')
+    
+    table = pd.DataFrame({
+        'Exercise': workout_sets['exercise_title'],
+        'Set': 'Set ' + (workout_sets['set_index'] + 1).astype(str),
+        'Type': workout_sets['set_type'].fillna('').str.capitalize(),
+        'Weight': formatted(workout_sets['weight_kg'], '{:.1f} kg'),
+        'Reps': formatted(workout_sets['reps'], '{:g}'),
+        'Distance': formatted(workout_sets['distance_km'] / 1000, '{:.2f} km'),
+        'Duration': formatted(workout_sets['duration_seconds'], '{:g} sec'),
+        'RPE': formatted(workout_sets['rpe'], '{:g}'),
+    })
+    return table.reset_index(drop=True)
+
+@profiling.profiled
 def filter_data(df, date_range=None, workout_types=None, exercises=None):
     """
     Filter workout data based on date range, workout types, and exercises
@@ -120,11 +241,11 @@ def filter_data(df, date_range=None, workout_types=None, exercises=None):
     """
     filtered_df = df.copy()
     
-    # Apply date range filter
+    # Apply date range filter, comparing the datetime64 days with the range as timestamps
     if date_range and len(date_range) == 2:
-        start_date, end_date = date_range
-        filtered_df = filtered_df[(filtered_df['start_time'].dt.date >= start_date) & 
-                                (filtered_df['start_time'].dt.date <= end_date)]
+        start_date, end_date = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+        filtered_df = filtered_df[(filtered_df['workout_date'] >= start_date) & 
+                                (filtered_df['workout_date'] <= end_date)]
     
     # Apply workout type filter
     if workout_types and len(workout_types) > 0:
@@ -134,4 +255,213 @@ def filter_data(df, date_range=None, workout_types=None, exercises=None):
     if exercises and len(exercises) > 0:
         filtered_df = filtered_df[filtered_df['exercise_title'].isin(exercises)]
     
-    return filtered_df
\ No newline at end of file
+    return filtered_df
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_personal_records(version, _df):
+    """
+    Compute personal records for the whole history
+    
+    Cached per version of the workout data. When a version is not cached yet and the
+    sync journal shows that only workouts newer than the ones analysed last in this
+    session were added, the records of that analysis are updated incrementally instead
+    of being recomputed.
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        
+    Returns:
+        tuple: (set_records, state) - See records.compute_personal_records
+    """
+    from modules import journal, records
+    
+    user_id = version.user_id
+    seq = journal.current_seq(user_id)
+    previous = st.session_state.get(PERSONAL_RECORDS_KEY)
+    if previous and previous['user_id'] != user_id:
+        previous = None
+    
+    set_records = None
+    if previous and seq and previous['seq'] == seq:
+        set_records, state = previous['set_records'], previous['state']
+    elif previous and seq:
+        changes = journal.changes_since(user_id, previous['seq'])
+        if changes is not None:
+            workout_changes = [c for c in changes if c['kind'] == journal.KIND_WORKOUT]
+            new_ids = {c['id'] for c in workout_changes}
+            only_new = all(c['op'] == journal.OP_PUT for c in workout_changes) and not (new_ids & previous['workout_ids'])
+            new_df = _df[_df['workout_id'].isin(new_ids)]
+            last_start_time = previous['state']['last_start_time']
+            if only_new and (last_start_time is None or new_df.empty or new_df['start_time'].min() >= last_start_time):
+                new_records, state = records.update_personal_records(previous['state'], new_df)
+                set_records = pd.concat([previous['set_records'], new_records])
+    
+    if set_records is None:
+        set_records, state = records.compute_personal_records(_df)
+    
+    # The journal sequence the records match, the next version is updated from it
+    if seq:
+        st.session_state[PERSONAL_RECORDS_KEY] = {
+            'user_id': user_id,
+            'seq': seq,
+            'workout_ids': set(_df['workout_id'].unique()),
+            'set_records': set_records,
+            'state': state,
+        }
+    return set_records, state
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_workout_index(version, _df):
+    """
+    Build the workout index of the workout data
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        
+    Returns:
+        pd.DataFrame: See build_workout_index
+    """
+    return build_workout_index(_df)
+
+@st.cache_data(max_entries=HISTORY_CACHE_ENTRIES)
+def load_history_page(version, workout_ids, exercises, _df, _workout_index):
+    """
+    Build one page of the workout history browser
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        workout_ids (tuple): Workouts of the page, used as the cache key
+        exercises (tuple): Exercises shown, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        _workout_index (pd.DataFrame): Workout index from load_workout_index (not hashed)
+        
+    Returns:
+        list: See history.build_page
+    """
+    from modules import history
+    
+    return history.build_page(_df, _workout_index, workout_ids, exercises)
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_adherence(version, _df):
+    """
+    Compare the workouts started from a routine with the routine's plan
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        
+    Returns:
+        tuple: (adherence, planned) - See adherence.build_adherence and adherence.flatten_routines
+    """
+    from modules import adherence, client_storage
+    
+    planned = adherence.flatten_routines(client_storage.get_routine_data())
+    return adherence.build_adherence(_df, planned), planned
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_relative_strength(version, measurements_etag, _set_records, _measurements):
+    """
+    Align the flagged sets with the bodyweight history
+    
+    Cached per version of the workout data the records were computed from and
+    Etag of the body measurements.
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        measurements_etag (str): Etag of the body measurements, used as the cache key
+        _set_records (pd.DataFrame): Flagged sets from load_personal_records (not hashed)
+        _measurements (list): Body measurements from Hevy (not hashed)
+        
+    Returns:
+        pd.DataFrame: See relative_strength.add_relative_strength
+    """
+    from modules import relative_strength
+    
+    bodyweight = relative_strength.bodyweight_history(_measurements)
+    return relative_strength.add_relative_strength(_set_records, bodyweight)
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_training_load(version, _df):
+    """
+    Precompute the daily training load arrays for the whole history
+    
+    Like load_workout_data the result is cached per dataset version, so it is
+    rebuilt after a sync that changed the data.
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        
+    Returns:
+        dict: See training_load.build_training_load
+    """
+    from modules import training_load
+    
+    return training_load.build_training_load(_df)
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_muscle_incidence(version, _df):
+    """
+    Build the set x muscle incidence used for secondary muscle attribution
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        
+    Returns:
+        dict: See muscle_attribution.build_muscle_incidence
+    """
+    from modules import muscle_attribution
+    
+    return muscle_attribution.build_muscle_incidence(_df)
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_cube(version, _df):
+    """
+    Build the pre-aggregated day and week cubes of the workout data
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        
+    Returns:
+        dict: See cube.build_cube
+    """
+    from modules import cube
+    
+    return cube.build_cube(_df)
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_query_index(version, _df):
+    """
+    Build the sorted indexes answering set queries
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        
+    Returns:
+        dict: See query.build_index
+    """
+    from modules import query
+    
+    return query.build_index(_df)
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def load_calendar(version, _df):
+    """
+    Bin the whole history on day indices for the training calendar
+    
+    Args:
+        version (DatasetVersion): Version of the workout data, used as the cache key
+        _df (pd.DataFrame): DataFrame containing workout data (not hashed)
+        
+    Returns:
+        dict: See heatmap.build_calendar
+    """
+    from modules import heatmap
+    
+    return heatmap.build_calendar(_df)
\ No newline at end of file
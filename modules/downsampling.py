@@ -0,0 +1,128 @@
+"""
+Downsampling
+
+Largest-Triangle-Three-Buckets (LTTB) downsampling for long time-series traces.
+The number of points kept per trace is derived from the plotted width, so a
+chart never sends more points to the browser than it can draw, while short
+series (e.g. a narrow date range) keep their full resolution.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Width in pixels assumed for charts rendered with use_container_width on the wide layout
+DEFAULT_PLOT_WIDTH = 1200
+
+# Points kept per horizontal pixel
+POINTS_PER_PIXEL = 1
+
+# Traces with more points than this are drawn as plain lines, without markers
+MARKER_THRESHOLD = 300
+
+def max_points(width=DEFAULT_PLOT_WIDTH):
+    """
+    Get the point budget of a trace plotted at a given width
+
+    Args:
+        width (int): Plot width in pixels
+
+    Returns:
+        int: Maximum number of points per trace
+    """
+    return max(3, int(width * POINTS_PER_PIXEL))
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(float)
+    # Dates (datetime64 or date/datetime objects) are compared as nanoseconds
+    return pd.to_datetime(values).to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+
+def lttb_indices(x, y, n_out):
+    """
+    Select the points to keep with Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept. The remaining points are split
+    into n_out - 2 buckets and, bucket by bucket, the point forming the largest
+    triangle with the previously kept point and the average of the next bucket
+    is selected. Bucket bounds and averages are computed for all buckets at
+    once; only the anchor, the point kept from the previous bucket, is carried
+    from one bucket to the next, with each bucket's areas computed with NumPy.
+
+    Args:
+        x (array-like): Sorted x values (numbers or dates)
+        y (array-like): y values
+        n_out (int): Number of points to keep
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket b (0 .. n_out-3) covers points edges[b] .. edges[b+1]-1, excluding the first and last points
+    every = (n - 2) / (n_out - 2)
+    edges = (np.floor(np.arange(n_out - 1) * every) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    sizes = np.diff(edges)
+    x_means = np.add.reduceat(x[:-1], edges[:-1]) / sizes
+    y_means = np.add.reduceat(y[:-1], edges[:-1]) / sizes
+
+    # The bucket after the last one is the last point itself
+    next_x = np.append(x_means[1:], x[-1]).tolist()
+    next_y = np.append(y_means[1:], y[-1]).tolist()
+    x_buckets = np.split(x, edges)[1:-1]
+    y_buckets = np.split(y, edges)[1:-1]
+    starts = edges[:-1].tolist()
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor_x, anchor_y = x[0], y[0]
+    for bucket, (bucket_x, bucket_y) in enumerate(zip(x_buckets, y_buckets)):
+        # Twice the triangle area is |(ax - nx) * (y - ay) - (ax - x) * (ny - ay)|, linear in the bucket's points
+        dx, dy = anchor_x - next_x[bucket], next_y[bucket] - anchor_y
+        best = int(np.argmax(np.abs(dx * bucket_y + dy * bucket_x - (dx * anchor_y + dy * anchor_x))))
+        anchor_x, anchor_y = bucket_x[best], bucket_y[best]
+        selected[bucket + 1] = starts[bucket] + best
+    return selected
+
+def downsample_figure(fig, n_out=None):
+    """
+    Downsample every line trace of a figure in place
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to downsample
+        n_out (int, optional): Points kept per trace, defaults to max_points()
+
+    Returns:
+        plotly.graph_objects.Figure: The same figure
+    """
+    n_out = n_out or max_points()
+    for trace in fig.data:
+        if trace.type not in ('scatter', 'scattergl') or trace.x is None or trace.y is None:
+            continue
+        if 'lines' not in (trace.mode or 'lines'):
+            continue
+
+        x = np.asarray(trace.x)
+        y = np.asarray(trace.y, dtype=float)
+        if len(x) > n_out:
+            valid = np.flatnonzero(~np.isnan(y))
+            keep = valid[lttb_indices(x[valid], y[valid], n_out)]
+            trace.x, trace.y = x[keep], y[keep]
+
+            # Per-point hover data has to follow the kept points
+            for attribute in ('customdata', 'text', 'hovertext'):
+                values = getattr(trace, attribute)
+                if values is not None and not isinstance(values, str) and len(values) == len(x):
+                    setattr(trace, attribute, np.asarray(values)[keep])
+
+        # Markers on thousands of points add weight without adding information
+        if len(trace.x) > MARKER_THRESHOLD and trace.mode and 'markers' in trace.mode:
+            trace.mode = 'lines'
+    return fig
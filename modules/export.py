@@ -0,0 +1,194 @@
+"""
+Export
+
+CSV and Parquet export of the set-level data and of a workout-level table. The
+files are encoded by generators, a chunk of rows at a time, and written to a
+temporary file, so an export never holds the encoded text of the whole history
+next to the DataFrame. Parquet row groups are zstd compressed.
+
+Exports are only encoded when asked for and kept in the session until the data,
+the filters or the requested export change.
+"""
+
+import io
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+# Rows encoded per chunk, and per Parquet row group
+CHUNK_ROWS = 20000
+
+# Session state key of the prepared export
+EXPORT_KEY = "hevy_export"
+
+# {format: (label, file extension, MIME type)}
+FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+}
+
+# Set-level columns of an export, lists of other muscles are joined for CSV
+SET_COLUMNS = [
+    'workout_id', 'title', 'start_time', 'end_time', 'workout_date', 'routine_id', 'exercise_title',
+    'exercise_template_id', 'superset_id', 'muscle_group', 'other_muscles', 'exercise_type',
+    'equipment_category', 'set_index', 'set_type', 'weight_kg', 'reps', 'distance_km',
+    'duration_seconds', 'rpe', 'volume', 'description', 'exercise_notes',
+]
+
+def workout_table(df):
+    """
+    Summarise set-level data per workout
+
+    Args:
+        df (pd.DataFrame): Set-level workout data, sets of a workout contiguous
+
+    Returns:
+        pd.DataFrame: One row per workout, oldest first, with workout_id, title, start_time,
+        end_time, duration (minutes), exercises, sets, reps and volume
+    """
+    return df.groupby('workout_id', sort=False).agg(
+        title=('title', 'first'),
+        start_time=('start_time', 'first'),
+        end_time=('end_time', 'first'),
+        duration=('workout_duration', 'first'),
+        exercises=('exercise_title', 'nunique'),
+        sets=('set_index', 'size'),
+        reps=('reps', 'sum'),
+        volume=('volume', 'sum'),
+    ).reset_index()
+
+def _set_frame(df):
+    return df[[column for column in SET_COLUMNS if column in df.columns]]
+
+def iter_csv(df, chunk_rows=CHUNK_ROWS):
+    """
+    Encode a DataFrame as CSV, a chunk of rows at a time
+
+    Args:
+        df (pd.DataFrame): Data to export
+        chunk_rows (int): Rows per chunk
+
+    Yields:
+        bytes: UTF-8 CSV, the header with the first chunk
+    """
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if 'other_muscles' in chunk.columns:
+            chunk = chunk.assign(other_muscles=chunk['other_muscles'].map(
+                lambda muscles: ';'.join(muscles) if isinstance(muscles, list) else muscles))
+        yield chunk.to_csv(index=False, header=start == 0).encode('utf-8')
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file collecting what the Parquet writer wrote since the last drain
+    def __init__(self):
+        self._pending = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._pending.append(bytes(b))
+        self._position += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._pending)
+        self._pending = []
+        return data
+
+def iter_parquet(df, chunk_rows=CHUNK_ROWS):
+    """
+    Encode a DataFrame as Parquet, one row group at a time
+
+    Args:
+        df (pd.DataFrame): Data to export
+        chunk_rows (int): Rows per row group
+
+    Yields:
+        bytes: Consecutive parts of the Parquet file, the footer last
+    """
+    # pyarrow comes with streamlit, it is only imported when a Parquet file is exported
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # The schema is inferred from the whole frame, a chunk may only have missing values in a column
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for start in range(0, len(df), chunk_rows):
+            writer.write_table(pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema,
+                                                    preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+def write_export(df, fmt, file, chunk_rows=CHUNK_ROWS):
+    """
+    Write an export to a file
+
+    Args:
+        df (pd.DataFrame): Data to export
+        fmt (str): "csv" or "parquet"
+        file (file): Binary file receiving the export
+        chunk_rows (int): Rows encoded at a time
+
+    Returns:
+        int: Bytes written
+    """
+    encode = iter_parquet if fmt == "parquet" else iter_csv
+    size = 0
+    for part in encode(df, chunk_rows):
+        file.write(part)
+        size += len(part)
+    return size
+
+def prepare(export_key, df, table, fmt):
+    """
+    Encode an export into a temporary file kept in the session
+
+    Args:
+        export_key (tuple): Identifies the data, filters, table and format of the export
+        df (pd.DataFrame): Set-level data to export
+        table (str): "sets" or "workouts"
+        fmt (str): "csv" or "parquet"
+    """
+    frame = workout_table(df) if table == "workouts" else _set_frame(df)
+    # Unbuffered, so that st.download_button reads it as a raw file, and deleted once closed
+    file = tempfile.TemporaryFile(buffering=0)
+    size = write_export(frame, fmt, file)
+    previous = st.session_state.get(EXPORT_KEY)
+    if previous:
+        previous["file"].close()
+    st.session_state[EXPORT_KEY] = {"key": export_key, "file": file, "size": size, "rows": len(frame)}
+
+def prepared(export_key):
+    """
+    Get the prepared export, if it matches the requested one
+
+    Args:
+        export_key (tuple): See prepare
+
+    Returns:
+        dict or None: {"key", "file", "size", "rows"}
+    """
+    export = st.session_state.get(EXPORT_KEY)
+    return export if export and export["key"] == export_key else None
+
+def file_name(table, fmt, date_range=None):
+    """
+    Get the download file name of an export
+
+    Args:
+        table (str): "sets" or "workouts"
+        fmt (str): "csv" or "parquet"
+        date_range (list, optional): Start and end date of the exported data
+
+    Returns:
+        str: e.g. "hevy_sets_2024-01-01_2024-12-31.csv"
+    """
+    period = f"_{pd.Timestamp(date_range[0]):%Y-%m-%d}_{pd.Timestamp(date_range[1]):%Y-%m-%d}" if date_range and len(date_range) == 2 else ""
+    return f"hevy_{table}{period}{FORMATS[fmt][1]}"
\ No newline at end of file
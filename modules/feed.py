@@ -0,0 +1,234 @@
+"""
+Workout Feed
+
+Pages through the Hevy workout feed for the social/comparison view. Each page
+is flattened into the same set-level schema as the user's own workouts as soon
+as it arrives, and the next pages are prefetched in the background while the
+current one is being read.
+
+The feed is cursor based - the request for a page needs the last workout of the
+page before it - so pages are prefetched one after another on a single worker,
+up to PREFETCH_PAGES ahead of the page being read, while their images download
+on the shared, bounded pool of hevy_api. A page whose request fails is not
+taken for the end of the feed: the fetches chained after it are dropped and the
+page is requested again on the next move forward.
+"""
+
+import concurrent.futures
+
+import pandas as pd
+import streamlit as st
+
+# Number of pages fetched ahead of the page being read
+PREFETCH_PAGES = 2
+
+# Session state key holding the user's pager
+FEED_PAGER_KEY = "hevy_feed_pager"
+
+def _next_cursor(workouts):
+    # The next page starts from the index of the last workout of this one
+    return workouts[-1].get('index') if workouts else None
+
+def fetch_page(start_from, auth_token):
+    """
+    Fetch one feed page and flatten its workouts
+
+    Args:
+        start_from (int): Feed cursor, 0 for the most recent workouts
+        auth_token (str): Hevy auth token
+
+    Returns:
+        dict or None: {"workouts": raw workouts, "sets": set-level DataFrame with a username column,
+        "next": cursor of the following page or None at the end}, or None if the request failed
+    """
+    import requests
+
+    from modules import data, hevy_api
+
+    try:
+        response = hevy_api.feed_workouts_paged(start_from, auth_token)
+    except requests.RequestException:
+        # e.g. a request past hevy_api.REQUEST_TIMEOUT, the pager asks for the page again
+        return None
+    if not isinstance(response, dict):
+        return None
+
+    workouts = response["data"].get("workouts", [])
+    sets = data.flatten_workouts({workout['id']: workout for workout in workouts})
+    if not sets.empty:
+        usernames = {workout['id']: workout.get('username') for workout in workouts}
+        sets['username'] = sets['workout_id'].map(usernames)
+    return {"workouts": workouts, "sets": sets, "next": _next_cursor(workouts)}
+
+class FeedPager:
+    """
+    Pager over the workout feed with bounded background prefetching
+
+    Args:
+        auth_token (str): Hevy auth token, passed explicitly because the session
+            storage is not available in the prefetch thread
+        prefetch_pages (int): Number of pages kept fetched ahead of the current one
+    """
+
+    def __init__(self, auth_token, prefetch_pages=PREFETCH_PAGES):
+        self.auth_token = auth_token
+        self.prefetch_pages = prefetch_pages
+        self.pages = []
+        self.current = -1
+        self.exhausted = False
+        self.failed = False
+        self._pending = []
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def _fetch_after(self, previous):
+        # The single worker runs fetches in order, so the previous page is already there
+        if previous is None:
+            return fetch_page(0, self.auth_token)
+        page = previous.result()
+        if page is None:
+            # The previous page failed, this one is requested again after it
+            return None
+        if page["next"] is None:
+            return {"workouts": [], "sets": pd.DataFrame(), "next": None}
+        return fetch_page(page["next"], self.auth_token)
+
+    def _schedule(self):
+        if self.exhausted:
+            return
+        while (len(self.pages) - 1 - self.current) + len(self._pending) < self.prefetch_pages:
+            if self._pending:
+                previous = self._pending[-1]
+            elif self.pages:
+                previous = concurrent.futures.Future()
+                previous.set_result(self.pages[-1])
+            else:
+                previous = None
+            self._pending.append(self._executor.submit(self._fetch_after, previous))
+
+    def next_page(self, timeout=None):
+        """
+        Move to the next page, waiting for it if it has not been prefetched yet
+
+        Args:
+            timeout (float, optional): Seconds to wait for the page
+
+        Returns:
+            dict or None: The page (see fetch_page), or None at the end of the feed or if
+            the request failed (failed is then True and the next call asks for the page again)
+        """
+        if self.current + 1 >= len(self.pages):
+            self._schedule()
+            if not self._pending:
+                return None
+            page = self._pending[0].result(timeout)
+            if page is None:
+                # Later fetches chain off the failed one, they are scheduled again from the last page read
+                self.failed = True
+                self._pending = []
+                return None
+            self.failed = False
+            self._pending.pop(0)
+            if not page["workouts"]:
+                # End of the feed
+                self.exhausted = True
+                self._pending = []
+                return None
+            self.pages.append(page)
+
+        self.current += 1
+        self._schedule()
+        return self.pages[self.current]
+
+    def previous_page(self):
+        """
+        Move back to the previous page
+
+        Returns:
+            dict or None: The page, or None when already on the first page
+        """
+        if self.current <= 0:
+            return None
+        self.current -= 1
+        return self.pages[self.current]
+
+    def page(self):
+        """
+        Get the current page
+
+        Returns:
+            dict or None: The page, or None before the first call to next_page
+        """
+        return self.pages[self.current] if self.current >= 0 else None
+
+    def has_next(self):
+        """
+        Check whether another page may be read
+
+        Returns:
+            bool: False once the end of the feed is known to have been reached
+        """
+        if self.current + 1 < len(self.pages):
+            return True
+        if self._pending and self._pending[0].done():
+            page = self._pending[0].result()
+            # A failed page can be asked for again
+            return page is None or bool(page["workouts"])
+        return not self.exhausted
+
+    def sets(self):
+        """
+        Get the set-level data of every page read so far
+
+        Returns:
+            pd.DataFrame: Sets of the feed workouts, in the schema of data.load_workout_data
+        """
+        frames = [page["sets"] for page in self.pages if not page["sets"].empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def close(self):
+        """
+        Stop prefetching, pending fetches are cancelled
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def get_pager():
+    """
+    Get the feed pager of the session, creating it on first use
+
+    Returns:
+        FeedPager: Pager for the logged in user
+    """
+    from modules import client_storage
+
+    pager = st.session_state.get(FEED_PAGER_KEY)
+    if pager is None:
+        pager = FeedPager(client_storage.get_auth_data()[0])
+        st.session_state[FEED_PAGER_KEY] = pager
+    return pager
+
+def reset_pager():
+    """
+    Stop and drop the feed pager of the session, e.g. on logout
+    """
+    pager = st.session_state.pop(FEED_PAGER_KEY, None)
+    if pager is not None:
+        pager.close()
+
+def feed_workout_summary(sets):
+    """
+    Summarise feed sets per workout
+
+    Args:
+        sets (pd.DataFrame): Set-level feed data from fetch_page or FeedPager.sets
+
+    Returns:
+        pd.DataFrame: One row per workout with username, title, date, exercises, sets and volume
+    """
+    return sets.groupby('workout_id', sort=False).agg(
+        username=('username', 'first'),
+        title=('title', 'first'),
+        workout_date=('workout_date', 'first'),
+        exercises=('exercise_title', 'nunique'),
+        sets=('set_index', 'size'),
+        volume=('volume', 'sum'),
+    )
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Training Calendar
+
+GitHub-style calendar of the daily volume or number of sets over the whole
+history, overall or for one muscle group or exercise. Sets are binned on integer
+day indices with np.bincount: the overall totals once per dataset version, a
+muscle group or exercise from its own rows only (grouped together when the
+calendar is built). A year of daily values is then laid out as a weekday x week
+grid for a single heatmap trace.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Measures of the calendar and their labels
+MEASURES = {
+    "volume": "Volume (kg)",
+    "sets": "Sets",
+}
+
+# Columns the calendar can be narrowed down by and their labels
+BREAKDOWNS = {
+    "muscle_group": "Muscle group",
+    "exercise_title": "Exercise",
+}
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def build_calendar(df):
+    """
+    Bin the sets on day indices and group the rows of each muscle group and exercise
+
+    Args:
+        df (pd.DataFrame): Set-level workout data from load_workout_data
+
+    Returns:
+        dict: {"first_day": datetime64[D], "n_days", "day_index" and "volume" (per set),
+        "totals": {measure: daily array}, "groups": {column: {"names", "positions", "order", "offsets"}}}
+        with the rows of name i of a column at order[offsets[i]:offsets[i + 1]]
+    """
+    days = df['workout_date'].to_numpy(dtype='datetime64[D]')
+    first_day = days.min()
+    day_index = (days - first_day).astype(np.int64)
+    n_days = int(day_index.max()) + 1
+    volume = df['volume'].fillna(0).to_numpy(dtype=float)
+
+    groups = {}
+    for column in BREAKDOWNS:
+        codes, names = pd.factorize(df[column].fillna('other'), sort=True)
+        order = np.argsort(codes, kind='stable')
+        groups[column] = {
+            "names": list(names),
+            "positions": {name: i for i, name in enumerate(names)},
+            "order": order,
+            "offsets": np.searchsorted(codes[order], np.arange(len(names) + 1)),
+        }
+
+    return {
+        "first_day": first_day,
+        "n_days": n_days,
+        "day_index": day_index,
+        "volume": volume,
+        "totals": {
+            "volume": np.bincount(day_index, weights=volume, minlength=n_days),
+            "sets": np.bincount(day_index, minlength=n_days).astype(float),
+        },
+        "groups": groups,
+    }
+
+def daily_values(calendar, measure, column=None, name=None):
+    """
+    Get the daily values of a measure, overall or for one muscle group or exercise
+
+    Args:
+        calendar (dict): Calendar from build_calendar
+        measure (str): Key of MEASURES
+        column (str, optional): Key of BREAKDOWNS
+        name (str, optional): Muscle group or exercise
+
+    Returns:
+        np.ndarray: Value per day since calendar["first_day"]
+    """
+    if column is None or name is None:
+        return calendar["totals"][measure]
+
+    group = calendar["groups"][column]
+    position = group["positions"].get(name)
+    if position is None:
+        return np.zeros(calendar["n_days"])
+    rows = group["order"][group["offsets"][position]:group["offsets"][position + 1]]
+    weights = calendar["volume"][rows] if measure == "volume" else None
+    return np.bincount(calendar["day_index"][rows], weights=weights, minlength=calendar["n_days"]).astype(float)
+
+def years(calendar):
+    """
+    Get the years covered by a calendar
+
+    Args:
+        calendar (dict): Calendar from build_calendar
+
+    Returns:
+        list: Years, newest first
+    """
+    first_year = calendar["first_day"].astype('datetime64[Y]').astype(int) + 1970
+    last_day = calendar["first_day"] + np.timedelta64(calendar["n_days"] - 1, 'D')
+    last_year = last_day.astype('datetime64[Y]').astype(int) + 1970
+    return list(range(last_year, first_year - 1, -1))
+
+def year_grid(calendar, daily, year):
+    """
+    Lay out a year of daily values as a weekday x week grid
+
+    Args:
+        calendar (dict): Calendar from build_calendar
+        daily (np.ndarray): Daily values from daily_values
+        year (int): Year to lay out
+
+    Returns:
+        dict: {"z": values of shape (7, weeks), NaN outside the year, "dates": the date of each
+        cell as text, "weeks": the Monday starting each week}
+    """
+    dates = np.arange(np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01"), dtype='datetime64[D]')
+    index = (dates - calendar["first_day"]).astype(np.int64)
+    inside = (index >= 0) & (index < calendar["n_days"])
+    values = np.zeros(len(dates))
+    values[inside] = daily[index[inside]]
+
+    # 1970-01-01, day 0 of datetime64, was a Thursday
+    weekday = (dates.astype(np.int64) + 3) % 7
+    week = (np.arange(len(dates)) + weekday[0]) // 7
+    n_weeks = int(week[-1]) + 1
+
+    z = np.full((7, n_weeks), np.nan)
+    z[weekday, week] = values
+    cell_dates = np.full((7, n_weeks), "", dtype=object)
+    cell_dates[weekday, week] = dates.astype(str)
+    return {
+        "z": z,
+        "dates": cell_dates,
+        "weeks": dates[0] - np.timedelta64(int(weekday[0]), 'D') + np.arange(n_weeks) * np.timedelta64(7, 'D'),
+    }
\ No newline at end of file
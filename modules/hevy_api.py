@@ -4,18 +4,44 @@ Hevy API
 Provides the methods for interacting with the Hevy API
 """
 
-import requests
 import json
+import logging
 import os
 import getpass
 import re
 import time
 import datetime
 import shutil
+import zlib
 
 from pathlib import Path
 import concurrent.futures 
 
+from modules import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for feed image downloads, started with the first feed page
+IMAGE_DOWNLOAD_WORKERS = 4
+_image_pool = None
+
+def _get_image_pool():
+	global _image_pool
+	if _image_pool is None:
+		_image_pool = concurrent.futures.ThreadPoolExecutor(max_workers=IMAGE_DOWNLOAD_WORKERS)
+	return _image_pool
+
+# Base URL of the Hevy API, e.g. a local stub server for benchmarks
+API_BASE = os.environ.get("HEVY_API_BASE", "https://api.hevyapp.com").rstrip("/")
+
+# Chunked manifest sync: number of workouts per manifest chunk (0 posts the whole manifest at once)
+# and number of chunks posted concurrently, see workouts_sync_chunked
+SYNC_CHUNK_SIZE = int(os.environ.get("HEVY_SYNC_CHUNK_SIZE", "0"))
+SYNC_CHUNK_WORKERS = 4
+
+# Seconds to wait for the Hevy API to connect and to send data, so a stalled request cannot hold a sync forever
+REQUEST_TIMEOUT = float(os.environ.get("HEVY_REQUEST_TIMEOUT", "30"))
+
 # Basic headers to use throughout
 BASIC_HEADERS = {
 	'x-api-key': 'with_great_power',
@@ -42,6 +68,7 @@ def login(user, password):
 	try:
 		from modules import client_storage
 	except ImportError:
+		client_storage = None
 		# Fall back to file-based storage if client_storage is not available
 		home_folder = str(Path.home())
 		utb_folder = "./utb_folder"
@@ -53,83 +80,150 @@ def login(user, password):
 	headers = BASIC_HEADERS.copy()
 	
 	# Post username and password to Hevy
-	s = requests.Session()
+	s = telemetry.session()
 	
-	r = s.post('https://api.hevyapp.com/login', data=json.dumps({'emailOrUsername':user,'password':password}), headers=headers)
+	r = s.post(API_BASE+'/login', data=json.dumps({'emailOrUsername':user,'password':password}), headers=headers, timeout=REQUEST_TIMEOUT)
 	if r.status_code == 200:
 		json_content = r.json()
-		s.headers.update({'auth-token': json_content['auth_token']})
-		
 		auth_token = json_content['auth_token']
-	
-		r = s.get("https://api.hevyapp.com/account", headers=headers)
+		
+		if client_storage is not None:
+			return login_bootstrap(auth_token, json_content.get('user_id'))
+		
+		s.headers.update({'auth-token': auth_token})
+		r = s.get(API_BASE+"/account", headers=headers, timeout=REQUEST_TIMEOUT)
 		if r.status_code == 200:
 			data = r.json()
 			
 			account_data = {"data":data, "Etag":r.headers['Etag']}
 			user_id = data["id"]
 			
-			# Store in client-side storage if available
-			try:
-				from modules import client_storage
-				client_storage.store_auth_data(auth_token, user_id)
-				client_storage.store_account_data(data, r.headers['Etag'])
-				
-				# Store profile image if available
-				if "profile_pic" in data:
-					imageurl = data["profile_pic"]
-					response = requests.get(imageurl, stream=True)
-					if response.status_code == 200:
-						client_storage.store_profile_image(response.raw.read())
+			# Fall back to file-based storage
+			utb_folder = "./utb_folder"
+			user_folder = utb_folder + "/user_"+user_id
+	
+			if not os.path.exists(user_folder):
+				os.makedirs(user_folder)
+				os.makedirs(user_folder+"/workouts")
+				os.makedirs(user_folder+"/routines")
+			
+			with open(utb_folder+"/session.json", 'w') as f:
+				json.dump({"auth-token":auth_token,"user-id":user_id},f)
+			
+			with open(user_folder+"/account.json", 'w') as f:
+				json.dump(account_data, f)
+			
+			if "profile_pic" in data:
+				imageurl = data["profile_pic"]
+				response = telemetry.session().get(imageurl, stream=True, timeout=REQUEST_TIMEOUT)
+				if response.status_code == 200:
+					with open(user_folder+"/profileimage", 'wb') as out_file:
+						shutil.copyfileobj(response.raw, out_file)
 						
-						# Get workout count
-						r = s.get("https://api.hevyapp.com/workout_count", headers=headers)
-						if r.status_code == 200:
-							data = r.json()
-							client_storage.store_workout_count(data, r.headers['Etag'])
-							return 200
-						return r.status_code
-				return 200
-			except ImportError:
-				# Fall back to file-based storage
-				utb_folder = "./utb_folder"
-				user_folder = utb_folder + "/user_"+user_id
-		
-				if not os.path.exists(user_folder):
-					os.makedirs(user_folder)
-					os.makedirs(user_folder+"/workouts")
-					os.makedirs(user_folder+"/routines")
-				
-				with open(utb_folder+"/session.json", 'w') as f:
-					json.dump({"auth-token":auth_token,"user-id":user_id},f)
-				
-				with open(user_folder+"/account.json", 'w') as f:
-					json.dump(account_data, f)
-				
-				if "profile_pic" in data:
-					imageurl = data["profile_pic"]
-					response = requests.get(imageurl, stream=True)
-					if response.status_code == 200:
-						with open(user_folder+"/profileimage", 'wb') as out_file:
-							shutil.copyfileobj(response.raw, out_file)
-							
-						r = s.get("https://api.hevyapp.com/workout_count", headers=headers)
-						if r.status_code == 200:
-							data = r.json()
-							
-							workout_count = {"data":data, "Etag":r.headers['Etag']}
+					r = s.get(API_BASE+"/workout_count", headers=headers, timeout=REQUEST_TIMEOUT)
+					if r.status_code == 200:
+						data = r.json()
+						
+						workout_count = {"data":data, "Etag":r.headers['Etag']}
+						
+						with open(user_folder+"/workout_count.json", 'w') as f:
+							json.dump(workout_count, f)
 							
-							with open(user_folder+"/workout_count.json", 'w') as f:
-								json.dump(workout_count, f)
-								
-							return 200
-						return r.status_code
-				return 200
+						return 200
+					return r.status_code
+			return 200
 		else:
 			return r.status_code
 	else:
     		return r.status_code
 
+#
+# Fills client-side storage once the auth token is known. The account (followed by its profile image),
+# the workout count and the first workouts_batch page are fetched concurrently, then stored on the
+# calling thread, which owns the session storage. The first page continues from the user's journal,
+# so it is chained after the account when the login response has no user id.
+# The account and workout count are also stored as generic data, so update_generic sends their Etags.
+# Returns 200 if the account and workout count were stored
+#
+def login_bootstrap(auth_token, user_id=None):
+	import requests
+	
+	from modules import client_storage, journal
+	
+	headers = BASIC_HEADERS.copy()
+	headers["auth-token"] = auth_token
+	s = telemetry.session()
+	
+	def fetch_account():
+		r = s.get(API_BASE+"/account", headers=headers, timeout=REQUEST_TIMEOUT)
+		if r.status_code != 200:
+			return r.status_code, None, None
+		data = r.json()
+		image = None
+		if "profile_pic" in data:
+			# The image is not on the API host, it gets no auth header
+			response = telemetry.session().get(data["profile_pic"], timeout=REQUEST_TIMEOUT)
+			if response.status_code == 200:
+				image = response.content
+		return 200, {"data":data, "Etag":r.headers['Etag']}, image
+	
+	def fetch_count():
+		r = s.get(API_BASE+"/workout_count", headers=headers, timeout=REQUEST_TIMEOUT)
+		if r.status_code != 200:
+			return r.status_code, None
+		return 200, {"data":r.json(), "Etag":r.headers['Etag']}
+	
+	def fetch_first_page(account_future):
+		page_user_id = user_id
+		if page_user_id is None:
+			status, account, _ = account_future.result()
+			if status != 200:
+				return None, status, None
+			page_user_id = account["data"]["id"]
+		state = journal.load_state(page_user_id)
+		# Without journaled workouts there is nothing to continue from (and the session storage is not reachable here)
+		cursor = journal.load_cursors(page_user_id).get("download") if state["workouts"] else None
+		startIndex = _download_start_index(state["workouts"], cursor)
+		r = s.get(API_BASE+"/workouts_batch/"+str(startIndex), headers=headers, timeout=REQUEST_TIMEOUT)
+		return state, r.status_code, (r.json() if r.status_code == 200 else None)
+	
+	with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+		account_future = executor.submit(telemetry.propagate(fetch_account))
+		count_future = executor.submit(telemetry.propagate(fetch_count))
+		page_future = executor.submit(telemetry.propagate(fetch_first_page), account_future)
+		
+		status, account_data, image = account_future.result()
+		if status != 200:
+			return status
+		user_id = account_data["data"]["id"]
+		client_storage.store_auth_data(auth_token, user_id)
+		client_storage.store_account_data(account_data["data"], account_data["Etag"])
+		client_storage.store_generic_data("account", account_data["data"], account_data["Etag"])
+		if image is not None:
+			client_storage.store_profile_image(image)
+		
+		status, workout_count = count_future.result()
+		if status != 200:
+			return status
+		client_storage.store_workout_count(workout_count["data"], workout_count["Etag"])
+		client_storage.store_generic_data("workout_count", workout_count["data"], workout_count["Etag"])
+		
+		# Rebuild previously synced workouts from the journal, then add the first new page on top
+		try:
+			state, status, page = page_future.result()
+		except requests.RequestException as e:
+			# e.g. a timeout, the journal is read again and the sync downloads the page
+			state, status, page = journal.load_state(user_id), str(e), None
+		if state is not None:
+			journal.restore(user_id, state)
+		if status == 200:
+			_store_workouts_page(user_id, page)
+		else:
+			# Not fatal, the sync downloads it again
+			logger.warning("first workouts_batch page failed (%s)", status)
+	
+	return 200
+
 #
 # Simple method to log out. We'll delete the user id and auth-token from the sessions file
 #
@@ -199,12 +293,12 @@ def update_generic(to_update):
 	auth_token = user_data[2]
 	
 	# The accessible API calls for this method
-	lookup = {"account":"https://api.hevyapp.com/account",
-		"user_preferences":"https://api.hevyapp.com/user_preferences",
-		"body_measurements":"https://api.hevyapp.com/body_measurements",
-		"workout_count":"https://api.hevyapp.com/workout_count",
-		"set_personal_records":"https://api.hevyapp.com/set_personal_records",
-		"user_subscription":"https://api.hevyapp.com/user_subscription",
+	lookup = {"account":API_BASE+"/account",
+		"user_preferences":API_BASE+"/user_preferences",
+		"body_measurements":API_BASE+"/body_measurements",
+		"workout_count":API_BASE+"/workout_count",
+		"set_personal_records":API_BASE+"/set_personal_records",
+		"user_subscription":API_BASE+"/user_subscription",
 		}
 	# Fail if to_update is not in the list
 	if to_update not in lookup.keys():
@@ -217,21 +311,37 @@ def update_generic(to_update):
 	headers = BASIC_HEADERS.copy()
 	headers["auth-token"] = auth_token
 	
-	# Check if the file already exists, if it does we'll send the server the Etag so we only get an update
+	# Prefer client-side storage, falling back to the user folder if it is not available
+	try:
+		from modules import client_storage
+	except ImportError:
+		client_storage = None
+	
+	# Check if we already have the data, if we do we'll send the server the Etag so we only get an update
 	update_data = None
-	if os.path.exists(user_folder+"/"+filename):	
+	if client_storage is not None:
+		update_data = client_storage.get_generic_data(to_update)
+	elif os.path.exists(user_folder+"/"+filename):	
 		with open(user_folder+"/"+filename, 'r') as file:
 			update_data = json.load(file)
+	if update_data:
 		headers["if-none-match"] = update_data["Etag"]
 	
-	# Now finally do the request for the update. If new update then put that in the file and return 200, else return 304
-	s = requests.Session()
-	r = s.get(update_url, headers=headers)
+	# Now finally do the request for the update. If new update then store it and return 200, else return 304
+	s = telemetry.session()
+	r = s.get(update_url, headers=headers, timeout=REQUEST_TIMEOUT)
 	if r.status_code == 200:
 		data = r.json()
 		new_data = {"data":data, "Etag":r.headers['Etag']}
-		with open(user_folder+"/"+filename, 'w') as f:
-			json.dump(new_data, f)
+		if client_storage is not None:
+			client_storage.store_generic_data(to_update, data, r.headers['Etag'])
+			if to_update == "account":
+				client_storage.store_account_data(data, r.headers['Etag'])
+			elif to_update == "workout_count":
+				client_storage.store_workout_count(data, r.headers['Etag'])
+		else:
+			with open(user_folder+"/"+filename, 'w') as f:
+				json.dump(new_data, f)
 			
 			
 		# IF ACCOUNT UPDATED WE ALSO WILL RE-FETCH PROFILE IMAGE
@@ -239,17 +349,63 @@ def update_generic(to_update):
 			try:
 				if "profile_pic" in data:
 					imageurl = data["profile_pic"]
-					response = requests.get(imageurl, stream=True)
+					response = telemetry.session().get(imageurl, stream=True, timeout=REQUEST_TIMEOUT)
 					if response.status_code == 200:
-						with open(user_folder+"/profileimage", 'wb') as out_file:
-							shutil.copyfileobj(response.raw, out_file)
-					print("updated profile pic")
+						if client_storage is not None:
+							client_storage.store_profile_image(response.raw.read())
+						else:
+							with open(user_folder+"/profileimage", 'wb') as out_file:
+								shutil.copyfileobj(response.raw, out_file)
+					logger.info("updated profile pic")
 			except:	
 				pass
 			
 		return 200
-	elif r.status_code == 304:
-		return 304
+	else:
+		return r.status_code
+
+#
+# Works out the workouts_batch index to download from: the saved download cursor when its last workout is stored,
+# e.g. after an interrupted sync, otherwise one after the highest index among the stored workouts
+#
+def _download_start_index(workout_data_dict, cursor):
+	startIndex = 0
+	if cursor and workout_data_dict and cursor["last_id"] in workout_data_dict:
+		startIndex = cursor["index"]
+	elif workout_data_dict:
+		for workout_id, workout in workout_data_dict.items():
+			if "index" in workout:
+				temp_index = workout["index"]
+				if temp_index >= startIndex:
+					startIndex = temp_index + 1 # make the start index one after the largest we have
+	return startIndex
+
+#
+# Stores a page of new workouts from workouts_batch, records them in the sync journal and saves the
+# download cursor after them. Returns whether the page had any workouts
+#
+def _store_workouts_page(user_id, data):
+	from modules import client_storage, journal
+	
+	havesome = False
+	next_cursor = None
+	for new_workout in data:
+		havesome = True
+		workout_id = new_workout['id']
+		
+		# Save to client-side storage and record the change in the sync journal
+		client_storage.store_workout_data(workout_id, new_workout)
+		journal.append(user_id, journal.KIND_WORKOUT, journal.OP_PUT, workout_id, new_workout)
+		if "index" in new_workout and (next_cursor is None or new_workout["index"] >= next_cursor["index"]):
+			next_cursor = {"index": new_workout["index"] + 1, "last_id": workout_id}
+		
+		telemetry.count("workouts_new")
+		logger.debug("new workout %s", workout_id)
+	
+	# The page is journaled, the next page starts after it
+	if next_cursor is not None:
+		journal.save_cursor(user_id, "download", next_cursor)
+	return havesome
 
 #
 # Batch downloads JSON workout files
@@ -267,9 +423,10 @@ def batch_download():
 	
 	# Import client_storage module for storing workout data
 	try:
-		from modules import client_storage
+		from modules import client_storage, journal
 	except ImportError:
 		return 500, False
+	user_id = client_storage.get_auth_data()[1]
 
 	# Create the headers to be used
 	headers = BASIC_HEADERS.copy()
@@ -278,30 +435,13 @@ def batch_download():
 	# Get all workout data from client storage
 	workout_data_dict = client_storage.get_workout_data()
 	
-	startIndex = 0
-	# Find the highest index in existing workouts
-	if workout_data_dict:
-		for workout_id, workout in workout_data_dict.items():
-			if "index" in workout:
-				temp_index = workout["index"]
-				if temp_index >= startIndex:
-					startIndex = temp_index + 1 # make the start index one after the largest we have
+	startIndex = _download_start_index(workout_data_dict, journal.load_cursors(user_id).get("download"))
 	
 	# Now finally do the request for workout files		
-	s = requests.Session()	
-	r = s.get("https://api.hevyapp.com/workouts_batch/"+str(startIndex), headers=headers)
+	s = telemetry.session()	
+	r = s.get(API_BASE+"/workouts_batch/"+str(startIndex), headers=headers, timeout=REQUEST_TIMEOUT)
 	if r.status_code == 200:
-		data = r.json()
-		
-		havesome = False
-		for new_workout in data:
-			havesome = True
-			workout_id = new_workout['id']
-			
-			# Save to client-side storage
-			client_storage.store_workout_data(workout_id, new_workout)
-			
-			print("new workout", workout_id)
+		havesome = _store_workouts_page(user_id, r.json())
 
 		# return 200 and a boolean indicating whether Hevy returned new files
 		return 200, havesome
@@ -315,6 +455,9 @@ def batch_download():
 # Hevy returns isMore indicating whether this should be rerun to collect more updates
 #
 def workouts_sync_batch():
+	if SYNC_CHUNK_SIZE > 0:
+		return workouts_sync_chunked(SYNC_CHUNK_SIZE)
+	
 	# Make sure user is logged in, have their folder, and auth-token
 	user_data = is_logged_in()
 	if user_data[0] == False:
@@ -324,11 +467,10 @@ def workouts_sync_batch():
 	
 	# Import client_storage module for storing workout data
 	try:
-		from modules import client_storage
-		from modules.client_storage import WORKOUT_DATA_KEY
-		import streamlit as st
+		from modules import client_storage, journal
 	except ImportError:
 		return 500, False
+	user_id = client_storage.get_auth_data()[1]
 	
 	# Create required headers
 	headers = BASIC_HEADERS.copy()
@@ -345,21 +487,26 @@ def workouts_sync_batch():
 				existing_data[workout_data['id']] = workout_data['updated_at']
 	
 	# Post our existing data that we have compiled, and see what gets returned
-	s = requests.Session()
-	r = s.post('https://api.hevyapp.com/workouts_sync_batch', data=json.dumps(existing_data), headers=headers)
+	s = telemetry.session()
+	r = s.post(API_BASE+'/workouts_sync_batch', data=json.dumps(existing_data), headers=headers, timeout=REQUEST_TIMEOUT)
+	if r.status_code != 200:
+		return r.status_code, False
 	json_content = r.json()	
 
 	# Save any updated workouts to client-side storage
 	for updated_workout in json_content['updated']:
 		workout_id = updated_workout['id']
 		client_storage.store_workout_data(workout_id, updated_workout)
-		print("updated workout", workout_id)
+		journal.append(user_id, journal.KIND_WORKOUT, journal.OP_PUT, workout_id, updated_workout)
+		telemetry.count("workouts_updated")
+		logger.debug("updated workout %s", workout_id)
 		
 	# Remove any deleted workouts from client-side storage
 	for deleted_workout in json_content['deleted']:
-		if WORKOUT_DATA_KEY in st.session_state and deleted_workout in st.session_state[WORKOUT_DATA_KEY]:
-			del st.session_state[WORKOUT_DATA_KEY][deleted_workout]
-			print("deleted workout", deleted_workout)
+		if client_storage.delete_workout_data(deleted_workout):
+			journal.append(user_id, journal.KIND_WORKOUT, journal.OP_DELETE, deleted_workout)
+			telemetry.count("workouts_deleted")
+			logger.debug("deleted workout %s", deleted_workout)
 		
 	# Do we need to make this API call again because there is more data available???
 	update = False
@@ -370,347 +517,95 @@ def workouts_sync_batch():
 
 
 #
-# Similar to workouts sync batch but for saved routines
-#
-def routines_sync_batch():
-	# Make sure user is logged in, have their folder, and auth-token
-	user_data = is_logged_in()
-	if user_data[0] == False:
-		return 403, False
-	user_folder = user_data[1]
-	auth_token = user_data[2]
-	
-	# Import client_storage module for storing routine data
-	try:
-		from modules import client_storage
-		from modules.client_storage import ROUTINE_DATA_KEY
-		import streamlit as st
-	except ImportError:
-		return 500, False
-	
-	# Create required headers
-	headers = BASIC_HEADERS.copy()
-	headers["auth-token"] = auth_token
-	
-	# Get all routine data from client storage
-	routine_data_dict = client_storage.get_routine_data()
-	
-	# Go through all routines and compile the routine ID and when it was updated
-	existing_data = {}
-	if routine_data_dict:
-		for routine_id, routine_data in routine_data_dict.items():
-			if 'id' in routine_data and 'updated_at' in routine_data:
-				existing_data[routine_data['id']] = routine_data['updated_at']
-	
-	# Post our existing data that we have compiled, and see what gets returned
-	s = requests.Session()
-	r = s.post('https://api.hevyapp.com/routines_sync_batch', data=json.dumps(existing_data), headers=headers)
-	json_content = r.json()	
-		
-	# Save any updated routines to client-side storage
-	for updated_routine in json_content['updated']:
-		routine_id = updated_routine['id']
-		client_storage.store_routine_data(routine_id, updated_routine)
-		print("updated routine", routine_id)
-		
-	# Remove any deleted routines from client-side storage
-	for deleted_routine in json_content['deleted']:
-		if ROUTINE_DATA_KEY in st.session_state and deleted_routine in st.session_state[ROUTINE_DATA_KEY]:
-			del st.session_state[ROUTINE_DATA_KEY][deleted_routine]
-			print("deleted routine", deleted_routine)
-		
-	# Do we need to make this API call again because there is more data available???
-	update = False
-	if json_content['isMore'] == True:
-		update = True	
-	
-	return (200, update)
-
-#
-# Upload an updated workout
-#
-def put_routine(the_json, routine_id=None):
-	# Make sure user is logged in, have their folder, and auth-token
-	user_data = is_logged_in()
-	if user_data[0] == False:
-		return 403
-	user_folder = user_data[1]
-	auth_token = user_data[2]
-	
-	
-#	# Workouts subfolder	
-#	workouts_folder = user_folder + "/workouts"
-#	routines_folder = user_folder + "/routines"
-	
-	# Create required headers
-	headers = BASIC_HEADERS.copy()
-	headers["auth-token"] = auth_token
-
-	#return 200
-	s = requests.Session()
-	#print('https://api.hevyapp.com/routine/'+routine_id)
-	#print(the_json)
-	
-	r = None
-	if routine_id == None:
-		r = s.post('https://api.hevyapp.com/routine/', data=json.dumps(the_json), headers=headers)
-	else:
-		r = s.put('https://api.hevyapp.com/routine/'+routine_id, data=json.dumps(the_json), headers=headers)
-	return r.status_code
-	#return 400
-
-def delete_routine(routine_id):
-	# Make sure user is logged in, have their folder, and auth-token
-	user_data = is_logged_in()
-	if user_data[0] == False:
-		return 403
-	user_folder = user_data[1]
-	auth_token = user_data[2]
-	
-	# Create required headers
-	headers = BASIC_HEADERS.copy()
-	headers["auth-token"] = auth_token
-	s = requests.Session()	
-	r = s.delete('https://api.hevyapp.com/routine/'+routine_id, headers=headers)
-	return r.status_code, False
-
-#	
-# Get the Hevy workout feed starting from workout with given index, returns json data
-#
-def feed_workouts_paged(start_from):
-	print("feed_workouts_paged",start_from)
-	# Make sure user is logged in, have their folder, and auth-token
-	user_data = is_logged_in()
-	if user_data[0] == False:
-		return 403
-	user_folder = user_data[1]
-	auth_token = user_data[2]
-	
-	# workout image stuff, set folder, delete old images
-	img_folder = str(Path.home())+ "/.underthebar/temp/"
-	if not os.path.exists(img_folder):
-		os.makedirs(img_folder)
-	# its probably a bit much to do this every time, I'll put it somewhere else.
-	#for f in os.listdir(img_folder):
-	#	if os.stat(os.path.join(img_folder,f)).st_mtime < time.time() - 14 * 86400:
-	#		os.remove(os.path.join(img_folder,f))
-			
-	# Make the headers
-	headers = BASIC_HEADERS.copy()
-	headers["auth-token"] = auth_token
-	
-	
-	url = "https://api.hevyapp.com/feed_workouts_paged/"
-	if start_from != 0:
-		url = url + str(start_from)
-	
-	# Do the request
-	s = requests.Session()	
-	r = s.get(url, headers=headers)
-	if r.status_code == 200:
-	
-		data = r.json()
-		new_data = {"data":data, "Etag":r.headers['Etag']}
-		
-		# this bit is for downloading feed workout images, request in parallel
-		img_urls = []
-		for workout in data["workouts"]:
-			for img_url in workout["image_urls"]:
-				img_urls.append(img_url)
-		
-		#with concurrent.futures.ThreadPoolExecutor() as exector : 
-		#	exector.map(download_img, img_urls)
-		# above 2 lines waited for threads to complete, this just starts them and carries on.
-		exector =  concurrent.futures.ThreadPoolExecutor() 
-		exector.map(download_img, img_urls)
-				
-		return new_data
-	
-	elif r.status_code == 304:
-		return 304
-
-
-def download_img(img_url):
-	try:
-		img_folder = str(Path.home())+ "/.underthebar/temp/"
-		file_name = img_url.split("/")[-1]
-		print("start_img: "+file_name)
-		if not os.path.exists(img_folder+file_name):
-			response = requests.get(img_url, stream=True)
-			with open(img_folder+file_name, 'wb') as out_file:
-				shutil.copyfileobj(response.raw, out_file)
-			del response
-		print("end_img: "+file_name)
-	except Exception as e:
-		print(e)
-
-#	
-# Likes, or unlikes, a workout with the given id	
-#
-def like_workout(workout_id, like_it):
-	print("like the workout", workout_id, like_it)
-	# Make sure user is logged in, have their folder, and auth-token
-	user_data = is_logged_in()
-	if user_data[0] == False:
-		return 403
-	user_folder = user_data[1]
-	auth_token = user_data[2]
-	
-	# Make the headers
-	headers = BASIC_HEADERS.copy()
-	headers["auth-token"] = auth_token
-	
-	# Check if the file already exists, if it does we'll send the server the Etag so we only get an update
-	update_data = None
-	if os.path.exists(user_folder+"/"+filename):	
-		with open(user_folder+"/"+filename, 'r') as file:
-			update_data = json.load(file)
-		headers["if-none-match"] = update_data["Etag"]
-	
-	# Now finally do the request for the update. If new update then put that in the file and return 200, else return 304
-	s = requests.Session()
-	r = s.get(update_url, headers=headers)
-	if r.status_code == 200:
-		data = r.json()
-		new_data = {"data":data, "Etag":r.headers['Etag']}
-		with open(user_folder+"/"+filename, 'w') as f:
-			json.dump(new_data, f)
-			
-			
-		# IF ACCOUNT UPDATED WE ALSO WILL RE-FETCH PROFILE IMAGE
-		if to_update == "account":
-			try:
-				if "profile_pic" in data:
-					imageurl = data["profile_pic"]
-					response = requests.get(imageurl, stream=True)
-					if response.status_code == 200:
-						with open(user_folder+"/profileimage", 'wb') as out_file:
-							shutil.copyfileobj(response.raw, out_file)
-					print("updated profile pic")
-			except:	
-				pass
-			
-		return 200
-	elif r.status_code == 304:
-		return 304
-
+# Splits the {id: updated_at} manifest of workouts_sync_batch into chunks by a hash of the workout id.
+# The chunk count is a power of two so a workout stays in the same chunk until the history doubles.
 #
-# Batch downloads JSON workout files
-# This should be used when wanting to bulk download workout files.
-# It finds the highest Hevy index in existing downloaded files and requests all new files after that index
-# Hevy returns a number of workout files. Idea is to keep calling this until Hevy doesn't return anything.
-#
-def batch_download():
-	# Make sure user is logged in, have their folder, and auth-token
-	user_data = is_logged_in()
-	if user_data[0] == False:
-		return 403, False
-	user_folder = user_data[1]
-	auth_token = user_data[2]
-	
-	# Import client_storage module for storing workout data
-	try:
-		from modules import client_storage
-	except ImportError:
-		return 500, False
-
-	# Create the headers to be used
-	headers = BASIC_HEADERS.copy()
-	headers["auth-token"] = auth_token	
-	
-	# Get all workout data from client storage
-	workout_data_dict = client_storage.get_workout_data()
-	
-	startIndex = 0
-	# Find the highest index in existing workouts
-	if workout_data_dict:
-		for workout_id, workout in workout_data_dict.items():
-			if "index" in workout:
-				temp_index = workout["index"]
-				if temp_index >= startIndex:
-					startIndex = temp_index + 1 # make the start index one after the largest we have
-	
-	# Now finally do the request for workout files		
-	s = requests.Session()	
-	r = s.get("https://api.hevyapp.com/workouts_batch/"+str(startIndex), headers=headers)
-	if r.status_code == 200:
-		data = r.json()
-		
-		havesome = False
-		for new_workout in data:
-			havesome = True
-			workout_id = new_workout['id']
-			
-			# Save to client-side storage
-			client_storage.store_workout_data(workout_id, new_workout)
-			
-			print("new workout", workout_id)
-
-		# return 200 and a boolean indicating whether Hevy returned new files
-		return 200, havesome
-	else:
-		return r.status_code, False
+def _manifest_chunks(manifest, chunk_size):
+	n_chunks = 1
+	while n_chunks * chunk_size < len(manifest):
+		n_chunks *= 2
+	chunks = [{} for _ in range(n_chunks)]
+	for workout_id, updated_at in manifest.items():
+		chunks[zlib.crc32(workout_id.encode()) % n_chunks][workout_id] = updated_at
+	return [chunk for chunk in chunks if chunk]
 
 #
-# This uploads all local workout ids and when they were last updated, hevy then returns any changes that have been made on server	
-# This should be used when just wanting to get the most recent updates
-# It seems inefficient when there are lots of workouts, but I guess any file could be updated at any time...
-# Hevy returns isMore indicating whether this should be rerun to collect more updates
+# Chunked variant of workouts_sync_batch, enabled with HEVY_SYNC_CHUNK_SIZE.
+# The manifest chunks are encoded and posted concurrently over one session (one connection pool),
+# and the updated/deleted workouts of all responses are merged and stored on the calling thread.
+# Only chunks whose response said isMore are posted again, with their refreshed manifest, so chunks
+# the server has confirmed up to date are not re-sent for the rest of the sync.
+# Returns once no chunk has more updates, so the caller's isMore loop ends after one call.
 #
-def workouts_sync_batch():
+def workouts_sync_chunked(chunk_size=SYNC_CHUNK_SIZE):
 	# Make sure user is logged in, have their folder, and auth-token
 	user_data = is_logged_in()
 	if user_data[0] == False:
 		return 403, False
-	user_folder = user_data[1]
 	auth_token = user_data[2]
 	
 	# Import client_storage module for storing workout data
 	try:
-		from modules import client_storage
-		from modules.client_storage import WORKOUT_DATA_KEY
-		import streamlit as st
+		from modules import client_storage, journal
 	except ImportError:
 		return 500, False
+	user_id = client_storage.get_auth_data()[1]
 	
 	# Create required headers
 	headers = BASIC_HEADERS.copy()
 	headers["auth-token"] = auth_token
 	
-	# Get all workout data from client storage
-	workout_data_dict = client_storage.get_workout_data()
-	
-	# Go through all workouts and compile the workout ID and when it was updated
-	existing_data = {}
-	if workout_data_dict:
-		for workout_id, workout_data in workout_data_dict.items():
-			if 'id' in workout_data and 'updated_at' in workout_data:
-				existing_data[workout_data['id']] = workout_data['updated_at']
-	
-	# Post our existing data that we have compiled, and see what gets returned
-	s = requests.Session()
-	r = s.post('https://api.hevyapp.com/workouts_sync_batch', data=json.dumps(existing_data), headers=headers)
-	json_content = r.json()	
-
-	# Save any updated workouts to client-side storage
-	for updated_workout in json_content['updated']:
-		workout_id = updated_workout['id']
-		client_storage.store_workout_data(workout_id, updated_workout)
-		print("updated workout", workout_id)
-		
-	# Remove any deleted workouts from client-side storage
-	for deleted_workout in json_content['deleted']:
-		if WORKOUT_DATA_KEY in st.session_state and deleted_workout in st.session_state[WORKOUT_DATA_KEY]:
-			del st.session_state[WORKOUT_DATA_KEY][deleted_workout]
-			print("deleted workout", deleted_workout)
-		
-	# Do we need to make this API call again because there is more data available???
-	update = False
-	if json_content['isMore'] == True:
-		update = True	
+	def manifest_of(workout_ids=None):
+		# workout_ids limits the manifest to the workouts of one chunk
+		workout_data_dict = client_storage.get_workout_data() or {}
+		if workout_ids is not None:
+			workout_data_dict = {workout_id: workout_data_dict[workout_id] for workout_id in workout_ids if workout_id in workout_data_dict}
+		return {workout_data['id']: workout_data['updated_at'] for workout_data in workout_data_dict.values()
+				if 'id' in workout_data and 'updated_at' in workout_data}
+	
+	s = telemetry.session()
+	def post_chunk(chunk):
+		r = s.post(API_BASE+'/workouts_sync_batch', data=json.dumps(chunk), headers=headers, timeout=REQUEST_TIMEOUT)
+		return r.status_code, (r.json() if r.status_code == 200 else None)
+	
+	pending = _manifest_chunks(manifest_of(), chunk_size)
+	with concurrent.futures.ThreadPoolExecutor(max_workers=SYNC_CHUNK_WORKERS) as executor:
+		while pending:
+			telemetry.count("manifest_chunks_posted", len(pending))
+			results = list(executor.map(telemetry.propagate(post_chunk), pending))
+			for status_code, _ in results:
+				if status_code != 200:
+					return status_code, False
+			
+			# Merge the responses, a workout returned by several chunks keeps its latest version
+			updated = {}
+			deleted = set()
+			for _, json_content in results:
+				for updated_workout in json_content['updated']:
+					known = updated.get(updated_workout['id'])
+					if known is None or str(updated_workout.get('updated_at', '')) >= str(known.get('updated_at', '')):
+						updated[updated_workout['id']] = updated_workout
+				deleted.update(json_content['deleted'])
+			
+			# Save any updated workouts to client-side storage
+			for workout_id, updated_workout in updated.items():
+				client_storage.store_workout_data(workout_id, updated_workout)
+				journal.append(user_id, journal.KIND_WORKOUT, journal.OP_PUT, workout_id, updated_workout)
+				telemetry.count("workouts_updated")
+				logger.debug("updated workout %s", workout_id)
+			
+			# Remove any deleted workouts from client-side storage
+			for deleted_workout in deleted:
+				if client_storage.delete_workout_data(deleted_workout):
+					journal.append(user_id, journal.KIND_WORKOUT, journal.OP_DELETE, deleted_workout)
+					telemetry.count("workouts_deleted")
+					logger.debug("deleted workout %s", deleted_workout)
+			
+			# Re-post only the chunks with more updates, with the versions just stored
+			pending = [manifest_of(chunk) for chunk, (_, json_content) in zip(pending, results) if json_content['isMore'] == True]
+			pending = [chunk for chunk in pending if chunk]
 	
-	return (200, update)
-
+	return (200, False)
 
 #
 # Similar to workouts sync batch but for saved routines
@@ -725,11 +620,10 @@ def routines_sync_batch():
 	
 	# Import client_storage module for storing routine data
 	try:
-		from modules import client_storage
-		from modules.client_storage import ROUTINE_DATA_KEY
-		import streamlit as st
+		from modules import client_storage, journal
 	except ImportError:
 		return 500, False
+	user_id = client_storage.get_auth_data()[1]
 	
 	# Create required headers
 	headers = BASIC_HEADERS.copy()
@@ -746,21 +640,26 @@ def routines_sync_batch():
 				existing_data[routine_data['id']] = routine_data['updated_at']
 	
 	# Post our existing data that we have compiled, and see what gets returned
-	s = requests.Session()
-	r = s.post('https://api.hevyapp.com/routines_sync_batch', data=json.dumps(existing_data), headers=headers)
+	s = telemetry.session()
+	r = s.post(API_BASE+'/routines_sync_batch', data=json.dumps(existing_data), headers=headers, timeout=REQUEST_TIMEOUT)
+	if r.status_code != 200:
+		return r.status_code, False
 	json_content = r.json()	
 		
 	# Save any updated routines to client-side storage
 	for updated_routine in json_content['updated']:
 		routine_id = updated_routine['id']
 		client_storage.store_routine_data(routine_id, updated_routine)
-		print("updated routine", routine_id)
+		journal.append(user_id, journal.KIND_ROUTINE, journal.OP_PUT, routine_id, updated_routine)
+		telemetry.count("routines_updated")
+		logger.debug("updated routine %s", routine_id)
 		
 	# Remove any deleted routines from client-side storage
 	for deleted_routine in json_content['deleted']:
-		if ROUTINE_DATA_KEY in st.session_state and deleted_routine in st.session_state[ROUTINE_DATA_KEY]:
-			del st.session_state[ROUTINE_DATA_KEY][deleted_routine]
-			print("deleted routine", deleted_routine)
+		if client_storage.delete_routine_data(deleted_routine):
+			journal.append(user_id, journal.KIND_ROUTINE, journal.OP_DELETE, deleted_routine)
+			telemetry.count("routines_deleted")
+			logger.debug("deleted routine %s", deleted_routine)
 		
 	# Do we need to make this API call again because there is more data available???
 	update = False
@@ -790,15 +689,15 @@ def put_routine(the_json, routine_id=None):
 	headers["auth-token"] = auth_token
 
 	#return 200
-	s = requests.Session()
-	#print('https://api.hevyapp.com/routine/'+routine_id)
+	s = telemetry.session()
+	#print(API_BASE+'/routine/'+routine_id)
 	#print(the_json)
 	
 	r = None
 	if routine_id == None:
-		r = s.post('https://api.hevyapp.com/routine/', data=json.dumps(the_json), headers=headers)
+		r = s.post(API_BASE+'/routine/', data=json.dumps(the_json), headers=headers, timeout=REQUEST_TIMEOUT)
 	else:
-		r = s.put('https://api.hevyapp.com/routine/'+routine_id, data=json.dumps(the_json), headers=headers)
+		r = s.put(API_BASE+'/routine/'+routine_id, data=json.dumps(the_json), headers=headers, timeout=REQUEST_TIMEOUT)
 	return r.status_code
 	#return 400
 
@@ -813,21 +712,23 @@ def delete_routine(routine_id):
 	# Create required headers
 	headers = BASIC_HEADERS.copy()
 	headers["auth-token"] = auth_token
-	s = requests.Session()	
-	r = s.delete('https://api.hevyapp.com/routine/'+routine_id, headers=headers)
+	s = telemetry.session()	
+	r = s.delete(API_BASE+'/routine/'+routine_id, headers=headers, timeout=REQUEST_TIMEOUT)
 	return r.status_code, False
 
 #	
 # Get the Hevy workout feed starting from workout with given index, returns json data
+# auth_token can be passed in when called from a background thread, where the session storage is not available
 #
-def feed_workouts_paged(start_from):
-	print("feed_workouts_paged",start_from)
+def feed_workouts_paged(start_from, auth_token=None):
+	logger.debug("feed_workouts_paged %s", start_from)
 	# Make sure user is logged in, have their folder, and auth-token
-	user_data = is_logged_in()
-	if user_data[0] == False:
-		return 403
-	user_folder = user_data[1]
-	auth_token = user_data[2]
+	if auth_token is None:
+		user_data = is_logged_in()
+		if user_data[0] == False:
+			return 403
+		user_folder = user_data[1]
+		auth_token = user_data[2]
 	
 	# workout image stuff, set folder, delete old images
 	img_folder = str(Path.home())+ "/.underthebar/temp/"
@@ -843,13 +744,13 @@ def feed_workouts_paged(start_from):
 	headers["auth-token"] = auth_token
 	
 	
-	url = "https://api.hevyapp.com/feed_workouts_paged/"
+	url = API_BASE+"/feed_workouts_paged/"
 	if start_from != 0:
 		url = url + str(start_from)
 	
 	# Do the request
-	s = requests.Session()	
-	r = s.get(url, headers=headers)
+	s = telemetry.session()	
+	r = s.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
 	if r.status_code == 200:
 	
 		data = r.json()
@@ -864,8 +765,10 @@ def feed_workouts_paged(start_from):
 		#with concurrent.futures.ThreadPoolExecutor() as exector : 
 		#	exector.map(download_img, img_urls)
 		# above 2 lines waited for threads to complete, this just starts them and carries on.
-		exector =  concurrent.futures.ThreadPoolExecutor() 
-		exector.map(download_img, img_urls)
+		# All pages share one bounded pool, so prefetching pages doesn't multiply the download threads
+		image_pool = _get_image_pool()
+		for img_url in img_urls:
+			image_pool.submit(download_img, img_url)
 				
 		return new_data
 	
@@ -877,21 +780,21 @@ def download_img(img_url):
 	try:
 		img_folder = str(Path.home())+ "/.underthebar/temp/"
 		file_name = img_url.split("/")[-1]
-		print("start_img: "+file_name)
+		logger.debug("start_img: %s", file_name)
 		if not os.path.exists(img_folder+file_name):
-			response = requests.get(img_url, stream=True)
+			response = telemetry.session().get(img_url, stream=True, timeout=REQUEST_TIMEOUT)
 			with open(img_folder+file_name, 'wb') as out_file:
 				shutil.copyfileobj(response.raw, out_file)
 			del response
-		print("end_img: "+file_name)
+		logger.debug("end_img: %s", file_name)
 	except Exception as e:
-		print(e)
+		logger.warning("image download failed for %s: %s", img_url, e)
 
 #	
 # Likes, or unlikes, a workout with the given id	
 #
 def like_workout(workout_id, like_it):
-	print("like the workout", workout_id, like_it)
+	logger.info("like the workout %s %s", workout_id, like_it)
 	# Make sure user is logged in, have their folder, and auth-token
 	user_data = is_logged_in()
 	if user_data[0] == False:
@@ -904,12 +807,12 @@ def like_workout(workout_id, like_it):
 	headers["auth-token"] = auth_token
 	
 	
-	url = "https://api.hevyapp.com/workout/like/"+workout_id
+	url = API_BASE+"/workout/like/"+workout_id
 	if not like_it:
-		url = "https://api.hevyapp.com/workout/unlike/"+workout_id
+		url = API_BASE+"/workout/unlike/"+workout_id
 	
-	s = requests.Session()	
-	r = s.post(url, headers=headers)
+	s = telemetry.session()	
+	r = s.post(url, headers=headers, timeout=REQUEST_TIMEOUT)
 	
 	return r.status_code
 	
@@ -930,16 +833,16 @@ def friends():
 	headers["auth-token"] = auth_token
 	
 	
-	url = "https://api.hevyapp.com/following/lazy_steve"	
-	s = requests.Session()	
-	r = s.get(url, headers=headers)	
+	url = API_BASE+"/following/lazy_steve"	
+	s = telemetry.session()	
+	r = s.get(url, headers=headers, timeout=REQUEST_TIMEOUT)	
 	following_data = r.json()
 	following = []
 	for datum in following_data:
 		following.append(datum['username'])
 	
-	url = "https://api.hevyapp.com/followers/lazy_steve"	
-	r = s.get(url, headers=headers)	
+	url = API_BASE+"/followers/lazy_steve"	
+	r = s.get(url, headers=headers, timeout=REQUEST_TIMEOUT)	
 	followers_data = r.json()
 	follower = []
 	for datum in followers_data:
@@ -0,0 +1,161 @@
+"""
+Workout History
+
+Paginated browsing of the workout history. Pages are cut from the workout index
+(data.build_workout_index), so only the workouts of the page being viewed are
+sliced out of the set-level data and formatted, each as a single table grouped
+by exercise. The pages either side of the current one are built on a background
+thread once the current page has been drawn, so paging back and forth is served
+from the cache without holding up the rest of the script run.
+"""
+
+import concurrent.futures
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Workouts per page
+PAGE_SIZE = 10
+
+# Session state key of the page being viewed, with the filters it belongs to
+HISTORY_PAGE_KEY = "hevy_history_page"
+
+# Shared single-thread pool building the neighbouring pages, started with the first prefetch
+_prefetch_pool = None
+
+def _get_prefetch_pool():
+    global _prefetch_pool
+    if _prefetch_pool is None:
+        _prefetch_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="history_prefetch")
+    return _prefetch_pool
+
+def page_count(n_workouts, page_size=PAGE_SIZE):
+    """
+    Get the number of pages of a workout list
+
+    Args:
+        n_workouts (int): Number of workouts
+        page_size (int): Workouts per page
+
+    Returns:
+        int: Number of pages, at least 1
+    """
+    return max(1, -(-n_workouts // page_size))
+
+def page_ids(workout_index, page, page_size=PAGE_SIZE):
+    """
+    Get the workouts of one page
+
+    Args:
+        workout_index (pd.DataFrame): Workout index from data.build_workout_index, newest first
+        page (int): Page number, 0 for the newest workouts
+        page_size (int): Workouts per page
+
+    Returns:
+        tuple: Workout IDs of the page
+    """
+    return tuple(workout_index.index[page * page_size:(page + 1) * page_size])
+
+def current_page(filter_key, n_pages, state_key=HISTORY_PAGE_KEY):
+    """
+    Get the page being viewed, back on the first page whenever the filters change
+
+    Args:
+        filter_key (tuple): Identifies the filtered workout list
+        n_pages (int): Number of pages of the list
+        state_key (str): Session state key of the paged list, e.g. query.QUERY_PAGE_KEY
+
+    Returns:
+        int: Page number
+    """
+    state = st.session_state.get(state_key)
+    if state is None or state["filter"] != filter_key:
+        state = {"filter": filter_key, "page": 0}
+        st.session_state[state_key] = state
+    state["page"] = min(max(state["page"], 0), n_pages - 1)
+    return state["page"]
+
+def set_page(page, state_key=HISTORY_PAGE_KEY):
+    """
+    Move to a page, used as a button callback
+
+    Args:
+        page (int): Page number
+        state_key (str): Session state key of the paged list
+    """
+    st.session_state[state_key]["page"] = page
+
+def grouped_set_table(workout_sets):
+    """
+    Format the sets of a workout as one table grouped by exercise
+
+    Args:
+        workout_sets (pd.DataFrame): Sets of one workout, in logged order
+
+    Returns:
+        pd.DataFrame: See data.format_set_table, the exercise is only named on its first set
+    """
+    from modules import data
+
+    table = data.format_set_table(workout_sets)
+    exercise = table['Exercise']
+    table['Exercise'] = exercise.where(exercise != exercise.shift(), '')
+    return table
+
+def build_page(df, workout_index, workout_ids, exercises=None):
+    """
+    Build the summaries and set tables of the workouts of a page
+
+    Args:
+        df (pd.DataFrame): Set-level workout data, sets of a workout contiguous
+        workout_index (pd.DataFrame): Workout index from data.build_workout_index
+        workout_ids (tuple): Workouts of the page, from page_ids
+        exercises (tuple, optional): Only show these exercises
+
+    Returns:
+        list: One dict per workout with workout_id, label, duration (minutes), exercises,
+        sets, volume and table
+    """
+    workouts = []
+    for workout_id in workout_ids:
+        workout = workout_index.loc[workout_id]
+        workout_sets = df.iloc[workout['start']:workout['stop']]
+        if exercises:
+            workout_sets = workout_sets[workout_sets['exercise_title'].isin(exercises)]
+        workouts.append({
+            "workout_id": workout_id,
+            "label": workout['label'],
+            "duration": (workout['end_time'] - workout['start_time']).total_seconds() / 60,
+            "exercises": workout_sets['exercise_title'].nunique(),
+            "sets": len(workout_sets),
+            "volume": workout_sets['volume'].sum(),
+            "table": grouped_set_table(workout_sets),
+        })
+    return workouts
+
+def prefetch(version, df, workout_index, page, n_pages, exercises=None):
+    """
+    Build the pages next to the current one into the cache of data.load_history_page, on a
+    background thread. A page requested while it is being built waits for it in the cache.
+
+    Args:
+        version (data.DatasetVersion): Version of the workout data, used as the cache key
+        df (pd.DataFrame): Set-level workout data
+        workout_index (pd.DataFrame): Filtered workout index, newest first
+        page (int): Current page
+        n_pages (int): Number of pages
+        exercises (tuple, optional): Only show these exercises
+    """
+    from modules import data
+
+    pages = [page_ids(workout_index, neighbour) for neighbour in (page + 1, page - 1) if 0 <= neighbour < n_pages]
+    ctx = get_script_run_ctx()
+
+    def build():
+        # The script run's context lets the cache reach the session's runtime without warnings
+        add_script_run_ctx(ctx=ctx)
+        for workout_ids in pages:
+            data.load_history_page(version, workout_ids, exercises, df, workout_index)
+
+    if pages:
+        _get_prefetch_pool().submit(build)
\ No newline at end of file
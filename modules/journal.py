@@ -0,0 +1,284 @@
+"""
+Sync Journal
+
+Append-only local journal of the workout and routine changes applied by a sync.
+The journal is compacted into a snapshot every COMPACT_EVERY entries, so a new
+session can rebuild its state by loading the snapshot and replaying the tail
+instead of re-downloading the whole history. The sync cursors saved next to it
+let an interrupted sync continue where it stopped.
+"""
+
+import json
+import os
+import threading
+
+# Folder holding one sub-folder per user with the snapshot and the journal tail. The journal
+# keeps every user's history on the server's disk, so it is off unless a folder is configured
+JOURNAL_DIR = os.environ.get("HEVY_JOURNAL_DIR", "")
+JOURNAL_FILE = "journal.jsonl"
+SNAPSHOT_FILE = "snapshot.json"
+CURSORS_FILE = "cursors.json"
+
+# Number of journal entries after which the tail is folded into the snapshot
+COMPACT_EVERY = 500
+
+# Journal entry kinds and operations
+KIND_WORKOUT = "workout"
+KIND_ROUTINE = "routine"
+OP_PUT = "put"
+OP_DELETE = "del"
+
+_lock = threading.Lock()
+# user_id -> {"seq": last written sequence number, "snapshot_seq": sequence number folded
+# into the snapshot, "tail": entries since the snapshot}
+_counters = {}
+
+def _user_dir(user_id):
+    return os.path.join(JOURNAL_DIR, "user_" + str(user_id))
+
+def _read_snapshot(folder):
+    path = os.path.join(folder, SNAPSHOT_FILE)
+    if not os.path.exists(path):
+        return {"seq": 0, "workouts": {}, "routines": {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _read_tail(folder):
+    path = os.path.join(folder, JOURNAL_FILE)
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn last line from an interrupted write, everything before it is intact
+                break
+    return entries
+
+def _get_counters(user_id):
+    counters = _counters.get(user_id)
+    if counters is None:
+        snapshot_seq = _read_snapshot(_user_dir(user_id))["seq"]
+        tail = _read_tail(_user_dir(user_id))
+        seq = tail[-1]["seq"] if tail else snapshot_seq
+        counters = {"seq": seq, "snapshot_seq": snapshot_seq, "tail": len(tail)}
+        _counters[user_id] = counters
+    return counters
+
+def _apply(state, entry):
+    collection = state["workouts"] if entry["kind"] == KIND_WORKOUT else state["routines"]
+    if entry["op"] == OP_PUT:
+        collection[entry["id"]] = entry["data"]
+    else:
+        collection.pop(entry["id"], None)
+    state["seq"] = entry["seq"]
+
+def append(user_id, kind, op, item_id, data=None):
+    """
+    Append a single change to the user's journal
+
+    Args:
+        user_id (str): Hevy user ID owning the journal
+        kind (str): KIND_WORKOUT or KIND_ROUTINE
+        op (str): OP_PUT for a store/update, OP_DELETE for a delete
+        item_id (str): ID of the workout or routine
+        data (dict, optional): Full item data for OP_PUT
+
+    Returns:
+        int: Sequence number of the new entry, or 0 if the journal is disabled
+    """
+    if not user_id or not JOURNAL_DIR:
+        return 0
+    with _lock:
+        os.makedirs(_user_dir(user_id), exist_ok=True)
+        counters = _get_counters(user_id)
+        entry = {"seq": counters["seq"] + 1, "kind": kind, "op": op, "id": item_id}
+        if op == OP_PUT:
+            entry["data"] = data
+        with open(os.path.join(_user_dir(user_id), JOURNAL_FILE), 'a') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + "\n")
+        counters["seq"] = entry["seq"]
+        counters["tail"] += 1
+        if counters["tail"] >= COMPACT_EVERY:
+            _compact(user_id)
+        return entry["seq"]
+
+def _compact(user_id):
+    user_dir = _user_dir(user_id)
+    state = read_state(user_dir)
+
+    # Write the new snapshot next to the old one and swap it in atomically before truncating
+    tmp_path = os.path.join(user_dir, SNAPSHOT_FILE + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, os.path.join(user_dir, SNAPSHOT_FILE))
+    open(os.path.join(user_dir, JOURNAL_FILE), 'w').close()
+    counters = _get_counters(user_id)
+    counters["snapshot_seq"] = state["seq"]
+    counters["tail"] = 0
+
+def compact(user_id):
+    """
+    Fold the journal tail into the snapshot
+
+    Args:
+        user_id (str): Hevy user ID owning the journal
+    """
+    if not user_id or not JOURNAL_DIR:
+        return
+    with _lock:
+        if os.path.isdir(_user_dir(user_id)):
+            _compact(user_id)
+
+def load_state(user_id):
+    """
+    Rebuild the synced state from the snapshot plus the journal tail
+
+    Args:
+        user_id (str): Hevy user ID owning the journal
+
+    Returns:
+        dict: {"seq": int, "workouts": {id: workout}, "routines": {id: routine}}
+    """
+    if not user_id or not JOURNAL_DIR:
+        return {"seq": 0, "workouts": {}, "routines": {}}
+    with _lock:
+        return read_state(_user_dir(user_id))
+
+def read_state(folder):
+    """
+    Rebuild the state journaled in a user folder, e.g. a copy of another account's journal
+
+    Args:
+        folder (str): User folder holding the snapshot and the journal tail
+
+    Returns:
+        dict: {"seq": int, "workouts": {id: workout}, "routines": {id: routine}}
+    """
+    state = _read_snapshot(folder)
+    for entry in _read_tail(folder):
+        _apply(state, entry)
+    return state
+
+def restore(user_id, state=None):
+    """
+    Restore workouts and routines from the journal into client-side storage
+
+    Args:
+        user_id (str): Hevy user ID owning the journal
+        state (dict, optional): State already read with load_state
+
+    Returns:
+        int: Sequence number of the restored state (0 if nothing was journaled)
+    """
+    from modules import client_storage
+
+    if state is None:
+        state = load_state(user_id)
+    for workout_id, workout in state["workouts"].items():
+        client_storage.store_workout_data(workout_id, workout)
+    for routine_id, routine in state["routines"].items():
+        client_storage.store_routine_data(routine_id, routine)
+    return state["seq"]
+
+def current_seq(user_id):
+    """
+    Get the sequence number of the last journaled change
+
+    Args:
+        user_id (str): Hevy user ID owning the journal
+
+    Returns:
+        int: Last sequence number, increases with every journaled change
+    """
+    if not user_id or not JOURNAL_DIR:
+        return 0
+    with _lock:
+        return _get_counters(user_id)["seq"]
+
+def changes_since(user_id, seq):
+    """
+    Get the changes journaled after a given sequence number
+
+    Args:
+        user_id (str): Hevy user ID owning the journal
+        seq (int): Last sequence number the caller has already seen
+
+    Returns:
+        list or None: Journal entries newer than seq, or None if some of them were
+        already compacted into the snapshot and the caller needs a full reload
+    """
+    if not user_id or not JOURNAL_DIR:
+        return []
+    with _lock:
+        if _get_counters(user_id)["snapshot_seq"] > seq:
+            return None
+        return [entry for entry in _read_tail(_user_dir(user_id)) if entry["seq"] > seq]
+
+def load_cursors(user_id):
+    """
+    Get the sync cursors saved for the user
+
+    Cursors are kept next to the state they describe: in the user's journal folder while the
+    journal is enabled, otherwise in the session storage, so a sync retried in the same
+    session still resumes.
+
+    Args:
+        user_id (str): Hevy user ID owning the journal
+
+    Returns:
+        dict: {stream: cursor}, empty if nothing was saved
+    """
+    if not user_id:
+        return {}
+    if not JOURNAL_DIR:
+        from modules import client_storage
+
+        return client_storage.get_sync_cursors()
+    path = os.path.join(_user_dir(user_id), CURSORS_FILE)
+    with _lock:
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+def save_cursor(user_id, stream, cursor):
+    """
+    Save the cursor of one sync stream, replacing the cursors file atomically (see load_cursors)
+
+    Args:
+        user_id (str): Hevy user ID owning the journal
+        stream (str): Stream name, e.g. "download"
+        cursor (dict or None): Cursor to save, None removes the stream's cursor
+    """
+    if not user_id:
+        return
+    if not JOURNAL_DIR:
+        from modules import client_storage
+
+        client_storage.store_sync_cursor(stream, cursor)
+        return
+    with _lock:
+        user_dir = _user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        path = os.path.join(user_dir, CURSORS_FILE)
+        cursors = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    cursors = json.load(f)
+            except ValueError:
+                pass
+        if cursor is None:
+            cursors.pop(stream, None)
+        else:
+            cursors[stream] = cursor
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cursors, f)
+        os.replace(tmp_path, path)
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Muscle Attribution
+
+Sparse set x muscle incidence used to credit secondary muscles with part of the
+volume of every set. The incidence is stored factorised as a set -> exercise code
+per row and a small CSR exercise x muscle matrix (primary weight 1.0, secondary
+weight configurable), so muscle totals for any subset of rows are a bincount over
+the exercise codes followed by one sparse matrix-vector product.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Default share of a set's volume credited to each secondary muscle
+DEFAULT_SECONDARY_WEIGHT = 0.5
+
+def build_muscle_incidence(df):
+    """
+    Build the set x muscle incidence of a workout DataFrame
+
+    Args:
+        df (pd.DataFrame): Set-level workout data from load_workout_data
+
+    Returns:
+        dict: Incidence arrays - "index" (row labels of df), "row_exercise" (exercise code
+        per row), "exercises", "muscles", and the CSR exercise x muscle matrix as
+        "indptr", "indices" and "primary" (True for the primary muscle entry)
+    """
+    row_exercise, exercises = pd.factorize(df['exercise_title'])
+
+    # Muscles only depend on the exercise, so only one row per exercise is read
+    first_rows = np.unique(row_exercise, return_index=True)[1]
+    primary_muscles = df['muscle_group'].fillna('other').to_numpy()[first_rows]
+    other_muscles = df['other_muscles'].to_numpy()[first_rows]
+
+    entries = []
+    for exercise_code, (primary, others) in enumerate(zip(primary_muscles, other_muscles)):
+        entries.append((exercise_code, primary, True))
+        for muscle in (others if isinstance(others, (list, tuple, np.ndarray)) else []):
+            if muscle != primary:
+                entries.append((exercise_code, muscle, False))
+
+    entry_exercise = np.array([entry[0] for entry in entries], dtype=np.int64)
+    entry_codes, muscles = pd.factorize(pd.Series([entry[1] for entry in entries]), sort=True)
+
+    return {
+        "index": df.index,
+        "row_exercise": row_exercise,
+        "exercises": exercises,
+        "muscles": muscles,
+        "indptr": np.concatenate([[0], np.cumsum(np.bincount(entry_exercise, minlength=len(exercises)))]),
+        "indices": entry_codes,
+        "primary": np.array([entry[2] for entry in entries], dtype=bool),
+    }
+
+def _row_exercises(incidence, rows, cells):
+    # Cube cells (see cube.build_cube) are not rows of the incidence, look their exercise up by title
+    if cells:
+        return incidence["exercises"].get_indexer(rows['exercise_title'])
+    positions = incidence["index"].get_indexer(rows.index)
+    return incidence["row_exercise"][positions]
+
+def exercise_to_muscle(incidence, exercise_values, secondary_weight=DEFAULT_SECONDARY_WEIGHT):
+    """
+    Spread per-exercise totals over the muscles each exercise works
+
+    Args:
+        incidence (dict): Incidence from build_muscle_incidence
+        exercise_values (array-like or pd.Series): Total per exercise code, or a Series indexed by exercise title
+        secondary_weight (float): Share credited to each secondary muscle
+
+    Returns:
+        pd.Series: Total per muscle
+    """
+    if isinstance(exercise_values, pd.Series):
+        exercise_values = exercise_values.reindex(incidence["exercises"], fill_value=0)
+    exercise_values = np.asarray(exercise_values, dtype=float)
+
+    counts = np.diff(incidence["indptr"])
+    weights = np.where(incidence["primary"], 1.0, secondary_weight)
+    totals = np.bincount(incidence["indices"], weights=np.repeat(exercise_values, counts) * weights,
+                         minlength=len(incidence["muscles"]))
+    return pd.Series(totals, index=incidence["muscles"])
+
+def muscle_volume(incidence, rows, secondary_weight=DEFAULT_SECONDARY_WEIGHT, column='volume', cells=False):
+    """
+    Total a set column per muscle, crediting secondary muscles
+
+    Args:
+        incidence (dict): Incidence from build_muscle_incidence
+        rows (pd.DataFrame): Any row subset of the DataFrame the incidence was built from, or cube cells
+        secondary_weight (float): Share credited to each secondary muscle
+        column (str): Column to total
+        cells (bool): Whether rows are cube cells rather than rows of the incidence's DataFrame
+
+    Returns:
+        pd.Series: Total per muscle
+    """
+    per_exercise = np.bincount(_row_exercises(incidence, rows, cells), weights=rows[column].fillna(0).to_numpy(dtype=float),
+                               minlength=len(incidence["exercises"]))
+    return exercise_to_muscle(incidence, per_exercise, secondary_weight)
+
+def muscle_frequency(incidence, rows, include_secondary=True, by='workout_date', cells=False):
+    """
+    Count the distinct workouts that trained each muscle
+
+    Args:
+        incidence (dict): Incidence from build_muscle_incidence
+        rows (pd.DataFrame): Any row subset of the DataFrame the incidence was built from, or cube cells
+        include_secondary (bool): Whether secondary muscles count as trained
+        by (str): Column identifying a workout
+        cells (bool): Whether rows are cube cells rather than rows of the incidence's DataFrame
+
+    Returns:
+        pd.Series: Number of workouts per muscle
+    """
+    n_exercises = len(incidence["exercises"])
+    n_muscles = len(incidence["muscles"])
+    workout_codes = pd.factorize(rows[by])[0].astype(np.int64)
+
+    # Distinct (workout, exercise) pairs, then expanded to their muscles through the CSR rows
+    pairs = np.unique(workout_codes * n_exercises + _row_exercises(incidence, rows, cells))
+    pair_workout, pair_exercise = pairs // n_exercises, pairs % n_exercises
+    starts = incidence["indptr"][pair_exercise]
+    counts = incidence["indptr"][pair_exercise + 1] - starts
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    entries = np.repeat(starts, counts) + offsets
+
+    keep = incidence["primary"][entries] | include_secondary
+    workout_muscle = np.unique(np.repeat(pair_workout, counts)[keep] * n_muscles + incidence["indices"][entries][keep])
+    return pd.Series(np.bincount(workout_muscle % n_muscles, minlength=n_muscles), index=incidence["muscles"])
@@ -0,0 +1,227 @@
+"""
+Profiling
+
+Opt-in per-rerun profiling. When enabled with the ?profile=1 query parameter or
+the HEVY_PROFILE environment variable, stages of the rerun (loading, filtering,
+each chart builder, chart serialization, each tab) are timed, and the last runs
+are shown in the sidebar and appended as JSON lines to HEVY_PROFILE_LOG when it
+is set. When disabled every hook is a no-op.
+
+Memory allocations are only traced when HEVY_PROFILE is set: tracemalloc slows
+down every thread of the process, so it runs only while profiled runs are in
+progress and a visitor cannot turn it on with the query parameter. Its peak is
+process-wide, so the peaks of runs profiled at the same time include each other.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import streamlit as st
+
+# Environment variables enabling profiling for every session and naming the JSON lines log
+PROFILE_ENV = "HEVY_PROFILE"
+PROFILE_LOG = os.environ.get("HEVY_PROFILE_LOG", "")
+
+# Query parameter enabling profiling for one session
+PROFILE_QUERY_PARAM = "profile"
+
+# Number of reruns kept in the session
+HISTORY_LENGTH = 10
+
+# Session state key of the kept reruns
+PROFILE_HISTORY_KEY = "hevy_profile_history"
+
+# Profile of the rerun in progress, per script thread since sessions rerun concurrently
+_local = threading.local()
+
+# Number of runs in progress tracing allocations, tracemalloc is stopped when the last one ends
+_tracing_runs = 0
+_tracing_lock = threading.Lock()
+
+def _current():
+    return getattr(_local, 'run', None)
+
+def _env_enabled():
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+def _start_tracing():
+    global _tracing_runs
+    with _tracing_lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_runs += 1
+        tracemalloc.reset_peak()
+
+def _stop_tracing():
+    global _tracing_runs
+    with _tracing_lock:
+        _tracing_runs = max(_tracing_runs - 1, 0)
+        if _tracing_runs == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def is_enabled():
+    """
+    Check whether profiling is requested for this session
+
+    Returns:
+        bool: True if enabled by query parameter or environment variable
+    """
+    if _env_enabled():
+        return True
+    return st.query_params.get(PROFILE_QUERY_PARAM, "") not in ("", "0")
+
+def start_run():
+    """
+    Start profiling a rerun if profiling is enabled
+    """
+    # A run stopped before finish_run (e.g. by st.rerun) no longer holds tracemalloc
+    previous = _current()
+    if previous is not None and previous["memory"]:
+        _stop_tracing()
+    _local.run = None
+    if not is_enabled():
+        return
+    memory = _env_enabled()
+    if memory:
+        _start_tracing()
+    _local.run = {
+        "started_at": time.time(),
+        "start": time.perf_counter(),
+        "memory": memory,
+        "stages": [],
+        "stack": [],
+    }
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Time a stage of the rerun and trace its allocations
+
+    Args:
+        name (str): Stage name, nested stages are recorded with their depth
+    """
+    run = _current()
+    if run is None:
+        yield
+        return
+    if not run["memory"]:
+        start = time.perf_counter()
+        depth = len(run["stack"])
+        run["stack"].append(None)
+        try:
+            yield
+        finally:
+            run["stack"].pop()
+            run["stages"].append({
+                "stage": name,
+                "depth": depth,
+                "start_ms": (start - run["start"]) * 1000,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "allocated_kb": None,
+                "peak_kb": None,
+            })
+        return
+
+    stack = run["stack"]
+    current_memory, peak = tracemalloc.get_traced_memory()
+    # The peak is reset per stage, so the enclosing stage keeps the highest peak seen so far
+    if stack:
+        stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+    tracemalloc.reset_peak()
+    frame = {"memory": current_memory, "peak": current_memory}
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        end_memory, peak = tracemalloc.get_traced_memory()
+        stack.pop()
+        stage_peak = max(frame["peak"], peak)
+        if stack:
+            stack[-1]["peak"] = max(stack[-1]["peak"], stage_peak)
+        tracemalloc.reset_peak()
+        run["stages"].append({
+            "stage": name,
+            "depth": len(stack),
+            "start_ms": (start - run["start"]) * 1000,
+            "duration_ms": duration * 1000,
+            "allocated_kb": (end_memory - frame["memory"]) / 1024,
+            "peak_kb": (stage_peak - frame["memory"]) / 1024,
+        })
+
+def profiled(func):
+    """
+    Decorator recording each call of a function as a stage named after it
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current() is None:
+            return func(*args, **kwargs)
+        with stage(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+def finish_run():
+    """
+    Finish profiling the rerun: keep it in the session history, append it to the
+    JSON lines log and display the profiling panel in the sidebar
+    """
+    current = _current()
+    if current is None:
+        return
+    run = {
+        "started_at": current["started_at"],
+        "total_ms": (time.perf_counter() - current["start"]) * 1000,
+        # Stages are recorded when they end, sort them back into start order
+        "stages": sorted(current["stages"], key=lambda s: s["start_ms"]),
+    }
+    _local.run = None
+    if current["memory"]:
+        _stop_tracing()
+
+    history = st.session_state.setdefault(PROFILE_HISTORY_KEY, [])
+    history.append(run)
+    del history[:-HISTORY_LENGTH]
+
+    if PROFILE_LOG:
+        with open(PROFILE_LOG, 'a') as f:
+            f.write(json.dumps(run) + "\n")
+
+    display_panel(history)
+
+def display_panel(history):
+    """
+    Display the stage table of the last rerun and a waterfall of the kept reruns in the sidebar
+
+    Args:
+        history (list): Profiled reruns, oldest first
+    """
+    import pandas as pd
+    from modules import visualization
+
+    last = history[-1]
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("## Profiling")
+    st.sidebar.markdown(f"Last rerun: **{last['total_ms']:.0f} ms**")
+
+    stages = pd.DataFrame(last["stages"])
+    if not stages.empty:
+        stages['stage'] = [' ' * depth + name for depth, name in zip(stages['depth'], stages['stage'])]
+        # Allocations are only traced when profiling is enabled by HEVY_PROFILE
+        columns = ['stage', 'duration_ms'] + (['allocated_kb', 'peak_kb'] if stages['allocated_kb'].notna().any() else [])
+        st.sidebar.dataframe(
+            stages[columns].rename(columns={
+                'stage': 'Stage', 'duration_ms': 'ms', 'allocated_kb': 'Alloc KB', 'peak_kb': 'Peak KB'
+            }).round(1),
+            hide_index=True
+        )
+
+    st.sidebar.plotly_chart(visualization.create_profile_waterfall_chart(history), use_container_width=True)
+    st.sidebar.download_button("Download profile (JSON)", json.dumps(history, indent=1),
+                               file_name="hevy_profile.json", mime="application/json")
\ No newline at end of file
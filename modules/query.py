@@ -0,0 +1,296 @@
+"""
+Set Query
+
+A small filter language over the set-level workout data, e.g.
+
+    exercise = Squat (Barbell) and weight > 140 and rpe <= 8 and date >= 2025-01-01
+
+Conditions are a field, an operator and a value, joined by "and". Numbers and
+dates compare with = != < <= > >=, text fields (matched case-insensitively)
+with = != and ~ (contains). Values are numbers, dates (YYYY-MM-DD), quoted
+strings, or the words up to the next "and".
+
+Queries run against an index built once per dataset version: every number and
+date column is argsorted, every text column factorized with the rows of each
+value grouped together. The most selective condition is answered from its index
+by binary search, and the others are vectorized masks over its rows only, so no
+condition looks at every set.
+"""
+
+import collections
+import re
+
+import numpy as np
+import pandas as pd
+
+# Sets per result page
+PAGE_SIZE = 50
+
+# Session state key of the result page being viewed, with the query it belongs to
+QUERY_PAGE_KEY = "hevy_query_page"
+
+# Query fields: {name: (column, kind)}, the column names themselves are accepted too
+FIELDS = {
+    'exercise': ('exercise_title', 'text'),
+    'workout': ('title', 'text'),
+    'muscle': ('muscle_group', 'text'),
+    'equipment': ('equipment_category', 'text'),
+    'type': ('set_type', 'text'),
+    'weight': ('weight_kg', 'number'),
+    'reps': ('reps', 'number'),
+    'rpe': ('rpe', 'number'),
+    'volume': ('volume', 'number'),
+    'distance': ('distance_km', 'number'),
+    'duration': ('duration_seconds', 'number'),
+    'date': ('workout_date', 'date'),
+}
+
+# The column names are accepted as fields too
+_COLUMN_FIELDS = {column: (column, kind) for column, kind in FIELDS.values()}
+
+# Operators of each kind of field
+OPERATORS = {
+    'number': {'=', '!=', '<', '<=', '>', '>='},
+    'date': {'=', '!=', '<', '<=', '>', '>='},
+    'text': {'=', '!=', '~'},
+}
+
+# Columns of the result table and their displayed names
+RESULT_COLUMNS = {
+    'workout_date': 'Date',
+    'title': 'Workout',
+    'exercise_title': 'Exercise',
+    'set_index': 'Set',
+    'set_type': 'Type',
+    'weight_kg': 'Weight (kg)',
+    'reps': 'Reps',
+    'rpe': 'RPE',
+    'volume': 'Volume (kg)',
+}
+
+Condition = collections.namedtuple('Condition', ['field', 'column', 'kind', 'op', 'value'])
+
+_TOKEN = re.compile(r'\s*(?:(?P<op><=|>=|!=|==|=|<|>|≤|≥|~)|"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\'|(?P<word>[^\s<>=!~≤≥"\']+))')
+_OPERATOR_ALIASES = {'==': '=', '≤': '<=', '≥': '>='}
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"Unexpected character '{text[position:].strip()[0]}'")
+        position = match.end()
+        if match.group('op'):
+            tokens.append(('op', _OPERATOR_ALIASES.get(match.group('op'), match.group('op'))))
+        elif match.group('word') is not None:
+            tokens.append(('word', match.group('word')))
+        else:
+            tokens.append(('string', match.group('dq') if match.group('dq') is not None else match.group('sq')))
+    return tokens
+
+def _parse_value(kind, field, raw):
+    if kind == 'number':
+        try:
+            return float(raw)
+        except ValueError:
+            raise ValueError(f"'{raw}' is not a number ({field})") from None
+    if kind == 'date':
+        try:
+            return pd.Timestamp(raw).normalize()
+        except ValueError:
+            raise ValueError(f"'{raw}' is not a date, use YYYY-MM-DD ({field})") from None
+    return raw.lower()
+
+def _is_and(token):
+    return token[0] == 'word' and token[1].lower() == 'and'
+
+def parse(text):
+    """
+    Parse a query
+
+    Args:
+        text (str): Query, see the module docstring
+
+    Returns:
+        list: Conditions, all of which a set has to meet
+
+    Raises:
+        ValueError: If the query is not valid, with a message for the user
+    """
+    tokens = _tokenize(text)
+    conditions = []
+    i = 0
+    while i < len(tokens):
+        token_type, field = tokens[i]
+        field = field.lower()
+        if token_type != 'word' or (field not in FIELDS and field not in _COLUMN_FIELDS):
+            raise ValueError(f"Unknown field '{tokens[i][1]}', use one of {', '.join(FIELDS)}")
+        column, kind = FIELDS.get(field) or _COLUMN_FIELDS[field]
+        if i + 1 >= len(tokens) or tokens[i + 1][0] != 'op':
+            raise ValueError(f"Expected an operator after '{field}'")
+        op = tokens[i + 1][1]
+        if op not in OPERATORS[kind]:
+            raise ValueError(f"'{op}' cannot be used with {field}, use one of {' '.join(sorted(OPERATORS[kind]))}")
+
+        # The value is a quoted string or the words up to the next "and"
+        i += 2
+        if i < len(tokens) and tokens[i][0] == 'string':
+            raw = tokens[i][1]
+            i += 1
+        else:
+            words = []
+            while i < len(tokens) and tokens[i][0] == 'word' and not _is_and(tokens[i]):
+                words.append(tokens[i][1])
+                i += 1
+            if not words:
+                raise ValueError(f"Expected a value after '{field} {op}'")
+            raw = ' '.join(words)
+        conditions.append(Condition(field, column, kind, op, _parse_value(kind, field, raw)))
+
+        if i < len(tokens):
+            if not _is_and(tokens[i]):
+                raise ValueError(f"Expected 'and' after the value of {field}")
+            i += 1
+            if i == len(tokens):
+                raise ValueError("Expected a condition after 'and'")
+    if not conditions:
+        raise ValueError("The query is empty")
+    return conditions
+
+def build_index(df):
+    """
+    Build the sorted indexes of the set-level columns used by queries
+
+    Args:
+        df (pd.DataFrame): Set-level workout data
+
+    Returns:
+        dict: {column: index}, number and date columns as {"values", "order", "sorted"} (rows
+        with a value, argsorted), text columns as {"codes", "categories", "order", "offsets"}
+        (the rows of category c are order[offsets[c]:offsets[c + 1]])
+    """
+    index = {}
+    for column, kind in FIELDS.values():
+        if column not in df.columns:
+            continue
+        if kind == 'text':
+            codes, categories = pd.factorize(df[column].astype(object), sort=False)
+            order = np.argsort(codes, kind='stable')
+            offsets = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+            index[column] = {
+                "codes": codes,
+                "categories": np.array([str(category).lower() for category in categories], dtype=str),
+                "order": order,
+                "offsets": offsets,
+            }
+        else:
+            if kind == 'date':
+                values = df[column].to_numpy(dtype='datetime64[ns]').view('int64').astype(float)
+                values[df[column].isna().to_numpy()] = np.nan
+            else:
+                values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+            # NaNs sort last and are left out, they meet no condition
+            order = np.argsort(values, kind='stable')[:np.count_nonzero(~np.isnan(values))]
+            index[column] = {"values": values, "order": order, "sorted": values[order]}
+    return index
+
+def _key(condition):
+    if condition.kind == 'date':
+        return float(condition.value.value)
+    return condition.value
+
+def _matched_categories(column_index, condition):
+    categories = column_index["categories"]
+    if condition.op == '~':
+        return np.char.find(categories, condition.value) >= 0
+    if condition.op == '=':
+        return categories == condition.value
+    return categories != condition.value
+
+def _ranges(column_index, condition):
+    # Runs of the column's sorted order meeting the condition
+    if condition.kind == 'text':
+        offsets = column_index["offsets"]
+        matched = np.flatnonzero(_matched_categories(column_index, condition))
+        return list(zip(offsets[matched], offsets[matched + 1]))
+
+    sorted_values = column_index["sorted"]
+    key = _key(condition)
+    left = np.searchsorted(sorted_values, key, side='left')
+    right = np.searchsorted(sorted_values, key, side='right')
+    return {
+        '=': [(left, right)],
+        '!=': [(0, left), (right, len(sorted_values))],
+        '<': [(0, left)],
+        '<=': [(0, right)],
+        '>': [(right, len(sorted_values))],
+        '>=': [(left, len(sorted_values))],
+    }[condition.op]
+
+def _mask(column_index, condition, rows):
+    # Vectorized test of the condition on some rows
+    if condition.kind == 'text':
+        # Rows without a value have code -1, which looks up the trailing False
+        matched = np.append(_matched_categories(column_index, condition), False)
+        return matched[column_index["codes"][rows]]
+
+    values = column_index["values"][rows]
+    key = _key(condition)
+    with np.errstate(invalid='ignore'):
+        return {
+            '=': values == key,
+            '!=': (values != key) & ~np.isnan(values),
+            '<': values < key,
+            '<=': values <= key,
+            '>': values > key,
+            '>=': values >= key,
+        }[condition.op]
+
+def run(index, conditions):
+    """
+    Find the sets meeting all conditions
+
+    Args:
+        index (dict): Index from build_index
+        conditions (list): Conditions from parse
+
+    Returns:
+        np.ndarray: Row positions of the matching sets, newest first
+    """
+    missing = [condition.field for condition in conditions if condition.column not in index]
+    if missing:
+        return np.array([], dtype=np.int64)
+
+    # The condition matching the fewest rows is read from its index, the others filter its rows
+    ranges = [_ranges(index[condition.column], condition) for condition in conditions]
+    sizes = [sum(stop - start for start, stop in condition_ranges) for condition_ranges in ranges]
+    first = int(np.argmin(sizes))
+    order = index[conditions[first].column]["order"]
+    rows = np.concatenate([order[start:stop] for start, stop in ranges[first]] or [np.array([], dtype=np.int64)])
+    rows = np.sort(rows)
+
+    for i, condition in enumerate(conditions):
+        if i != first and len(rows):
+            rows = rows[_mask(index[condition.column], condition, rows)]
+    return rows[::-1]
+
+def result_page(df, rows, page, page_size=PAGE_SIZE):
+    """
+    Get one page of a query result as a table
+
+    Args:
+        df (pd.DataFrame): Set-level workout data the index was built from
+        rows (np.ndarray): Row positions from run
+        page (int): Page number, 0 for the newest sets
+        page_size (int): Sets per page
+
+    Returns:
+        pd.DataFrame: The sets of the page, columns named as in RESULT_COLUMNS
+    """
+    page_rows = df.iloc[rows[page * page_size:(page + 1) * page_size]]
+    table = page_rows[[column for column in RESULT_COLUMNS if column in page_rows.columns]].rename(columns=RESULT_COLUMNS)
+    if 'Set' in table:
+        table['Set'] = table['Set'] + 1
+    return table
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Personal Records
+
+Vectorized estimated-1RM and personal record detection over the set-level
+workout DataFrame. Records are found with cumulative maxima per exercise group,
+so the whole history is processed in a handful of column-wise passes, and a new
+batch of workouts can be folded into existing records without a full rescan.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Hevy estimates 1RM with the Brzycki formula, Epley is provided as an alternative
+DEFAULT_FORMULA = "brzycki"
+
+# Set types that never count towards a personal record
+EXCLUDED_SET_TYPES = ["warmup"]
+
+# Record types tracked per exercise, mapped to the set column they maximise
+RECORD_COLUMNS = {
+    "weight": "weight_kg",
+    "e1rm": "e1rm",
+    "volume": "set_volume",
+    "reps": "reps",
+}
+
+# Record types returned by Hevy's set_personal_records endpoint
+HEVY_RECORD_TYPES = {
+    "best_weight": "weight",
+    "best_1rm": "e1rm",
+    "best_volume": "volume",
+    "most_reps": "reps",
+}
+
+def estimate_1rm(weight, reps, formula=DEFAULT_FORMULA):
+    """
+    Estimate the one rep max for arrays of weights and reps
+
+    Args:
+        weight (array-like): Weight lifted in kg
+        reps (array-like): Repetitions performed
+        formula (str): "brzycki" or "epley"
+
+    Returns:
+        np.ndarray: Estimated 1RM in kg, NaN where it cannot be estimated
+    """
+    weight = np.asarray(weight, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if formula == "epley":
+            e1rm = weight * (1 + reps / 30)
+        elif formula == "brzycki":
+            e1rm = weight * 36 / (37 - reps)
+        else:
+            raise ValueError(f"Unknown 1RM formula: {formula}")
+
+    # A single rep is the 1RM itself, and Brzycki is undefined from 37 reps on
+    e1rm = np.where(reps == 1, weight, e1rm)
+    return np.where((reps >= 1) & (reps < 37) & (weight > 0), e1rm, np.nan)
+
+def working_sets(df, formula=DEFAULT_FORMULA):
+    """
+    Select the sets eligible for records and add the per-set record metrics
+
+    Args:
+        df (pd.DataFrame): Set-level workout data from load_workout_data
+        formula (str): 1RM formula passed to estimate_1rm
+
+    Returns:
+        pd.DataFrame: Eligible sets in chronological order with exercise_key, e1rm and set_volume columns
+    """
+    mask = (~df['set_type'].isin(EXCLUDED_SET_TYPES)) & df['reps'].notna() & (df['reps'] > 0)
+    columns = ['workout_id', 'start_time', 'workout_date', 'exercise_title', 'set_index', 'weight_kg', 'reps']
+    sets = df.loc[mask, columns + ['exercise_template_id']].copy()
+
+    # Key records by template ID like Hevy does, falling back to the title for older exports
+    sets['exercise_key'] = sets['exercise_template_id'].fillna(sets['exercise_title'])
+    sets['e1rm'] = estimate_1rm(sets['weight_kg'], sets['reps'], formula)
+    sets['set_volume'] = sets['weight_kg'] * sets['reps']
+
+    # Stable sort keeps the exercise/set order of sets logged in the same workout
+    return sets.sort_values('start_time', kind='stable')
+
+def _empty_state(formula):
+    bests = pd.DataFrame(columns=list(RECORD_COLUMNS), dtype=float)
+    rep_bests = pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], []], names=['exercise_key', 'reps']))
+    return {"formula": formula, "bests": bests, "rep_bests": rep_bests, "last_start_time": None}
+
+def _flag_records(values, keys, prior):
+    """
+    Flag values that beat every earlier value of their group and the prior best
+
+    Args:
+        values (pd.Series): Values in chronological order
+        keys (list): Group key Series aligned with values
+        prior (pd.Series): Best value per group before these values, indexed like the group keys
+
+    Returns:
+        tuple: (is_record, group_best) - Boolean array and the new best value per group
+    """
+    running = values.groupby(keys, sort=False).cummax()
+    previous = running.groupby(keys, sort=False).shift(1).to_numpy(dtype=float)
+
+    if len(prior):
+        if len(keys) == 1:
+            lookup = pd.Index(keys[0])
+        else:
+            lookup = pd.MultiIndex.from_arrays(keys)
+        previous = np.fmax(previous, prior.reindex(lookup).to_numpy(dtype=float))
+
+    current = values.to_numpy(dtype=float)
+    is_record = ~np.isnan(current) & (np.isnan(previous) | (current > previous))
+
+    group_best = values.groupby(keys, sort=False).max()
+    if len(prior):
+        group_best = pd.concat([prior, group_best]).groupby(level=list(range(len(keys)))).max()
+    return is_record, group_best
+
+def update_personal_records(state, df):
+    """
+    Detect personal records in new sets and fold them into existing records
+
+    Args:
+        state (dict): Records state from a previous call, or None to start from scratch
+        df (pd.DataFrame): Set-level data of the new workouts, all newer than the state
+
+    Returns:
+        tuple: (set_records, state) - Eligible sets with an is_<type>_pr flag per record type
+        and is_rep_pr for best weight at a rep count, plus the updated records state
+    """
+    formula = state["formula"] if state else DEFAULT_FORMULA
+    if state is None:
+        state = _empty_state(formula)
+
+    sets = working_sets(df, formula)
+    keys = [sets['exercise_key']]
+
+    bests = {}
+    for record_type, column in RECORD_COLUMNS.items():
+        prior = state["bests"][record_type].dropna()
+        sets[f'is_{record_type}_pr'], bests[record_type] = _flag_records(sets[column], keys, prior)
+
+    # Best weight for each rep count ("rep maxes")
+    sets['is_rep_pr'], rep_bests = _flag_records(
+        sets['weight_kg'], [sets['exercise_key'], sets['reps']], state["rep_bests"])
+    rep_bests.index.names = ['exercise_key', 'reps']
+
+    last_start_time = sets['start_time'].max() if not sets.empty else None
+    if state["last_start_time"] is not None and (last_start_time is None or state["last_start_time"] > last_start_time):
+        last_start_time = state["last_start_time"]
+
+    new_state = {
+        "formula": formula,
+        "bests": pd.DataFrame(bests).reindex(columns=list(RECORD_COLUMNS)),
+        "rep_bests": rep_bests,
+        "last_start_time": last_start_time,
+    }
+    return sets, new_state
+
+def compute_personal_records(df, formula=DEFAULT_FORMULA):
+    """
+    Detect personal records over a whole workout history
+
+    Args:
+        df (pd.DataFrame): Set-level workout data from load_workout_data
+        formula (str): 1RM formula passed to estimate_1rm
+
+    Returns:
+        tuple: (set_records, state) - See update_personal_records
+    """
+    return update_personal_records(_empty_state(formula), df)
+
+def personal_records_summary(set_records):
+    """
+    Summarise the current best of every record type per exercise
+
+    Args:
+        set_records (pd.DataFrame): Flagged sets from compute_personal_records
+
+    Returns:
+        pd.DataFrame: One row per exercise with the best value and its date for each record type
+    """
+    if set_records.empty:
+        return pd.DataFrame()
+
+    summary = set_records.groupby('exercise_key', sort=False)[['exercise_title']].last()
+    for record_type, column in RECORD_COLUMNS.items():
+        # The stable sort keeps sets chronological among ties, so the first row per
+        # exercise is the set that set the record
+        best = (set_records[['exercise_key', column, 'workout_date']]
+                .dropna(subset=[column])
+                .sort_values(column, ascending=False, kind='stable')
+                .drop_duplicates('exercise_key')
+                .set_index('exercise_key'))
+        summary[record_type] = best[column]
+        summary[f'{record_type}_date'] = best['workout_date']
+    return summary.sort_values('e1rm', ascending=False)
+
+def rep_max_table(set_records, max_reps=12):
+    """
+    Build a table of the best weight lifted for every rep count per exercise
+
+    Args:
+        set_records (pd.DataFrame): Flagged sets from compute_personal_records
+        max_reps (int): Highest rep count to include as a column
+
+    Returns:
+        pd.DataFrame: Exercises as rows, rep counts as columns, best weight as values
+    """
+    sets = set_records[set_records['reps'] <= max_reps]
+    table = sets.pivot_table(index='exercise_title', columns='reps', values='weight_kg', aggfunc='max')
+    table.columns = [f"{int(reps)}RM" for reps in table.columns]
+    return table
+
+def compare_with_hevy(state, hevy_records):
+    """
+    Compare computed records with the ones returned by Hevy's set_personal_records endpoint
+
+    Args:
+        state (dict): Records state from compute_personal_records
+        hevy_records (list): Records from Hevy, dicts with exercise_template_id, type and value
+
+    Returns:
+        pd.DataFrame: One row per Hevy record with the computed value and whether they agree
+    """
+    rows = [
+        {
+            'exercise_key': record.get('exercise_template_id'),
+            'record_type': HEVY_RECORD_TYPES[record.get('type')],
+            'hevy_value': record.get('value'),
+        }
+        for record in hevy_records
+        if record.get('type') in HEVY_RECORD_TYPES
+    ]
+    comparison = pd.DataFrame(rows, columns=['exercise_key', 'record_type', 'hevy_value'])
+    if comparison.empty:
+        comparison['computed_value'] = []
+        comparison['match'] = []
+        return comparison
+
+    computed = state["bests"].stack()
+    computed.index.names = ['exercise_key', 'record_type']
+    lookup = pd.MultiIndex.from_frame(comparison[['exercise_key', 'record_type']])
+    comparison['computed_value'] = computed.reindex(lookup).to_numpy(dtype=float)
+
+    # Hevy rounds weights to one decimal place
+    comparison['match'] = np.isclose(comparison['hevy_value'].astype(float), comparison['computed_value'], atol=0.05)
+    return comparison
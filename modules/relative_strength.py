@@ -0,0 +1,81 @@
+"""
+Relative Strength
+
+Strength relative to bodyweight. Every set is aligned with the most recent
+bodyweight measurement taken at or before it through one sorted as-of join over
+the whole history, so relative metrics for every exercise come out of a single
+vectorized pass.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+def bodyweight_history(measurements):
+    """
+    Extract the bodyweight time series from Hevy body measurements
+
+    Args:
+        measurements (list): Measurements as returned by the body_measurements endpoint
+
+    Returns:
+        pd.DataFrame: measured_at (naive local datetime64) and bodyweight_kg columns, sorted by date
+    """
+    history = pd.DataFrame(measurements or [])
+    if history.empty or 'weight_kg' not in history.columns:
+        return pd.DataFrame({'measured_at': pd.Series(dtype='datetime64[ns]'), 'bodyweight_kg': pd.Series(dtype=float)})
+
+    # Set start times are naive local times (see data.flatten_workouts), measurements are brought to the same clock.
+    # Measurements carry a calendar date, kept as that local day, older ones only their UTC creation time
+    if 'date' in history.columns:
+        measured_at = pd.to_datetime(history['date'], utc=True).dt.tz_localize(None)
+    else:
+        created_at = pd.to_datetime(history['created_at'], utc=True)
+        measured_at = pd.to_datetime([pd.NaT if pd.isna(time) else datetime.fromtimestamp(time.timestamp())
+                                      for time in created_at])
+    history = pd.DataFrame({
+        'measured_at': measured_at,
+        'bodyweight_kg': pd.to_numeric(history['weight_kg'], errors='coerce').to_numpy(),
+    })
+    history = history[(history['bodyweight_kg'] > 0) & history['measured_at'].notna()]
+    return history.sort_values('measured_at', kind='stable', ignore_index=True)
+
+def add_relative_strength(set_records, bodyweight):
+    """
+    Align every set with the latest bodyweight measured at or before it
+
+    Args:
+        set_records (pd.DataFrame): Flagged sets from records.compute_personal_records
+        bodyweight (pd.DataFrame): Bodyweight history from bodyweight_history
+
+    Returns:
+        pd.DataFrame: The sets in chronological order with bodyweight_kg, relative_e1rm and
+        relative_volume columns, NaN for sets logged before the first measurement
+    """
+    sets = set_records.sort_values('start_time', kind='stable')
+    aligned = pd.merge_asof(sets, bodyweight, left_on='start_time', right_on='measured_at', direction='backward')
+    aligned.index = sets.index
+    aligned['relative_e1rm'] = aligned['e1rm'] / aligned['bodyweight_kg']
+    aligned['relative_volume'] = aligned['set_volume'] / aligned['bodyweight_kg']
+    return aligned
+
+def relative_strength_summary(relative_sets):
+    """
+    Summarise the best relative strength per exercise
+
+    Args:
+        relative_sets (pd.DataFrame): Sets from add_relative_strength
+
+    Returns:
+        pd.DataFrame: One row per exercise with the best e1RM / bodyweight, the bodyweight and
+        date it was set at, and the best set volume / bodyweight
+    """
+    rated = relative_sets.dropna(subset=['relative_e1rm'])
+    if rated.empty:
+        return pd.DataFrame()
+
+    best = (rated.sort_values('relative_e1rm', ascending=False, kind='stable')
+            .drop_duplicates('exercise_key')
+            .set_index('exercise_key')[['exercise_title', 'relative_e1rm', 'e1rm', 'bodyweight_kg', 'workout_date']])
+    best['relative_volume'] = rated.groupby('exercise_key')['relative_volume'].max()
+    return best.sort_values('relative_e1rm', ascending=False)
\ No newline at end of file
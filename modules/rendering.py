@@ -0,0 +1,130 @@
+"""
+Rendering
+
+Prepares Plotly figures for the browser. Dense line/marker traces are switched
+to WebGL (Scattergl), the template is pruned to the trace types actually used,
+float arrays are rounded to display precision and sent as float32 typed arrays
+when float32 can hold them at that precision, and day-level dates drop their time part, which keeps the serialized figure
+small for long histories.
+"""
+
+import os
+import time
+
+import numpy as np
+
+# "auto" switches dense traces to WebGL, "webgl" switches every scatter trace, "svg" never does
+RENDER_MODE = os.environ.get("HEVY_RENDER_MODE", "auto")
+RENDER_MODES = ["auto", "svg", "webgl"]
+
+# Scatter traces with more points than this are drawn with WebGL in "auto" mode
+WEBGL_THRESHOLD = 1000
+
+# Decimals kept for float arrays (weights, volumes, loads and ratios are shown with at most 2)
+DISPLAY_DECIMALS = 2
+
+# float32 has a 24-bit significand: below this magnitude its spacing is at most half a unit of 1 / 10**decimals
+FLOAT32_SIGNIFICAND_RANGE = 2 ** 22
+
+# Per-point array attributes that are compacted
+_ARRAY_ATTRIBUTES = ('x', 'y', 'customdata')
+
+def _point_count(trace):
+    values = getattr(trace, 'y', None)
+    if values is None:
+        values = getattr(trace, 'x', None)
+    return 0 if values is None else len(values)
+
+def _as_webgl(trace):
+    import plotly.graph_objects as go
+
+    # Properties Scattergl does not support (cliponaxis, line smoothing, ...) are dropped
+    properties = trace.to_plotly_json()
+    properties.pop('type', None)
+    valid = go.Scattergl()._valid_props
+    properties = {name: value for name, value in properties.items() if name in valid}
+    if isinstance(properties.get('line'), dict):
+        properties['line'].pop('smoothing', None)
+        if properties['line'].get('shape') == 'spline':
+            properties['line']['shape'] = 'linear'
+    return go.Scattergl(**properties)
+
+def _compact_array(values, decimals):
+    if values is None:
+        return values
+    array = np.asarray(values)
+    if array.dtype.kind == 'f':
+        array = np.round(array, decimals)
+        # Large values (weekly tonnage, cumulative volume) would lose their decimals or units in float32
+        finite = np.abs(array[np.isfinite(array)])
+        if finite.size == 0 or finite.max() < FLOAT32_SIGNIFICAND_RANGE / 10 ** decimals:
+            return array.astype(np.float32)
+        return array
+    if array.dtype.kind == 'M':
+        # Day-level dates are sent as "YYYY-MM-DD" instead of full timestamps
+        days = array.astype('datetime64[D]')
+        if (days == array).all():
+            return np.datetime_as_string(days, unit='D')
+    return values
+
+def compact_figure(fig, mode=None, webgl_threshold=WEBGL_THRESHOLD, decimals=DISPLAY_DECIMALS):
+    """
+    Shrink a figure's payload in place before it is sent to the browser
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to compact
+        mode (str, optional): One of RENDER_MODES, defaults to RENDER_MODE
+        webgl_threshold (int): Point count above which "auto" uses WebGL
+        decimals (int): Decimals kept for float arrays
+
+    Returns:
+        plotly.graph_objects.Figure: The same figure
+    """
+    mode = mode or RENDER_MODE
+
+    if mode != "svg":
+        dense = [trace.type == 'scatter' and (mode == "webgl" or _point_count(trace) > webgl_threshold)
+                 for trace in fig.data]
+        if any(dense):
+            # Plotly only allows reordering fig.data in place, so the traces are swapped by rebuilding it
+            traces = [_as_webgl(trace) if is_dense else trace for trace, is_dense in zip(fig.data, dense)]
+            fig.data = []
+            fig.add_traces(traces)
+
+    for trace in fig.data:
+        for attribute in _ARRAY_ATTRIBUTES:
+            if attribute in trace:
+                trace[attribute] = _compact_array(trace[attribute], decimals)
+
+    # The default template carries styling for every Plotly trace type, keep only the ones in use
+    used_types = {trace.type for trace in fig.data}
+    template_data = fig.layout.template.data
+    for trace_type in list(template_data.to_plotly_json()):
+        if trace_type not in used_types:
+            template_data[trace_type] = None
+
+    return fig
+
+def measure_figure(fig):
+    """
+    Measure the serialized size of a figure and the time to serialize it
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to measure
+
+    Returns:
+        dict: {"bytes": size of the JSON sent to the browser, "seconds": serialization time,
+        "points": number of points over all traces, "webgl_traces": number of Scattergl traces}
+    """
+    import plotly.io as pio
+
+    start = time.perf_counter()
+    # Streamlit serializes figures the same way in st.plotly_chart
+    spec = pio.to_json(fig, validate=False)
+    seconds = time.perf_counter() - start
+    return {
+        "bytes": len(spec.encode('utf-8')),
+        "seconds": seconds,
+        "points": sum(_point_count(trace) for trace in fig.data),
+        "webgl_traces": sum(trace.type == 'scattergl' for trace in fig.data),
+    }
\ No newline at end of file
@@ -0,0 +1,316 @@
+"""
+Reports
+
+Headless batch mode writing a static HTML report per account, without
+Streamlit. Each history goes through the same flattening, aggregation and chart
+builders as the app - the pure builders behind the cached data.load_* wrappers -
+and accounts are spread over a process pool, so hundreds of histories are
+reported in parallel. plotly.js is written once next to the reports instead of
+being inlined in each of them.
+
+Histories are exported JSON files ({workout_id: workout}, a list of workouts, or
+{"workouts": ..., "routines": ...}) or sync journal folders (user_* folders of
+HEVY_JOURNAL_DIR), one account each.
+
+Usage:
+    python -m modules.reports OUTPUT_DIR HISTORY [HISTORY ...] [--workers N] [--days N]
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import html
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Script tag source of plotly.js, written once to the output folder
+PLOTLY_JS_FILE = "plotly.min.js"
+
+# Exercises with an estimated 1RM chart in the report
+TOP_EXERCISES = 3
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{ font-family: sans-serif; margin: 2rem auto; max-width: 1100px; color: #262730; }}
+h1, h2 {{ color: #1E88E5; }}
+table {{ border-collapse: collapse; font-size: 0.9rem; }}
+th, td {{ border: 1px solid #ddd; padding: 0.3rem 0.6rem; text-align: right; }}
+.metrics td {{ text-align: left; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>{period}</p>
+{body}
+</body>
+</html>"""
+
+def find_histories(paths):
+    """
+    Expand the given paths into one history source per account
+
+    Args:
+        paths (list): JSON exports, journal user folders, or folders containing either
+
+    Returns:
+        list: Paths of the JSON exports and journal user folders
+    """
+    from modules import journal
+
+    sources = []
+    for path in paths:
+        if os.path.isfile(path) or _is_journal_folder(path, journal):
+            sources.append(path)
+        elif os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                child = os.path.join(path, name)
+                if (os.path.isfile(child) and name.endswith('.json')) or _is_journal_folder(child, journal):
+                    sources.append(child)
+        else:
+            logger.warning("no history at %s", path)
+    return sources
+
+def _is_journal_folder(path, journal):
+    return os.path.isdir(path) and any(
+        os.path.exists(os.path.join(path, name)) for name in (journal.SNAPSHOT_FILE, journal.JOURNAL_FILE))
+
+def load_history(source):
+    """
+    Read the workouts and routines of one account
+
+    Args:
+        source (str): JSON export or journal user folder
+
+    Returns:
+        tuple: (account name, {workout_id: workout}, {routine_id: routine})
+    """
+    from modules import journal
+
+    account = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+    if os.path.isdir(source):
+        state = journal.read_state(source)
+        return account, state["workouts"], state["routines"]
+
+    with open(source, 'r') as f:
+        history = json.load(f)
+    if isinstance(history, list):
+        return account, {workout['id']: workout for workout in history}, {}
+    if "workouts" in history and isinstance(history["workouts"], (dict, list)):
+        workouts = history["workouts"]
+        if isinstance(workouts, list):
+            workouts = {workout['id']: workout for workout in workouts}
+        return account, workouts, history.get("routines") or {}
+    return account, history, {}
+
+def _chart(fig):
+    from modules import rendering
+
+    return rendering.compact_figure(fig).to_html(full_html=False, include_plotlyjs=False)
+
+def _section(title, parts):
+    parts = [part for part in parts if part]
+    return f"<h2>{html.escape(title)}</h2>\n" + "\n".join(parts) if parts else ""
+
+def _table(frame):
+    return frame.to_html(float_format=lambda value: f"{value:,.1f}", na_rep="-", border=0)
+
+def build_report(df, routines=None, days=None):
+    """
+    Build the HTML sections of a report
+
+    Args:
+        df (pd.DataFrame): Set-level workout data from data.flatten_workouts
+        routines (dict, optional): {routine_id: routine} for the adherence section
+        days (int, optional): Only report the last days of the history, the training
+            load and personal records still use the whole history
+
+    Returns:
+        tuple: (period description, HTML body)
+    """
+    import pandas as pd
+    from modules import (adherence, cube, data, muscle_attribution, records, training_load,
+                         visualization)
+
+    max_date = df['start_time'].max().date()
+    min_date = df['start_time'].min().date()
+    start_date = max(min_date, max_date - datetime.timedelta(days=days - 1)) if days else min_date
+    date_range = [start_date, max_date]
+
+    filtered_df = data.filter_data(df, date_range)
+    workout_cube = cube.build_cube(df)
+    cells = cube.filter_cube(workout_cube, date_range)
+    workouts = cube.filter_workouts(workout_cube, date_range)
+    incidence = muscle_attribution.build_muscle_incidence(df)
+    set_records, _ = records.compute_personal_records(df)
+
+    metrics = pd.DataFrame({"": [
+        len(workouts),
+        cells['exercise_title'].nunique(),
+        f"{workouts['workout_duration'].mean():.0f} min",
+        f"{cells['volume'].sum():,.0f} kg",
+    ]}, index=["Workouts", "Exercises", "Average duration", "Total volume"])
+    sections = [metrics.to_html(header=False, border=0, classes="metrics")]
+
+    sections.append(_section("Overview", [
+        _chart(visualization.create_workout_frequency_chart(workouts)),
+        _chart(visualization.create_workout_duration_chart(workouts[['workout_date', 'workout_duration', 'title']])),
+        _chart(visualization.create_workout_type_pie_chart(cells)),
+    ]))
+
+    rpe_fig = visualization.create_exercise_rpe_chart(filtered_df)
+    sections.append(_section("Exercises", [
+        _chart(visualization.create_exercise_frequency_chart(cells)),
+        _chart(visualization.create_exercise_volume_chart(cells)),
+        _chart(rpe_fig) if rpe_fig else None,
+    ]))
+
+    # Estimated 1RM of the most trained exercises of the period
+    period_records = set_records[set_records['workout_id'].isin(filtered_df['workout_id'].unique())]
+    top_exercises = period_records['exercise_title'].value_counts().index[:TOP_EXERCISES]
+    e1rm_figs = [visualization.create_e1rm_chart(period_records[period_records['exercise_title'] == exercise])
+                 for exercise in top_exercises]
+    pr_summary = records.personal_records_summary(set_records)
+    sections.append(_section("Personal Records", [_chart(fig) for fig in e1rm_figs if fig] + [
+        _table(pr_summary.set_index('exercise_title')[['weight', 'e1rm', 'volume', 'reps']]) if not pr_summary.empty else None,
+    ]))
+
+    sections.append(_section("Muscles and Equipment", [
+        _chart(visualization.create_muscle_volume_chart(cells, incidence, muscle_attribution.DEFAULT_SECONDARY_WEIGHT, cells=True)),
+        _chart(visualization.create_muscle_balance_chart(cells, incidence, muscle_attribution.DEFAULT_SECONDARY_WEIGHT, cells=True)),
+        _chart(visualization.create_equipment_volume_chart(cells)),
+    ]))
+
+    load = training_load.build_training_load(df)
+    load_df = training_load.training_load_range(load, training_load.OVERALL, start_date, max_date)
+    sections.append(_section("Training Load", [
+        _chart(visualization.create_acwr_chart(load_df, training_load.ACWR_SWEET_SPOT)),
+        _chart(visualization.create_weekly_tonnage_chart(
+            training_load.weekly_tonnage(load, training_load.OVERALL, start_date, max_date))),
+        _chart(visualization.create_monotony_chart(load_df)),
+    ]))
+
+    planned = adherence.flatten_routines(routines)
+    if not planned.empty:
+        exercise_adherence = adherence.build_adherence(df, planned)
+        exercise_adherence = exercise_adherence[exercise_adherence['workout_id'].isin(filtered_df['workout_id'].unique())]
+        if not exercise_adherence.empty:
+            workout_summary = adherence.workout_adherence(exercise_adherence)
+            routine_summary = adherence.routine_adherence(exercise_adherence, planned)
+            sections.append(_section("Routine Adherence", [
+                _chart(visualization.create_adherence_chart(workout_summary, routine_summary)),
+                _table(routine_summary[['routine_title', 'workouts', 'set_completion', 'skipped_exercises']]),
+            ]))
+
+    period = f"{start_date:%d %b %Y} to {max_date:%d %b %Y}"
+    return period, "\n".join(section for section in sections if section)
+
+def write_report(source, output_dir, days=None):
+    """
+    Write the report of one account, runs in the pool's worker processes
+
+    Args:
+        source (str): JSON export or journal user folder
+        output_dir (str): Folder receiving <account>.html
+        days (int, optional): See build_report
+
+    Returns:
+        dict: {"source", "account", "path" (None if there was nothing to report), "workouts",
+        "seconds", "error" (None on success)}
+    """
+    from modules import data
+
+    start = time.perf_counter()
+    result = {"source": source, "account": None, "path": None, "workouts": 0, "seconds": 0.0, "error": None}
+    try:
+        account, workouts, routines = load_history(source)
+        result["account"] = account
+        result["workouts"] = len(workouts)
+        df = data.flatten_workouts(workouts)
+        if not df.empty:
+            period, body = build_report(df, routines, days)
+            path = os.path.join(output_dir, re.sub(r'[^\w.-]', '_', account) + ".html")
+            with open(path, 'w') as f:
+                f.write(REPORT_TEMPLATE.format(title=html.escape(f"Training report: {account}"),
+                                               period=period, plotly_js=PLOTLY_JS_FILE, body=body))
+            result["path"] = path
+    except Exception as e:
+        logger.exception("report failed for %s", source)
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def _configure_logging():
+    # Also the initializer of the worker processes, which do not inherit the logging setup when spawned
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s %(message)s")
+    # Each cached loader of modules.data warns that there is no Streamlit runtime, reports do not use them
+    import streamlit  # noqa: F401 (sets up the streamlit loggers before they are quietened)
+    logging.getLogger("streamlit.runtime.caching.cache_data_api").setLevel(logging.ERROR)
+
+def generate_reports(sources, output_dir, workers=None, days=None):
+    """
+    Write the reports of many accounts in parallel
+
+    Args:
+        sources (list): History sources from find_histories
+        output_dir (str): Folder receiving the reports and plotly.js
+        workers (int, optional): Worker processes, defaults to the number of CPUs
+        days (int, optional): See build_report
+
+    Yields:
+        dict: Result of write_report for each account, in completion order
+    """
+    from plotly.offline import get_plotlyjs
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, PLOTLY_JS_FILE), 'w') as f:
+        f.write(get_plotlyjs())
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_configure_logging) as executor:
+        futures = [executor.submit(write_report, source, output_dir, days) for source in sources]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Args:
+        argv (list, optional): Arguments, defaults to sys.argv[1:]
+
+    Returns:
+        int: Exit status, 1 if any report failed
+    """
+    parser = argparse.ArgumentParser(description="Write static HTML training reports for many accounts.")
+    parser.add_argument("output_dir", help="folder receiving the reports")
+    parser.add_argument("histories", nargs="+", help="JSON exports, journal user folders, or folders containing them")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--days", type=int, default=None, help="only report the last DAYS days of each history")
+    args = parser.parse_args(argv)
+
+    _configure_logging()
+    sources = find_histories(args.histories)
+    start = time.perf_counter()
+    failed = 0
+    for result in generate_reports(sources, args.output_dir, args.workers, args.days):
+        if result["error"]:
+            failed += 1
+            print(f"FAILED  {result['source']}: {result['error']}")
+        elif result["path"]:
+            print(f"{result['seconds']:6.2f}s  {result['workouts']:>5} workouts  {result['path']}")
+        else:
+            print(f"  skip  {result['source']}: no workouts")
+    print(f"{len(sources)} histories, {failed} failed, {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
\ No newline at end of file
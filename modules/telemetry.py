@@ -0,0 +1,251 @@
+"""
+Telemetry
+
+Request metrics and structured logs for the Hevy API layer. Every request made
+through a session from session() is counted per endpoint with its status code,
+bytes on the wire and decoded, and latency (as a histogram). Syncs wrapped in
+sync_span() get a summary of the requests, bytes and items they moved. Metrics
+are logged as JSON lines on the "modules.telemetry" logger and written to
+METRICS_FILE after every sync, when one is configured.
+"""
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# JSON snapshot of the metrics, rewritten after every sync (only when a path is configured)
+METRICS_FILE = os.environ.get("HEVY_METRICS_FILE", "")
+
+# Log level of the modules.* loggers
+LOG_LEVEL = os.environ.get("HEVY_LOG_LEVEL", "INFO")
+
+# Upper bounds of the latency histogram buckets in milliseconds, plus an overflow bucket
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Number of sync summaries kept
+SYNC_HISTORY = 20
+
+# Host of the API, whose endpoints are named by their path only (see hevy_api.API_BASE)
+API_HOST = urlsplit(os.environ.get("HEVY_API_BASE", "https://api.hevyapp.com")).hostname
+
+_lock = threading.Lock()
+_endpoints = {}
+_counters = {}
+_syncs = []
+# Sync in progress in the current thread, see sync_span
+_local = threading.local()
+
+def configure_logging():
+    """
+    Send the modules.* loggers to stderr at LOG_LEVEL, once per process
+    """
+    package_logger = logging.getLogger("modules")
+    if package_logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    package_logger.addHandler(handler)
+    package_logger.setLevel(LOG_LEVEL)
+    package_logger.propagate = False
+
+def endpoint_name(url):
+    """
+    Get the endpoint of a URL with IDs and indexes replaced by {id}
+
+    Args:
+        url (str): Request URL
+
+    Returns:
+        str: e.g. "/workouts_batch/{id}", prefixed with the host for hosts other than the API
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    path = '/' + '/'.join('{id}' if re.search(r'\d', segment) else segment for segment in segments)
+    return path if parts.hostname == API_HOST else f"{parts.hostname}{path}"
+
+def _new_stats():
+    return {
+        "requests": 0,
+        "status": {},
+        "bytes_wire": 0,
+        "bytes_decoded": 0,
+        "latency_ms_total": 0.0,
+        "latency_ms_buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+    }
+
+def _bucket(latency_ms):
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+def record_response(response, *args, **kwargs):
+    """
+    requests response hook recording a request's metrics
+
+    Args:
+        response (requests.Response): The response, before its body was read
+        **kwargs: Send arguments, stream=True responses are measured from their headers only
+    """
+    latency_ms = response.elapsed.total_seconds() * 1000
+    content_length = int(response.headers.get('Content-Length', 0) or 0)
+    if kwargs.get('stream'):
+        # The caller reads the body itself, only its announced size is known
+        bytes_decoded = bytes_wire = content_length
+    else:
+        bytes_decoded = len(response.content)
+        # urllib3 counts the (possibly gzip compressed) bytes read from the connection
+        bytes_wire = response.raw.tell() if hasattr(response.raw, 'tell') else content_length
+    endpoint = endpoint_name(response.request.url)
+    status = str(response.status_code)
+
+    with _lock:
+        stats = _endpoints.setdefault(endpoint, _new_stats())
+        stats["requests"] += 1
+        stats["status"][status] = stats["status"].get(status, 0) + 1
+        stats["bytes_wire"] += bytes_wire
+        stats["bytes_decoded"] += bytes_decoded
+        stats["latency_ms_total"] += latency_ms
+        stats["latency_ms_buckets"][_bucket(latency_ms)] += 1
+
+        span = getattr(_local, 'span', None)
+        if span is not None:
+            span["requests"] += 1
+            span["bytes_wire"] += bytes_wire
+            span["bytes_decoded"] += bytes_decoded
+            if response.status_code >= 400:
+                span["errors"] += 1
+
+    logger.debug(json.dumps({
+        "event": "request", "method": response.request.method, "endpoint": endpoint, "status": response.status_code,
+        "latency_ms": round(latency_ms, 1), "bytes_wire": bytes_wire, "bytes_decoded": bytes_decoded,
+    }))
+    return response
+
+def session():
+    """
+    Create a requests session whose requests are recorded
+
+    Returns:
+        requests.Session: Session with the telemetry response hook
+    """
+    import requests
+
+    s = requests.Session()
+    s.hooks['response'].append(record_response)
+    return s
+
+def count(name, n=1):
+    """
+    Increment a named counter, e.g. the number of workouts stored by a sync
+
+    Args:
+        name (str): Counter name
+        n (int): Increment
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+        span = getattr(_local, 'span', None)
+        if span is not None:
+            span["items"][name] = span["items"].get(name, 0) + n
+
+def propagate(func):
+    """
+    Wrap a function so that, run in a worker thread, it counts towards the current thread's sync
+
+    Args:
+        func (callable): Function submitted to a thread pool
+
+    Returns:
+        callable: The wrapped function
+    """
+    span = getattr(_local, 'span', None)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = getattr(_local, 'span', None)
+        _local.span = span
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.span = previous
+    return wrapper
+
+@contextlib.contextmanager
+def sync_span(name):
+    """
+    Summarise the requests made and items counted in the current thread while a sync runs
+
+    The summary is logged, kept in the sync history and written to METRICS_FILE.
+
+    Args:
+        name (str): Name of the sync
+
+    Yields:
+        dict: The summary, callers may set its "status"
+    """
+    summary = {
+        "event": "sync", "sync": name, "started_at": time.time(), "status": "ok",
+        "requests": 0, "errors": 0, "bytes_wire": 0, "bytes_decoded": 0, "items": {},
+    }
+    previous = getattr(_local, 'span', None)
+    _local.span = summary
+    start = time.perf_counter()
+    try:
+        yield summary
+    except Exception:
+        summary["status"] = "exception"
+        raise
+    finally:
+        _local.span = previous
+        summary["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        with _lock:
+            _syncs.append(summary)
+            del _syncs[:-SYNC_HISTORY]
+        logger.info(json.dumps(summary))
+        write_metrics()
+
+def snapshot():
+    """
+    Get a copy of the current metrics
+
+    Returns:
+        dict: {"endpoints": {endpoint: stats}, "counters": {name: count}, "syncs": [summaries],
+        "latency_buckets_ms": bucket upper bounds}
+    """
+    with _lock:
+        return json.loads(json.dumps({
+            "updated_at": time.time(),
+            "latency_buckets_ms": LATENCY_BUCKETS_MS,
+            "endpoints": _endpoints,
+            "counters": _counters,
+            "syncs": _syncs,
+        }))
+
+def write_metrics(path=None):
+    """
+    Write the metrics snapshot as JSON, replacing the previous file atomically
+
+    Args:
+        path (str, optional): Target file, defaults to METRICS_FILE
+    """
+    path = path or METRICS_FILE
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Sessions may sync concurrently, each writes its own temporary file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot(), f, indent=1)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("could not write metrics to %s: %s", path, e)
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Training Load
+
+Bins training volume into dense per-day NumPy arrays (days x muscle groups) and
+precomputes acute/chronic workload, ACWR, weekly tonnage, training monotony and
+strain for every muscle group and overall. Any date range is then served by
+slicing the precomputed arrays instead of regrouping the set-level data.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Window lengths in days
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# Column name used for the load summed over all muscle groups
+OVERALL = "overall"
+
+# ACWR range usually considered a safe progression
+ACWR_SWEET_SPOT = (0.8, 1.3)
+
+def _ewma(x, span):
+    """
+    Exponentially weighted moving average along the first axis, starting from zero
+
+    The recursion y[t] = a * x[t] + (1 - a) * y[t-1] is evaluated in closed form
+    over blocks of days, short enough for the (1 - a)^-t weights to stay finite,
+    carrying the last value from one block to the next.
+    """
+    alpha = 2 / (span + 1)
+    decay = 1 - alpha
+    block = max(1, int(50 / -np.log(decay)))
+
+    out = np.empty_like(x)
+    previous = np.zeros(x.shape[1:])
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        t = np.arange(len(chunk)).reshape((-1,) + (1,) * (x.ndim - 1))
+        weighted = np.cumsum(chunk * decay ** -t, axis=0)
+        out[start:start + block] = decay ** (t + 1) * previous + alpha * decay ** t * weighted
+        previous = out[start + len(chunk) - 1]
+    return out
+
+def _rolling_sum(x, window):
+    """
+    Trailing window sum along the first axis, computed from a cumulative sum
+    """
+    cumulative = np.cumsum(x, axis=0)
+    out = cumulative.copy()
+    out[window:] -= cumulative[:-window]
+    return out
+
+def build_training_load(df):
+    """
+    Bin volume per day and muscle group and precompute the training load metrics
+
+    Args:
+        df (pd.DataFrame): Set-level workout data from load_workout_data
+
+    Returns:
+        dict: {"dates": datetime64[D] array, "columns": muscle groups plus OVERALL,
+        "metrics": {name: float array of shape (days, columns)}}
+    """
+    volume = df['volume'].fillna(0).to_numpy(dtype=float)
+    days = df['start_time'].to_numpy(dtype='datetime64[D]')
+    first_day = days.min()
+    day_index = (days - first_day).astype(np.int64)
+    n_days = int(day_index.max()) + 1
+
+    muscle_codes, muscles = pd.factorize(df['muscle_group'].fillna('other'), sort=True)
+    n_muscles = len(muscles)
+
+    # One bincount over the flattened (day, muscle) index fills the dense daily array
+    daily = np.bincount(day_index * n_muscles + muscle_codes, weights=volume,
+                        minlength=n_days * n_muscles).reshape(n_days, n_muscles)
+    daily = np.column_stack([daily, daily.sum(axis=1)])
+
+    acute = _ewma(daily, ACUTE_DAYS)
+    chronic = _ewma(daily, CHRONIC_DAYS)
+    weekly = _rolling_sum(daily, ACUTE_DAYS)
+    weekly_squares = _rolling_sum(daily ** 2, ACUTE_DAYS)
+
+    # Monotony is the mean daily load of the last week over its standard deviation
+    mean = weekly / ACUTE_DAYS
+    std = np.sqrt(np.clip(weekly_squares / ACUTE_DAYS - mean ** 2, 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acwr = np.where(chronic > 0, acute / chronic, np.nan)
+        monotony = np.where(std > 0, mean / std, np.nan)
+
+    return {
+        "dates": first_day + np.arange(n_days),
+        "columns": list(muscles) + [OVERALL],
+        "metrics": {
+            "daily_volume": daily,
+            "acute_load": acute,
+            "chronic_load": chronic,
+            "acwr": acwr,
+            "weekly_tonnage": weekly,
+            "chronic_weekly_tonnage": _rolling_sum(daily, CHRONIC_DAYS) * ACUTE_DAYS / CHRONIC_DAYS,
+            "monotony": monotony,
+            "strain": weekly * monotony,
+        },
+    }
+
+def _day_range(load, start_date=None, end_date=None):
+    first_day = load["dates"][0]
+    n_days = len(load["dates"])
+    start = 0 if start_date is None else int((np.datetime64(start_date, 'D') - first_day).astype(np.int64))
+    end = n_days if end_date is None else int((np.datetime64(end_date, 'D') - first_day).astype(np.int64)) + 1
+    return max(start, 0), min(max(end, 0), n_days)
+
+def training_load_range(load, column=OVERALL, start_date=None, end_date=None):
+    """
+    Get the daily training load metrics of one muscle group over a date range
+
+    Args:
+        load (dict): Precomputed load from build_training_load
+        column (str): Muscle group name or OVERALL
+        start_date (datetime.date, optional): First day to include
+        end_date (datetime.date, optional): Last day to include
+
+    Returns:
+        pd.DataFrame: One row per day with a column per metric
+    """
+    start, end = _day_range(load, start_date, end_date)
+    column_index = load["columns"].index(column)
+    return pd.DataFrame(
+        {name: values[start:end, column_index] for name, values in load["metrics"].items()},
+        index=pd.DatetimeIndex(load["dates"][start:end], name='date')
+    )
+
+def weekly_tonnage(load, column=OVERALL, start_date=None, end_date=None):
+    """
+    Get the total volume per ISO week of one muscle group over a date range
+
+    Args:
+        load (dict): Precomputed load from build_training_load
+        column (str): Muscle group name or OVERALL
+        start_date (datetime.date, optional): First day to include
+        end_date (datetime.date, optional): Last day to include
+
+    Returns:
+        pd.Series: Volume per week, indexed by the Monday starting the week
+    """
+    start, end = _day_range(load, start_date, end_date)
+    dates = load["dates"][start:end]
+    if len(dates) == 0:
+        return pd.Series(dtype=float, name='volume')
+
+    # 1970-01-01 was a Thursday, so shifting by 3 days puts week boundaries on Mondays
+    week_of_day = (dates.astype(np.int64) + 3) // 7
+    boundaries = np.flatnonzero(np.diff(week_of_day, prepend=week_of_day[0] - 1))
+    daily = load["metrics"]["daily_volume"][start:end, load["columns"].index(column)]
+    week_starts = ((week_of_day[boundaries] * 7) - 3).astype('datetime64[D]')
+    return pd.Series(np.add.reduceat(daily, boundaries), index=pd.DatetimeIndex(week_starts, name='week'), name='volume')
@@ -1,5 +1,7 @@
 import streamlit as st
 
+from modules import profiling
+
 def set_page_config():
     """
     Set the page configuration for the Streamlit app
@@ -201,7 +203,12 @@ def display_sidebar_help():
     2. **Overview**: See general workout statistics and trends
     3. **Exercise Analysis**: Analyze exercise frequency, volume, and intensity
     4. **Progress Tracking**: Track progress for specific exercises over time
-    5. **Workout Details**: View detailed information for each workout session
+    5. **Workout Details**: Browse your workout history page by page, with the sets of each workout
+    6. **Personal Records**: See your best lifts, estimated 1RMs and rep maxes
+    7. **Training Load**: Monitor acute:chronic workload, weekly tonnage and training monotony
+    8. **Routine Adherence**: Compare your workouts with the routines they were started from
+    9. **Feed**: Browse the workouts of the people you follow and compare your lifts with theirs
+    10. **Query**: Search all your sets with conditions such as `exercise ~ squat and weight > 140`
     """)
 
 def display_summary_metrics(total_workouts, total_exercises, avg_duration, total_volume):
@@ -228,6 +235,33 @@ def display_summary_metrics(total_workouts, total_exercises, avg_duration, total
     with col4:
         st.metric("Total Volume (kg)", f"{total_volume:,.0f}")
 
+def display_chart(fig):
+    """
+    Compact a Plotly figure and display it at full container width
+    
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to display
+    """
+    # Imported on first use, the login page draws no charts
+    from modules import rendering
+
+    with profiling.stage("plotly_chart"):
+        st.plotly_chart(rendering.compact_figure(fig), use_container_width=True)
+
+def date_columns(*columns):
+    """
+    Column configuration showing datetime64 day columns as plain dates
+
+    Dates stay datetime64 through the pipeline and are only formatted here, at display.
+
+    Args:
+        *columns (str): Displayed names of the date columns
+
+    Returns:
+        dict: column_config for st.dataframe
+    """
+    return {column: st.column_config.DateColumn(column, format="YYYY-MM-DD") for column in columns}
+
 def display_footer():
     """
     Display the footer of the app
@@ -1,9 +1,11 @@
 import plotly.express as px
 import plotly.graph_objects as go
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 
+from modules import cube, downsampling, muscle_attribution, profiling
+
+@profiling.profiled
 def create_workout_frequency_chart(workout_days):
     """
     Create a bar chart showing workout frequency by day of week
@@ -28,12 +30,14 @@ def create_workout_frequency_chart(workout_days):
     
     return fig
 
-def create_workout_duration_chart(workout_duration_df):
+@profiling.profiled
+def create_workout_duration_chart(workout_duration_df, max_points=None):
     """
     Create a line chart showing workout duration trend or volume trend
     
     Args:
         workout_duration_df (pd.DataFrame): DataFrame containing workout durations or volumes
+        max_points (int, optional): Points kept per trace, defaults to downsampling.max_points()
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
@@ -61,36 +65,38 @@ def create_workout_duration_chart(workout_duration_df):
     
     fig.update_layout(height=400)
     
-    return fig
+    return downsampling.downsample_figure(fig, max_points)
 
+@profiling.profiled
 def create_workout_type_pie_chart(filtered_df):
     """
     Create a pie chart showing workout type distribution
     
     Args:
-        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data
+        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data or cube cells
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
     """
-    workout_type_counts = filtered_df['title'].value_counts()
+    workout_type_counts = cube.set_counts(filtered_df, 'title')
     fig = px.pie(values=workout_type_counts.values, names=workout_type_counts.index, hole=0.4)
     fig.update_layout(height=400)
     
     return fig
 
+@profiling.profiled
 def create_exercise_frequency_chart(filtered_df, limit=15):
     """
     Create a bar chart showing most common exercises
     
     Args:
-        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data
+        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data or cube cells
         limit (int): Number of exercises to show
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
     """
-    exercise_counts = filtered_df['exercise_title'].value_counts().head(limit)
+    exercise_counts = cube.set_counts(filtered_df, 'exercise_title').head(limit)
     fig = px.bar(x=exercise_counts.index, y=exercise_counts.values,
                 labels={'x': 'Exercise', 'y': 'Count'},
                 color=exercise_counts.values,
@@ -99,12 +105,13 @@ def create_exercise_frequency_chart(filtered_df, limit=15):
     
     return fig
 
+@profiling.profiled
 def create_exercise_volume_chart(filtered_df, limit=15):
     """
     Create a bar chart showing exercise volume by type
     
     Args:
-        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data
+        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data or cube cells
         limit (int): Number of exercises to show
         
     Returns:
@@ -119,6 +126,7 @@ def create_exercise_volume_chart(filtered_df, limit=15):
     
     return fig
 
+@profiling.profiled
 def create_exercise_rpe_chart(filtered_df, limit=15):
     """
     Create a bar chart showing average RPE by exercise
@@ -141,12 +149,14 @@ def create_exercise_rpe_chart(filtered_df, limit=15):
         return fig
     return None
 
-def create_progress_charts(progress_df):
+@profiling.profiled
+def create_progress_charts(progress_df, max_points=None):
     """
     Create progress tracking charts for a specific exercise
     
     Args:
         progress_df (pd.DataFrame): DataFrame containing exercise progress data
+        max_points (int, optional): Points kept per trace, defaults to downsampling.max_points()
         
     Returns:
         tuple: (weight_fig, volume_fig, reps_fig) - Plotly figure objects or None
@@ -168,6 +178,7 @@ def create_progress_charts(progress_df):
                     labels={'workout_date': 'Date', 'weight_kg': 'Max Weight (kg)'},
                     markers=True)
         weight_fig.update_layout(height=400)
+        downsampling.downsample_figure(weight_fig, max_points)
         
         # Volume progression (weight * reps)
         volume_by_date = normal_sets.groupby('workout_date')['volume'].sum().reset_index()
@@ -176,6 +187,7 @@ def create_progress_charts(progress_df):
                     labels={'workout_date': 'Date', 'volume': 'Total Volume (kg)'},
                     markers=True)
         volume_fig.update_layout(height=400)
+        downsampling.downsample_figure(volume_fig, max_points)
         
         # Rep progression
         max_reps_by_date = normal_sets.groupby('workout_date')['reps'].max().reset_index()
@@ -184,20 +196,57 @@ def create_progress_charts(progress_df):
                     labels={'workout_date': 'Date', 'reps': 'Max Reps'},
                     markers=True)
         reps_fig.update_layout(height=400)
+        downsampling.downsample_figure(reps_fig, max_points)
     
     return weight_fig, volume_fig, reps_fig
 
-def create_muscle_volume_chart(filtered_df):
+@profiling.profiled
+def create_e1rm_chart(exercise_records, max_points=None):
+    """
+    Create a line chart of the best estimated 1RM per day, highlighting personal records
+    
+    Args:
+        exercise_records (pd.DataFrame): Flagged sets of a single exercise from records.compute_personal_records
+        max_points (int, optional): Points kept per trace, defaults to downsampling.max_points()
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object or None if no 1RM can be estimated
+    """
+    exercise_records = exercise_records[exercise_records['e1rm'].notna()]
+    if exercise_records.empty:
+        return None
+    
+    e1rm_by_date = exercise_records.groupby('workout_date')['e1rm'].max().reset_index()
+    fig = px.line(e1rm_by_date, x='workout_date', y='e1rm',
+                labels={'workout_date': 'Date', 'e1rm': 'Estimated 1RM (kg)'},
+                markers=True)
+    
+    pr_sets = exercise_records[exercise_records['is_e1rm_pr']]
+    fig.add_trace(go.Scatter(x=pr_sets['workout_date'], y=pr_sets['e1rm'], mode='markers',
+                             name='Personal Record', marker=dict(symbol='star', size=12, color='#FF4B4B')))
+    fig.update_layout(height=400)
+    
+    return downsampling.downsample_figure(fig, max_points)
+
+@profiling.profiled
+def create_muscle_volume_chart(filtered_df, incidence=None, secondary_weight=0.0, cells=False):
     """
     Create a bar chart showing volume by muscle group
     
     Args:
-        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data
+        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data or cube cells
+        incidence (dict, optional): Muscle incidence from muscle_attribution.build_muscle_incidence
+        secondary_weight (float): Share of the volume credited to secondary muscles when incidence is given
+        cells (bool): Whether filtered_df holds cube cells rather than sets
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
     """
-    muscle_volume = filtered_df.groupby('muscle_group')['volume'].sum().sort_values(ascending=False)
+    if incidence is not None:
+        muscle_volume = muscle_attribution.muscle_volume(incidence, filtered_df, secondary_weight, cells=cells)
+        muscle_volume = muscle_volume[muscle_volume > 0].sort_values(ascending=False)
+    else:
+        muscle_volume = filtered_df.groupby('muscle_group')['volume'].sum().sort_values(ascending=False)
     
     # Clean up muscle group names for display
     muscle_volume.index = muscle_volume.index.map(lambda x: x.replace('_', ' ').title())
@@ -210,18 +259,26 @@ def create_muscle_volume_chart(filtered_df):
     
     return fig
 
-def create_muscle_frequency_chart(filtered_df):
+@profiling.profiled
+def create_muscle_frequency_chart(filtered_df, incidence=None, secondary_weight=0.0, cells=False):
     """
     Create a bar chart showing workout frequency by muscle group
     
     Args:
-        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data
+        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data or cube cells
+        incidence (dict, optional): Muscle incidence from muscle_attribution.build_muscle_incidence
+        secondary_weight (float): Secondary muscles count as trained when incidence is given and this is above zero
+        cells (bool): Whether filtered_df holds cube cells rather than sets
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
     """
-    muscle_freq = filtered_df.groupby(['workout_date', 'muscle_group']).size().reset_index(name='count')
-    muscle_count = muscle_freq.groupby('muscle_group').size().sort_values(ascending=False)
+    if incidence is not None:
+        muscle_count = muscle_attribution.muscle_frequency(incidence, filtered_df, secondary_weight > 0, cells=cells)
+        muscle_count = muscle_count[muscle_count > 0].sort_values(ascending=False)
+    else:
+        muscle_freq = filtered_df.groupby(['workout_date', 'muscle_group']).size().reset_index(name='count')
+        muscle_count = muscle_freq.groupby('muscle_group').size().sort_values(ascending=False)
     
     # Clean up muscle group names for display
     muscle_count.index = muscle_count.index.map(lambda x: x.replace('_', ' ').title())
@@ -234,12 +291,16 @@ def create_muscle_frequency_chart(filtered_df):
     
     return fig
 
-def create_muscle_balance_chart(filtered_df):
+@profiling.profiled
+def create_muscle_balance_chart(filtered_df, incidence=None, secondary_weight=0.0, cells=False):
     """
     Create a pie chart showing muscle balance analysis
     
     Args:
-        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data
+        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data or cube cells
+        incidence (dict, optional): Muscle incidence from muscle_attribution.build_muscle_incidence
+        secondary_weight (float): Share of the volume credited to secondary muscles when incidence is given
+        cells (bool): Whether filtered_df holds cube cells rather than sets
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
@@ -254,8 +315,13 @@ def create_muscle_balance_chart(filtered_df):
     
     # Calculate volume for each group
     group_volumes = {}
-    for group, muscles in opposing_pairs.items():
-        group_volumes[group] = filtered_df[filtered_df['muscle_group'].isin(muscles)]['volume'].sum()
+    if incidence is not None:
+        muscle_volume = muscle_attribution.muscle_volume(incidence, filtered_df, secondary_weight, cells=cells)
+        for group, muscles in opposing_pairs.items():
+            group_volumes[group] = muscle_volume.reindex(muscles, fill_value=0).sum()
+    else:
+        for group, muscles in opposing_pairs.items():
+            group_volumes[group] = filtered_df[filtered_df['muscle_group'].isin(muscles)]['volume'].sum()
     
     # Create pie chart for muscle balance
     fig = px.pie(values=list(group_volumes.values()), names=list(group_volumes.keys()),
@@ -265,12 +331,13 @@ def create_muscle_balance_chart(filtered_df):
     
     return fig
 
+@profiling.profiled
 def create_equipment_volume_chart(filtered_df):
     """
     Create a bar chart showing volume by equipment type
     
     Args:
-        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data
+        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data or cube cells
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
@@ -288,12 +355,13 @@ def create_equipment_volume_chart(filtered_df):
     
     return fig
 
+@profiling.profiled
 def create_equipment_exercise_chart(filtered_df):
     """
     Create a bar chart showing exercise count by equipment type
     
     Args:
-        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data
+        filtered_df (pd.DataFrame): Filtered DataFrame containing workout data or cube cells
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
@@ -310,4 +378,166 @@ def create_equipment_exercise_chart(filtered_df):
                 color_continuous_scale='Viridis')
     fig.update_layout(height=500)
     
+    return fig
+
+@profiling.profiled
+def create_acwr_chart(load_df, sweet_spot=(0.8, 1.3), max_points=None):
+    """
+    Create a chart of acute and chronic workload with the acute:chronic workload ratio
+    
+    Args:
+        load_df (pd.DataFrame): Daily training load from training_load.training_load_range
+        sweet_spot (tuple): ACWR range to highlight
+        max_points (int, optional): Points kept per trace, defaults to downsampling.max_points()
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=load_df.index, y=load_df['acute_load'], name='Acute Load (7d)'))
+    fig.add_trace(go.Scatter(x=load_df.index, y=load_df['chronic_load'], name='Chronic Load (28d)'))
+    fig.add_trace(go.Scatter(x=load_df.index, y=load_df['acwr'], name='ACWR', yaxis='y2',
+                             line=dict(dash='dot', color='#FF4B4B')))
+    fig.add_hrect(y0=sweet_spot[0], y1=sweet_spot[1], yref='y2', fillcolor='green', opacity=0.1, line_width=0)
+    fig.update_layout(height=400,
+                      xaxis_title='Date',
+                      yaxis=dict(title='Daily Load (kg)'),
+                      yaxis2=dict(title='ACWR', overlaying='y', side='right', showgrid=False))
+    
+    return downsampling.downsample_figure(fig, max_points)
+
+@profiling.profiled
+def create_weekly_tonnage_chart(weekly_volume):
+    """
+    Create a bar chart of the total volume per week
+    
+    Args:
+        weekly_volume (pd.Series): Volume per week from training_load.weekly_tonnage
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    fig = px.bar(x=weekly_volume.index, y=weekly_volume.values,
+                labels={'x': 'Week', 'y': 'Weekly Tonnage (kg)'},
+                color=weekly_volume.values,
+                color_continuous_scale='Viridis')
+    fig.update_layout(height=400)
+    
+    return fig
+
+@profiling.profiled
+def create_monotony_chart(load_df, max_points=None):
+    """
+    Create a chart of training monotony and strain
+    
+    Args:
+        load_df (pd.DataFrame): Daily training load from training_load.training_load_range
+        max_points (int, optional): Points kept per trace, defaults to downsampling.max_points()
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=load_df.index, y=load_df['strain'], name='Strain'))
+    fig.add_trace(go.Scatter(x=load_df.index, y=load_df['monotony'], name='Monotony', yaxis='y2',
+                             line=dict(dash='dot')))
+    fig.update_layout(height=400,
+                      xaxis_title='Date',
+                      yaxis=dict(title='Strain'),
+                      yaxis2=dict(title='Monotony', overlaying='y', side='right', showgrid=False))
+    
+    return downsampling.downsample_figure(fig, max_points)
+
+@profiling.profiled
+def create_adherence_chart(workout_summary, routine_summary):
+    """
+    Create a chart of the share of planned sets completed in each workout, per routine
+    
+    Args:
+        workout_summary (pd.DataFrame): Per-workout adherence from adherence.workout_adherence
+        routine_summary (pd.DataFrame): Per-routine adherence from adherence.routine_adherence
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    completion = workout_summary.assign(
+        routine=workout_summary['routine_id'].map(routine_summary['routine_title']),
+        set_completion=workout_summary['set_completion'] * 100
+    )
+    fig = px.scatter(completion, x='start_time', y='set_completion', color='routine',
+                labels={'start_time': 'Date', 'set_completion': 'Planned Sets Completed (%)', 'routine': 'Routine'})
+    fig.update_layout(height=400, yaxis_range=[0, 105])
+    
+    return fig
+
+@profiling.profiled
+def create_user_comparison_chart(values, label):
+    """
+    Create a bar chart comparing a metric between users
+    
+    Args:
+        values (pd.Series): Metric value per username
+        label (str): Axis label of the metric
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    fig = px.bar(x=values.index, y=values.values,
+                labels={'x': 'User', 'y': label},
+                color=values.values,
+                color_continuous_scale='Viridis')
+    fig.update_layout(height=400)
+    
+    return fig
+
+@profiling.profiled
+def create_calendar_heatmap(grid, label):
+    """
+    Create a calendar heatmap of a year, one cell per day
+    
+    Args:
+        grid (dict): Weekday x week grid from heatmap.year_grid
+        label (str): Name of the measure
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    from modules import heatmap
+    
+    # Days without training are grey, the days of other years are left out (NaN)
+    fig = go.Figure(go.Heatmap(
+        z=grid['z'], x=grid['weeks'], y=heatmap.WEEKDAYS, customdata=grid['dates'],
+        colorscale=[[0, '#ebedf0'], [0.001, '#c6e48b'], [0.4, '#7bc96f'], [0.7, '#239a3b'], [1, '#196127']],
+        xgap=3, ygap=3, colorbar=dict(title=label, thickness=12),
+        hovertemplate=f"%{{customdata}}<br>{label}: %{{z:,.0f}}<extra></extra>",
+    ))
+    fig.update_layout(height=260, yaxis=dict(autorange='reversed'), xaxis=dict(tickformat='%b', dtick='M1'),
+                      margin=dict(l=0, r=0, t=10, b=0))
+    
+    return fig
+
+def create_profile_waterfall_chart(history):
+    """
+    Create a waterfall of the top-level stages of profiled reruns
+    
+    Args:
+        history (list): Profiled reruns from profiling.finish_run, oldest first
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    rows = [
+        {'run': f"#{i + 1} ({run['total_ms']:.0f} ms)", 'stage': stage['stage'],
+         'start_ms': stage['start_ms'], 'duration_ms': stage['duration_ms']}
+        for i, run in enumerate(history) for stage in run['stages'] if stage['depth'] == 0
+    ]
+    stages = pd.DataFrame(rows, columns=['run', 'stage', 'start_ms', 'duration_ms'])
+    
+    fig = go.Figure()
+    for stage_name, stage_rows in stages.groupby('stage', sort=False):
+        fig.add_trace(go.Bar(y=stage_rows['run'], x=stage_rows['duration_ms'], base=stage_rows['start_ms'],
+                             orientation='h', name=stage_name))
+    fig.update_layout(height=120 + 25 * len(history), barmode='overlay', showlegend=False,
+                      xaxis_title='ms', yaxis=dict(autorange='reversed'), margin=dict(l=0, r=0, t=10, b=0))
+    
     return fig
\ No newline at end of file
@@ -0,0 +1,27 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_workouts
+from modules import data
+
+@pytest.fixture(scope="session")
+def workouts():
+    return make_workouts(120, seed=7)
+
+@pytest.fixture(scope="session")
+def df(workouts):
+    return data.flatten_workouts(workouts)
+
+@pytest.fixture
+def session_state(monkeypatch):
+    # Session storage of one Streamlit session, outside of a script run
+    from modules import client_storage
+
+    state = {}
+    monkeypatch.setattr(client_storage, "st", types.SimpleNamespace(session_state=state, error=print))
+    return state
\ No newline at end of file
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from modules import adherence, data
+
+ROUTINES = {
+    "r1": {"title": "Legs A", "exercises": [
+        {"title": "Squat (Barbell)", "exercise_template_id": "sq", "sets": [
+            {"indicator": "warmup", "weight_kg": 60, "reps": 5},
+            {"weight_kg": 100, "reps": 5}, {"weight_kg": 100, "reps": 5}, {"weight_kg": 100, "reps": 5}]},
+        {"title": "Leg Press (Machine)", "exercise_template_id": "lp", "sets": [
+            {"weight_kg": 150, "rep_range": {"start": 8, "end": 12}}, {"weight_kg": 150, "reps": 10}]},
+    ]},
+}
+
+def _exercise(title, template_id, *sets):
+    return {"title": title, "exercise_template_id": template_id,
+            "sets": [{"weight_kg": weight, "reps": reps} for weight, reps in sets]}
+
+@pytest.fixture
+def workout_df():
+    day = 1709280000
+    workouts = {
+        # Squat cut short, leg press skipped and curls added
+        "w1": {"name": "Legs A", "routine_id": "r1", "start_time": day, "end_time": day + 3600, "exercises": [
+            _exercise("Squat (Barbell)", "sq", (100, 5), (100, 4)),
+            _exercise("Bicep Curl (Dumbbell)", "bc", (15, 10))]},
+        # Everything done, with an extra squat set that does not count above the plan
+        "w2": {"name": "Legs A", "routine_id": "r1", "start_time": day + 86400, "end_time": day + 90000, "exercises": [
+            _exercise("Squat (Barbell)", "sq", (105, 5), (105, 5), (105, 5), (105, 3)),
+            _exercise("Leg Press (Machine)", "lp", (160, 10), (160, 10))]},
+        # Started without a routine
+        "w3": {"name": "Free", "start_time": day + 172800, "end_time": day + 176400, "exercises": [
+            _exercise("Squat (Barbell)", "sq", (100, 5))]},
+    }
+    return data.flatten_workouts(workouts)
+
+def test_flatten_routines_counts_rep_ranges_from_their_bottom():
+    planned = adherence.flatten_routines(ROUTINES)
+    assert len(planned) == 6
+    assert planned.loc[planned['exercise_template_id'] == 'lp', 'reps'].tolist() == [8.0, 10.0]
+
+def test_exercises_are_matched_with_the_plan(workout_df):
+    planned = adherence.flatten_routines(ROUTINES)
+    matched = adherence.build_adherence(workout_df, planned).set_index(['workout_id', 'exercise_template_id'])
+
+    assert set(matched.index.get_level_values('workout_id')) == {"w1", "w2"}
+    assert matched.loc[("w1", "sq"), ['status', 'planned_sets', 'actual_sets']].tolist() == [adherence.STATUS_DONE, 3, 2]
+    assert matched.loc[("w1", "sq"), 'set_completion'] == pytest.approx(2 / 3)
+    assert matched.loc[("w1", "lp"), ['status', 'actual_sets']].tolist() == [adherence.STATUS_SKIPPED, 0]
+    assert matched.loc[("w1", "bc"), ['status', 'exercise_title']].tolist() == [adherence.STATUS_ADDED, "Bicep Curl (Dumbbell)"]
+    assert pd.isna(matched.loc[("w1", "bc"), 'set_completion'])
+    assert matched.loc[("w2", "sq"), 'set_completion'] == 1.0
+
+def test_workout_and_routine_summaries(workout_df):
+    planned = adherence.flatten_routines(ROUTINES)
+    matched = adherence.build_adherence(workout_df, planned)
+
+    per_workout = adherence.workout_adherence(matched)
+    assert per_workout.loc["w1", ['planned_sets', 'completed_sets', 'skipped_exercises', 'added_exercises']].tolist() == [5, 2, 1, 1]
+    assert per_workout.loc["w2", 'set_completion'] == 1.0
+
+    per_routine = adherence.routine_adherence(matched, planned)
+    assert per_routine.loc["r1", ['routine_title', 'workouts']].tolist() == ["Legs A", 2]
+    assert per_routine.loc["r1", 'set_completion'] == pytest.approx((2 / 5 + 1) / 2)
+
+    per_exercise = adherence.exercise_adherence(matched, "r1")
+    assert per_exercise.loc["Squat (Barbell)", 'actual_sets'] == pytest.approx(3)
+    assert per_exercise.loc["Leg Press (Machine)", 'skipped'] == pytest.approx(0.5)
\ No newline at end of file
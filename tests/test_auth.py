@@ -0,0 +1,147 @@
+import datetime
+import io
+import json
+import threading
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from modules import auth, client_storage, journal, telemetry
+
+class StubAdapter(BaseAdapter):
+    # Answers the sync endpoints of the Hevy API, failing the requests listed in fail_at once
+    def __init__(self, n_workouts, fail_at=()):
+        super().__init__()
+        self.workouts = [{"id": f"w{i}", "index": i, "updated_at": "a"} for i in range(n_workouts)]
+        self.fail_at = set(fail_at)
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        endpoint = request.url.split("/")[3]
+        call = request.url.rsplit("/", 1)[1] if endpoint == "workouts_batch" else endpoint
+        self.calls.append(call)
+        if call in self.fail_at:
+            self.fail_at.discard(call)
+            status, body = 503, {}
+        elif endpoint == "workouts_batch":
+            start = int(call)
+            status, body = 200, [workout for workout in self.workouts if start <= workout["index"] < start + 10]
+        else:
+            status, body = 200, {"updated": [], "deleted": [], "isMore": False}
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.request, response.url, response.elapsed = request, request.url, datetime.timedelta(0)
+        return response
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def api(monkeypatch, session_state):
+    def install(adapter):
+        session = telemetry.session
+        monkeypatch.setattr(telemetry, "session", lambda: (lambda s: (s.mount("https://", adapter), s)[1])(session()))
+        return adapter
+
+    monkeypatch.setattr(journal, "JOURNAL_DIR", "")
+    monkeypatch.setattr(auth, "_flights", {})
+    client_storage.store_auth_data("token", "u1")
+    return install
+
+def test_failed_sync_resumes_from_the_session_cursors(api, session_state):
+    adapter = api(StubAdapter(25, fail_at={"20", "routines_sync_batch"}))
+
+    assert auth.sync_data() == (False, "Error syncing workouts: 503")
+    assert adapter.calls == ["0", "10", "20"]
+    assert journal.load_cursors("u1")["download"] == {"index": 20, "last_id": "w19"}
+
+    # The download continues at the failed page, then the sync stops at the routines
+    adapter.calls.clear()
+    assert auth.sync_data() == (False, "Error syncing routines: 503")
+    assert adapter.calls == ["20", "25", "workouts_sync_batch", "routines_sync_batch"]
+    assert journal.load_cursors("u1")["sync"]["stage"] == "routines"
+
+    # Only the routines are left
+    adapter.calls.clear()
+    assert auth.sync_data()[0]
+    assert adapter.calls == ["routines_sync_batch"]
+    assert "sync" not in journal.load_cursors("u1")
+    assert len(client_storage.get_workout_data()) == 25
+
+
+class GatedAdapter(StubAdapter):
+    # Holds every request until the gate opens, so that other sessions ask for a sync meanwhile
+    def __init__(self, n_workouts):
+        super().__init__(n_workouts)
+        self.gate = threading.Event()
+
+    def send(self, request, **kwargs):
+        assert self.gate.wait(timeout=10)
+        return super().send(request, **kwargs)
+
+class SessionsSt:
+    # One session state per thread, as each Streamlit session runs its script in its own thread
+    _local = threading.local()
+
+    @property
+    def session_state(self):
+        if not hasattr(self._local, "state"):
+            self._local.state = {}
+        return self._local.state
+
+    def error(self, message):
+        print(message)
+
+def test_sessions_of_a_user_share_one_sync(api, monkeypatch):
+    adapter = api(GatedAdapter(25))
+    monkeypatch.setattr(client_storage, "st", SessionsSt())
+    results = {}
+
+    def session(name):
+        client_storage.store_auth_data("token", "u1")
+        results[name] = (auth.sync_data(), len(client_storage.get_workout_data()))
+
+    leader = threading.Thread(target=session, args=("leader",))
+    leader.start()
+    while not auth._flights:
+        leader.join(0.01)
+    follower = threading.Thread(target=session, args=("follower",))
+    follower.start()
+    follower.join(0.2)
+    adapter.gate.set()
+    leader.join()
+    follower.join()
+
+    # The follower waited for the leader's sync and took over its data
+    assert adapter.calls == ["0", "10", "20", "25", "workouts_sync_batch", "routines_sync_batch"]
+    assert results["leader"] == results["follower"] == ((True, "All workout data synced successfully!"), 25)
+
+    # Within the cooldown a new session reuses the result, past it the user syncs again
+    adapter.calls.clear()
+    session("cooldown")
+    assert adapter.calls == [] and results["cooldown"][1] == 25
+    auth._flights["u1"]["finished_at"] -= auth.SYNC_COOLDOWN_SECONDS
+    session("after")
+    assert adapter.calls and results["after"][0][0]
+
+def test_waiting_session_gives_up(api, monkeypatch):
+    adapter = api(GatedAdapter(5))
+    monkeypatch.setattr(client_storage, "st", SessionsSt())
+    monkeypatch.setattr(auth, "SYNC_WAIT_SECONDS", 0.05)
+    results = {}
+
+    def session(name):
+        client_storage.store_auth_data("token", "u1")
+        results[name] = auth.sync_data()
+
+    leader = threading.Thread(target=session, args=("leader",))
+    leader.start()
+    while not auth._flights:
+        leader.join(0.01)
+    session("follower")
+    adapter.gate.set()
+    leader.join()
+    assert results["follower"] == (False, "Sync already in progress")
+    assert results["leader"][0]
\ No newline at end of file
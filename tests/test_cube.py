@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import cube, data
+
+@pytest.fixture(scope="module")
+def workout_cube(df):
+    return cube.build_cube(df)
+
+def test_cells_total_the_raw_sets(df, workout_cube):
+    cells = workout_cube["day"]
+    assert cells['set_count'].sum() == len(df)
+    assert cells['volume'].sum() == pytest.approx(df['volume'].sum())
+    assert cells['rep_count'].sum() == pytest.approx(df['reps'].sum())
+
+    by_exercise = cells.groupby('exercise_title').agg(volume=('volume', 'sum'), sets=('set_count', 'sum'),
+                                                      max_weight=('max_weight', 'max'))
+    raw = df.groupby('exercise_title').agg(volume=('volume', 'sum'), sets=('volume', 'size'), max_weight=('weight_kg', 'max'))
+    pd.testing.assert_frame_equal(by_exercise, raw, check_dtype=False)
+
+def test_cells_hold_set_measures_only(workout_cube):
+    # Workout-level columns live in the workout table, never in the cells
+    cells = workout_cube["day"]
+    assert list(cells.columns) == ['workout_date'] + cube.DIMENSIONS + list(cube.MEASURES)
+    assert cells['workout_date'].is_monotonic_increasing
+    assert set(workout_cube) == {"day", "workouts", "workout_exercises"}
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"date_range": [pd.Timestamp("2015-03-01").date(), pd.Timestamp("2015-05-15").date()]},
+    {"workout_types": ["Push", "Legs"]},
+    {"exercises": ["Squat (Barbell)", "Plank"]},
+    {"date_range": [pd.Timestamp("2015-02-01").date(), pd.Timestamp("2015-06-30").date()],
+     "workout_types": ["Pull"], "exercises": ["Bicep Curl (Dumbbell)"]},
+])
+def test_filters_match_filtered_sets(df, workout_cube, filters):
+    sets = data.filter_data(df, **filters)
+    cells = cube.filter_cube(workout_cube, **filters)
+    assert cells['set_count'].sum() == len(sets)
+    assert cells['volume'].sum() == pytest.approx(sets['volume'].sum())
+    pd.testing.assert_series_equal(cube.set_counts(cells, 'muscle_group').sort_index(),
+                                   sets['muscle_group'].value_counts().sort_index(), check_names=False)
+
+    workouts = cube.filter_workouts(workout_cube, **filters)
+    per_workout = sets.groupby('workout_id')['workout_duration'].first()
+    assert sorted(workouts['workout_id']) == sorted(per_workout.index)
+    assert workouts['workout_duration'].mean() == pytest.approx(per_workout.mean(), nan_ok=True)
+
+def test_workouts_are_counted_per_workout_not_per_day(df):
+    # Two workouts on the same day keep their own duration and title
+    second = df[df['workout_id'] == df['workout_id'].iloc[-1]].copy()
+    second['workout_id'] = 'second'
+    second['title'] = 'Evening'
+    second['start_time'] += pd.Timedelta(hours=6)
+    second['workout_duration'] = 15.0
+    same_day = pd.concat([df, second], ignore_index=True)
+
+    workouts = cube.filter_workouts(cube.build_cube(same_day))
+    assert len(workouts) == df['workout_id'].nunique() + 1
+    assert workouts['workout_date'].nunique() == df['workout_date'].nunique()
+    assert workouts.set_index('workout_id').loc['second', ['title', 'workout_duration']].tolist() == ['Evening', 15.0]
+    assert workouts['start_time'].is_monotonic_increasing
+    assert np.isclose(workouts['workout_duration'].mean(), same_day.groupby('workout_id')['workout_duration'].first().mean())
\ No newline at end of file
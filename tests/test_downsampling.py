@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import downsampling
+
+def reference_lttb(x, y, n_out):
+    # Straightforward LTTB, one point at a time
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(n_out - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1 if bucket < n_out - 3 else n - 1
+        next_start, next_end = end, int((bucket + 2) * every) + 1 if bucket < n_out - 4 else n - 1
+        if bucket == n_out - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_x = sum(x[next_start:next_end]) / (next_end - next_start)
+            next_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = start, -1.0
+        for i in range(start, end):
+            area = abs((x[anchor] - next_x) * (y[i] - y[anchor]) - (x[anchor] - x[i]) * (next_y - y[anchor]))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        anchor = best
+    selected.append(n - 1)
+    return selected
+
+@pytest.mark.parametrize("n, n_out", [(50, 7), (1000, 100), (1003, 300), (5000, 1200)])
+def test_matches_reference(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.5, 2.0, n))
+    y = np.cumsum(rng.normal(size=n))
+    assert downsampling.lttb_indices(x, y, n_out).tolist() == reference_lttb(x.tolist(), y.tolist(), n_out)
+
+def test_keeps_ends_and_spikes():
+    x = np.arange(2000)
+    y = np.zeros(2000)
+    y[777] = 100
+    kept = downsampling.lttb_indices(x, y, 50)
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == 1999
+    assert 777 in kept
+    assert (np.diff(kept) > 0).all()
+
+def test_dates_and_short_series():
+    dates = pd.date_range("2020-01-01", periods=400, freq="D")
+    y = np.sin(np.arange(400) / 10)
+    assert len(downsampling.lttb_indices(dates, y, 40)) == 40
+    assert downsampling.lttb_indices(dates[:30], y[:30], 40).tolist() == list(range(30))
\ No newline at end of file
@@ -0,0 +1,50 @@
+import io
+import types
+
+import pandas as pd
+import pytest
+
+from modules import export
+
+@pytest.fixture
+def sets(df):
+    return export._set_frame(df)
+
+def test_chunked_csv_matches_a_single_pass(sets):
+    encoded = b''.join(export.iter_csv(sets, chunk_rows=37)).decode('utf-8')
+    expected = sets.assign(other_muscles=sets['other_muscles'].map(';'.join)).to_csv(index=False)
+    assert encoded == expected
+    assert b''.join(export.iter_csv(sets.iloc[:0])).decode('utf-8').strip() == ','.join(sets.columns)
+
+def test_chunked_parquet_round_trips(sets):
+    file = io.BytesIO()
+    size = export.write_export(sets, "parquet", file, chunk_rows=100)
+    assert size == len(file.getvalue())
+
+    import pyarrow.parquet as pq
+    parquet = pq.ParquetFile(io.BytesIO(file.getvalue()))
+    assert parquet.num_row_groups == -(-len(sets) // 100)
+    read = parquet.read().to_pandas()
+    read['other_muscles'] = read['other_muscles'].map(list)
+    pd.testing.assert_frame_equal(read, sets.reset_index(drop=True), check_dtype=False)
+
+def test_workout_table(df):
+    workouts = export.workout_table(df)
+    assert workouts['workout_id'].tolist() == df['workout_id'].unique().tolist()
+    assert workouts['sets'].sum() == len(df)
+    assert workouts['volume'].sum() == pytest.approx(df['volume'].sum())
+
+def test_prepared_export_is_replaced_when_the_key_changes(df, monkeypatch):
+    monkeypatch.setattr(export, "st", types.SimpleNamespace(session_state={}))
+    export.prepare(("v1", "csv"), df, "workouts", "csv")
+    first = export.prepared(("v1", "csv"))
+    assert first["rows"] == df['workout_id'].nunique()
+    first["file"].seek(0)
+    assert len(first["file"].read()) == first["size"]
+
+    export.prepare(("v1", "parquet"), df, "sets", "parquet")
+    assert first["file"].closed
+    assert export.prepared(("v1", "csv")) is None
+    assert export.prepared(("v1", "parquet"))["rows"] == len(df)
+    assert export.file_name("sets", "parquet", [pd.Timestamp("2024-01-01").date(), pd.Timestamp("2024-12-31").date()]) \
+        == "hevy_sets_2024-01-01_2024-12-31.parquet"
\ No newline at end of file
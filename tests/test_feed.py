@@ -0,0 +1,56 @@
+import pytest
+import requests
+
+from benchmarks.synthetic import make_workouts
+from modules import feed, hevy_api
+
+PAGE_WORKOUTS = 3
+
+class FakeFeed:
+    # Feed of 3 pages, newest first, each request after the cursor of the page before
+    def __init__(self, fail_calls=()):
+        self.workouts = sorted(make_workouts(3 * PAGE_WORKOUTS).values(), key=lambda workout: -workout['index'])
+        # Cursor 0 asks for the newest workouts, so feed indexes start at 1
+        for workout in self.workouts:
+            workout['index'] += 1
+        self.calls = 0
+        self.fail_calls = set(fail_calls)
+
+    def __call__(self, start_from, auth_token=None):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            raise requests.Timeout("read timed out")
+        after = [workout for workout in self.workouts if start_from == 0 or workout['index'] < start_from]
+        return {"data": {"workouts": after[:PAGE_WORKOUTS]}}
+
+@pytest.fixture
+def pager():
+    pager = feed.FeedPager("token", prefetch_pages=1)
+    yield pager
+    pager.close()
+
+def test_pages_until_the_end_of_the_feed(monkeypatch, pager):
+    monkeypatch.setattr(hevy_api, "feed_workouts_paged", FakeFeed())
+    pages = [pager.next_page(timeout=5) for _ in range(3)]
+    assert [len(page["workouts"]) for page in pages] == [3, 3, 3]
+    assert len(pager.sets()['workout_id'].unique()) == 9
+
+    assert pager.next_page(timeout=5) is None
+    assert pager.exhausted and not pager.failed and not pager.has_next()
+    assert pager.previous_page() is pages[1]
+
+def test_failed_request_is_retried(monkeypatch, pager):
+    fake = FakeFeed(fail_calls={2})
+    monkeypatch.setattr(hevy_api, "feed_workouts_paged", fake)
+    first = pager.next_page(timeout=5)
+    assert first is not None
+
+    # The prefetched second page timed out: reported, not raised, and not taken for the end
+    assert pager.next_page(timeout=5) is None
+    assert pager.failed and not pager.exhausted
+    assert pager.has_next()
+    assert pager.page() is first
+
+    second = pager.next_page(timeout=5)
+    assert not pager.failed
+    assert [workout['id'] for workout in second["workouts"]] == [workout['id'] for workout in fake.workouts[3:6]]
\ No newline at end of file
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import heatmap
+
+@pytest.fixture(scope="module")
+def calendar(df):
+    return heatmap.build_calendar(df)
+
+def _as_days(calendar, daily):
+    dates = pd.date_range(pd.Timestamp(calendar["first_day"]), periods=calendar["n_days"], freq="D")
+    return pd.Series(daily, index=dates)
+
+@pytest.mark.parametrize("column, name", [(None, None), ("muscle_group", "chest"), ("exercise_title", "Squat (Barbell)")])
+def test_daily_values_match_the_sets(df, calendar, column, name):
+    rows = df if column is None else df[df[column] == name]
+    volume = _as_days(calendar, heatmap.daily_values(calendar, "volume", column, name))
+    sets = _as_days(calendar, heatmap.daily_values(calendar, "sets", column, name))
+
+    expected = rows.groupby('workout_date')['volume'].sum()
+    np.testing.assert_allclose(volume[expected.index], expected)
+    assert volume.sum() == pytest.approx(rows['volume'].sum())
+    assert sets[expected.index].tolist() == rows.groupby('workout_date').size().tolist()
+    assert sets.sum() == len(rows)
+
+def test_unknown_name_is_an_empty_calendar(calendar):
+    assert not heatmap.daily_values(calendar, "sets", "exercise_title", "Nordic Curl").any()
+
+def test_year_grid_places_days_on_weekday_and_week(calendar):
+    assert heatmap.years(calendar) == [2015]
+    daily = heatmap.daily_values(calendar, "sets")
+    grid = heatmap.year_grid(calendar, daily, 2015)
+
+    # 2015-01-01 was a Thursday, in the week starting Monday 2014-12-29
+    assert grid["weeks"][0] == np.datetime64("2014-12-29")
+    assert grid["dates"][3, 0] == "2015-01-01"
+    assert np.isnan(grid["z"][:3, 0]).all()
+    assert grid["z"].shape == (7, 53)
+    assert np.nansum(grid["z"]) == daily.sum()
+
+    first = pd.Timestamp(calendar["first_day"])
+    assert grid["z"][first.weekday(), (first.dayofyear + 2) // 7] == daily[0]
\ No newline at end of file
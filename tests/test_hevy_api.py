@@ -0,0 +1,34 @@
+import datetime
+import json
+
+import requests
+from requests.adapters import BaseAdapter
+
+from modules import client_storage, hevy_api, journal, telemetry
+
+class BootstrapAdapter(BaseAdapter):
+    # Answers the login bootstrap endpoints, the first workouts_batch page times out
+    def send(self, request, **kwargs):
+        endpoint = request.url.split("/")[3]
+        if endpoint == "workouts_batch":
+            raise requests.Timeout("read timed out")
+        body = {"id": "u1", "username": "u1"} if endpoint == "account" else {"workout_count": 3}
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        response.headers["Etag"] = 'W/"1"'
+        response.request, response.url, response.elapsed = request, request.url, datetime.timedelta(0)
+        return response
+
+    def close(self):
+        pass
+
+def test_login_survives_a_failed_first_page(monkeypatch, session_state):
+    session = telemetry.session
+    monkeypatch.setattr(telemetry, "session", lambda: (lambda s: (s.mount("https://", BootstrapAdapter()), s)[1])(session()))
+    monkeypatch.setattr(journal, "JOURNAL_DIR", "")
+
+    assert hevy_api.login_bootstrap("token") == 200
+    assert client_storage.get_auth_data() == ("token", "u1")
+    assert client_storage.get_workout_count()["data"] == {"workout_count": 3}
+    assert client_storage.get_workout_data() == {}
\ No newline at end of file
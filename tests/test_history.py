@@ -0,0 +1,62 @@
+import types
+
+import pytest
+
+from modules import data, history
+
+@pytest.fixture(scope="module")
+def workout_index(df):
+    return data.build_workout_index(df)
+
+@pytest.fixture
+def history_state(monkeypatch):
+    state = {}
+    monkeypatch.setattr(history, "st", types.SimpleNamespace(session_state=state))
+    return state
+
+def test_pages_cover_the_history_newest_first(df, workout_index):
+    n_pages = history.page_count(len(workout_index))
+    assert n_pages == 12 and history.page_count(0) == 1
+    pages = [history.page_ids(workout_index, page) for page in range(n_pages)]
+    assert [workout_id for page in pages for workout_id in page] == list(df['workout_id'].unique()[::-1])
+    assert history.page_ids(workout_index, n_pages) == ()
+
+def test_page_is_reset_by_the_filters_and_clamped(history_state):
+    assert history.current_page(("all",), 5) == 0
+    history.set_page(3)
+    assert history.current_page(("all",), 5) == 3
+    assert history.current_page(("all",), 2) == 1
+    assert history.current_page(("push",), 5) == 0
+
+    # Paged lists keep their own page
+    assert history.current_page(("query",), 4, "query_page") == 0
+    history.set_page(2, "query_page")
+    assert history.current_page(("push",), 5) == 0
+    assert history_state["query_page"]["page"] == 2
+
+def test_page_holds_the_sets_of_its_workouts(df, workout_index):
+    workout_ids = history.page_ids(workout_index, 1)
+    page = history.build_page(df, workout_index, workout_ids)
+    assert [workout["workout_id"] for workout in page] == list(workout_ids)
+    for workout in page:
+        sets = df[df['workout_id'] == workout["workout_id"]]
+        assert workout["sets"] == len(sets) == len(workout["table"])
+        assert workout["volume"] == pytest.approx(sets['volume'].sum())
+        assert workout["duration"] == sets['workout_duration'].iloc[0]
+        # Each exercise is named on its first set only
+        named = workout["table"].loc[workout["table"]['Exercise'] != '', 'Exercise']
+        assert named.tolist() == list(dict.fromkeys(sets['exercise_title']))
+
+    squats = history.build_page(df, workout_index, workout_ids, ("Squat (Barbell)",))
+    assert all(workout["exercises"] <= 1 for workout in squats)
+    assert sum(workout["sets"] for workout in squats) == \
+        df[df['workout_id'].isin(workout_ids) & (df['exercise_title'] == "Squat (Barbell)")].shape[0]
+
+def test_prefetch_builds_the_neighbouring_pages(df, workout_index, monkeypatch):
+    built = []
+    monkeypatch.setattr(data, "load_history_page", lambda version, workout_ids, exercises, _df, _index: built.append(workout_ids))
+    history.prefetch("v1", df, workout_index, 0, 12)
+    history.prefetch("v1", df, workout_index, 5, 12)
+    # The pool has a single worker, so an empty task runs after the prefetches
+    history._get_prefetch_pool().submit(lambda: None).result()
+    assert built == [history.page_ids(workout_index, page) for page in (1, 6, 4)]
\ No newline at end of file
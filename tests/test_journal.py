@@ -0,0 +1,83 @@
+import json
+import os
+import types
+
+import pytest
+
+from modules import client_storage, journal
+
+USER_ID = "u1"
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "JOURNAL_DIR", str(tmp_path))
+    monkeypatch.setattr(journal, "_counters", {})
+    return tmp_path
+
+def _put_workouts(workouts):
+    for workout_id, workout in workouts.items():
+        journal.append(USER_ID, journal.KIND_WORKOUT, journal.OP_PUT, workout_id, workout)
+
+def test_append_load_state_round_trip(workouts):
+    items = dict(list(workouts.items())[:5])
+    _put_workouts(items)
+    deleted = next(iter(items))
+    journal.append(USER_ID, journal.KIND_WORKOUT, journal.OP_DELETE, deleted)
+    journal.append(USER_ID, journal.KIND_ROUTINE, journal.OP_PUT, "r1", {"title": "Push"})
+
+    state = journal.load_state(USER_ID)
+    del items[deleted]
+    assert state == {"seq": 7, "workouts": items, "routines": {"r1": {"title": "Push"}}}
+    assert journal.current_seq(USER_ID) == 7
+
+def test_compact_folds_tail_into_snapshot(workouts, journal_dir):
+    items = dict(list(workouts.items())[:4])
+    _put_workouts(items)
+    before = journal.load_state(USER_ID)
+
+    journal.compact(USER_ID)
+
+    user_dir = os.path.join(journal_dir, "user_" + USER_ID)
+    assert os.path.getsize(os.path.join(user_dir, journal.JOURNAL_FILE)) == 0
+    with open(os.path.join(user_dir, journal.SNAPSHOT_FILE)) as f:
+        assert json.load(f) == before
+    assert journal.load_state(USER_ID) == before
+
+    # Sequence numbers continue after the snapshot
+    assert journal.append(USER_ID, journal.KIND_ROUTINE, journal.OP_PUT, "r1", {}) == before["seq"] + 1
+
+def test_automatic_compaction_keeps_state(workouts, monkeypatch):
+    monkeypatch.setattr(journal, "COMPACT_EVERY", 3)
+    items = dict(list(workouts.items())[:8])
+    _put_workouts(items)
+
+    assert journal.load_state(USER_ID) == {"seq": 8, "workouts": items, "routines": {}}
+    # Compacted at the 3rd and 6th change, earlier changes are only in the snapshot
+    assert journal.changes_since(USER_ID, 0) is None
+    assert [entry["seq"] for entry in journal.changes_since(USER_ID, 6)] == [7, 8]
+
+def test_counters_are_read_back_after_a_restart(workouts, monkeypatch):
+    _put_workouts(dict(list(workouts.items())[:3]))
+    journal.compact(USER_ID)
+    journal.append(USER_ID, journal.KIND_ROUTINE, journal.OP_PUT, "r1", {})
+
+    monkeypatch.setattr(journal, "_counters", {})
+    assert journal.append(USER_ID, journal.KIND_ROUTINE, journal.OP_DELETE, "r1") == 5
+    assert journal.load_state(USER_ID)["routines"] == {}
+
+def test_restore_into_session_storage(workouts, monkeypatch):
+    monkeypatch.setattr(client_storage, "st", types.SimpleNamespace(session_state={}, error=print))
+    items = dict(list(workouts.items())[:6])
+    _put_workouts(items)
+    journal.append(USER_ID, journal.KIND_ROUTINE, journal.OP_PUT, "r1", {"title": "Pull"})
+    journal.compact(USER_ID)
+
+    assert journal.restore(USER_ID) == 7
+    assert client_storage.get_workout_data() == items
+    assert client_storage.get_routine_data() == {"r1": {"title": "Pull"}}
+
+def test_disabled_journal_writes_nothing(monkeypatch, journal_dir):
+    monkeypatch.setattr(journal, "JOURNAL_DIR", "")
+    assert journal.append(USER_ID, journal.KIND_ROUTINE, journal.OP_PUT, "r1", {}) == 0
+    assert journal.load_state(USER_ID) == {"seq": 0, "workouts": {}, "routines": {}}
+    assert os.listdir(journal_dir) == []
\ No newline at end of file
@@ -0,0 +1,46 @@
+from collections import defaultdict
+
+import pandas as pd
+import pytest
+
+from modules import cube, muscle_attribution
+
+def reference_volume(rows, secondary_weight):
+    totals = defaultdict(float)
+    for primary, others, volume in zip(rows['muscle_group'], rows['other_muscles'], rows['volume'].fillna(0)):
+        totals[primary] += volume
+        for muscle in set(others) - {primary}:
+            totals[muscle] += secondary_weight * volume
+    return pd.Series(totals, dtype=float).sort_index()
+
+def reference_frequency(rows, include_secondary):
+    trained = defaultdict(set)
+    for day, primary, others in zip(rows['workout_date'], rows['muscle_group'], rows['other_muscles']):
+        for muscle in {primary} | (set(others) if include_secondary else set()):
+            trained[muscle].add(day)
+    return pd.Series({muscle: len(days) for muscle, days in trained.items()}).sort_index()
+
+@pytest.fixture(scope="module")
+def incidence(df):
+    return muscle_attribution.build_muscle_incidence(df)
+
+@pytest.mark.parametrize("secondary_weight", [0.0, 0.5, 1.0])
+def test_volume_credits_secondary_muscles(df, incidence, secondary_weight):
+    rows = df[df['title'].isin(['Push', 'Legs'])]
+    volume = muscle_attribution.muscle_volume(incidence, rows, secondary_weight)
+    expected = reference_volume(rows, secondary_weight)
+    pd.testing.assert_series_equal(volume[volume > 0].sort_index(), expected[expected > 0], check_names=False,
+                                   check_index_type=False)
+
+    # Cube cells total the same volume per muscle as the sets they aggregate
+    cells = cube.filter_cube(cube.build_cube(df), workout_types=['Push', 'Legs'])
+    from_cells = muscle_attribution.muscle_volume(incidence, cells, secondary_weight, cells=True)
+    pd.testing.assert_series_equal(from_cells, volume)
+
+@pytest.mark.parametrize("include_secondary", [True, False])
+def test_frequency_counts_distinct_workout_days(df, incidence, include_secondary):
+    rows = df[df['workout_date'] < pd.Timestamp("2015-04-01")]
+    frequency = muscle_attribution.muscle_frequency(incidence, rows, include_secondary)
+    expected = reference_frequency(rows, include_secondary)
+    pd.testing.assert_series_equal(frequency[frequency > 0].sort_index(), expected, check_names=False,
+                                   check_index_type=False, check_dtype=False)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import query
+
+def _reference_mask(df, conditions):
+    # The conditions evaluated with plain pandas over every set
+    mask = pd.Series(True, index=df.index)
+    for condition in conditions:
+        column = df[condition.column]
+        if condition.kind == 'text':
+            values = column.astype(object).where(column.notna(), None).map(lambda value: None if value is None else str(value).lower())
+            present = values.notna()
+            matched = {
+                '=': values == condition.value,
+                '!=': values != condition.value,
+                '~': values.map(lambda value: value is not None and condition.value in value),
+            }[condition.op]
+        else:
+            values = pd.to_numeric(column, errors='coerce') if condition.kind == 'number' else column
+            present = values.notna()
+            matched = {
+                '=': values == condition.value,
+                '!=': values != condition.value,
+                '<': values < condition.value,
+                '<=': values <= condition.value,
+                '>': values > condition.value,
+                '>=': values >= condition.value,
+            }[condition.op]
+        mask &= present & matched.astype(bool)
+    return mask.to_numpy()
+
+@pytest.fixture(scope="module")
+def index(df):
+    return query.build_index(df)
+
+@pytest.mark.parametrize("text", [
+    "exercise = Squat (Barbell)",
+    "exercise = 'squat (barbell)' and weight > 100",
+    "weight > 100 and reps <= 5",
+    "weight = 60",
+    "weight != 60 and muscle = chest",
+    "rpe >= 8 and exercise ~ press",
+    "type = warmup",
+    "workout != push and equipment = machine",
+    "date >= 2015-06-01 and date < 2015-09-01",
+    "date = 2015-01-03",
+    "duration >= 60",
+    "distance > 0",
+    "exercise ~ curl and rpe < 7.5",
+])
+def test_run_matches_pandas_mask(df, index, text):
+    conditions = query.parse(text)
+    expected = np.flatnonzero(_reference_mask(df, conditions))[::-1]
+    np.testing.assert_array_equal(query.run(index, conditions), expected)
+
+def test_result_page_is_newest_first(df, index):
+    rows = query.run(index, query.parse("weight > 0"))
+    page = query.result_page(df, rows, 0, page_size=5)
+    assert len(page) == 5
+    assert page['Date'].is_monotonic_decreasing
+
+@pytest.mark.parametrize("text", [
+    "",
+    "bodyweight = 80",
+    "weight ~ 100",
+    "weight >",
+    "weight > heavy",
+    "date >= yesterday-ish",
+    "weight > 100 reps < 5",
+    "weight > 100 and",
+])
+def test_parse_rejects_invalid_queries(text):
+    with pytest.raises(ValueError):
+        query.parse(text)
\ No newline at end of file
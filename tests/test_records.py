@@ -0,0 +1,73 @@
+import types
+
+import pandas as pd
+import pytest
+
+from modules import records
+
+FLAGS = [f"is_{record_type}_pr" for record_type in records.RECORD_COLUMNS] + ["is_rep_pr"]
+
+@pytest.mark.parametrize("n_chunks", [2, 5, 12])
+def test_incremental_updates_match_full_computation(df, n_chunks):
+    full_records, full_state = records.compute_personal_records(df)
+
+    # Sync-like chunks of whole workouts, oldest first
+    workout_ids = df['workout_id'].unique()
+    chunk_of = pd.Series(range(len(workout_ids)), index=workout_ids) * n_chunks // len(workout_ids)
+    state = None
+    parts = []
+    for _, chunk in df.groupby(df['workout_id'].map(chunk_of), sort=True):
+        set_records, state = records.update_personal_records(state, chunk)
+        parts.append(set_records)
+    incremental_records = pd.concat(parts)
+
+    pd.testing.assert_frame_equal(incremental_records.sort_index()[FLAGS], full_records.sort_index()[FLAGS])
+    pd.testing.assert_frame_equal(state["bests"].sort_index(), full_state["bests"].sort_index())
+    pd.testing.assert_series_equal(state["rep_bests"].sort_index(), full_state["rep_bests"].sort_index())
+    assert state["last_start_time"] == full_state["last_start_time"]
+
+def test_weight_records_beat_every_earlier_set(df):
+    set_records, state = records.compute_personal_records(df)
+
+    weights = set_records.groupby('exercise_key')['weight_kg']
+    earlier_best = weights.transform(lambda values: values.shift().expanding().max())
+    expected = set_records['weight_kg'].notna() & (earlier_best.isna() | (set_records['weight_kg'] > earlier_best))
+
+    assert (set_records['is_weight_pr'] == expected).all()
+    pd.testing.assert_series_equal(state["bests"]["weight"].sort_index(), weights.max().sort_index(), check_names=False)
+
+def test_loader_updates_journaled_records_incrementally(workouts, df, tmp_path, monkeypatch):
+    from modules import data, journal
+
+    monkeypatch.setattr(journal, "JOURNAL_DIR", str(tmp_path))
+    monkeypatch.setattr(journal, "_counters", {})
+    monkeypatch.setattr(data, "st", types.SimpleNamespace(session_state={}, runtime=data.st.runtime))
+    full_runs = []
+    compute = records.compute_personal_records
+    monkeypatch.setattr(records, "compute_personal_records", lambda frame: full_runs.append(len(frame)) or compute(frame))
+
+    user_id = f"records_{tmp_path.name}"
+    ids = df['workout_id'].unique()
+    for generation, synced in enumerate([ids[:80], ids], start=1):
+        for workout_id in synced[-40 if generation > 1 else 0:]:
+            journal.append(user_id, journal.KIND_WORKOUT, journal.OP_PUT, workout_id, workouts[workout_id])
+        frame = df[df['workout_id'].isin(synced)]
+        set_records, _ = data.load_personal_records(data.DatasetVersion(user_id, generation), frame)
+
+    # Computed in full once, then only the 40 new workouts were folded in
+    assert full_runs == [len(df[df['workout_id'].isin(ids[:80])])]
+    expected, _ = compute(df)
+    pd.testing.assert_frame_equal(set_records.sort_index()[FLAGS], expected.sort_index()[FLAGS])
+
+def test_loader_is_cached_per_dataset_version(df, tmp_path, monkeypatch):
+    from modules import data, journal
+
+    monkeypatch.setattr(journal, "JOURNAL_DIR", "")
+    full_runs = []
+    compute = records.compute_personal_records
+    monkeypatch.setattr(records, "compute_personal_records", lambda frame: full_runs.append(len(frame)) or compute(frame))
+
+    version = data.DatasetVersion(f"records_{tmp_path.name}", 1)
+    for _ in range(3):
+        data.load_personal_records(version, df)
+    assert full_runs == [len(df)]
\ No newline at end of file
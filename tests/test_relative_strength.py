@@ -0,0 +1,44 @@
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from modules import data, relative_strength
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    # Five hours behind UTC, so a naive UTC time reads as later in the day than the local one
+    monkeypatch.setenv("TZ", "EST5")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def test_measurement_times_match_local_set_times(local_timezone):
+    # 08:00 local is 13:00 UTC: the 12:00 UTC weigh-in came before the workout, the 14:00 UTC one after
+    start = datetime(2024, 3, 1, 13, 0, tzinfo=timezone.utc).timestamp()
+    workout = {"name": "Push", "start_time": start, "end_time": start + 3600, "exercises": [
+        {"title": "Bench Press (Barbell)", "sets": [{"weight_kg": 100, "reps": 5}]}]}
+    df = data.flatten_workouts({"w1": workout})
+    assert df['start_time'].iloc[0] == pd.Timestamp("2024-03-01 08:00")
+
+    bodyweight = relative_strength.bodyweight_history([
+        {"created_at": "2024-03-01T12:00:00Z", "weight_kg": 80},
+        {"created_at": "2024-03-01T14:00:00Z", "weight_kg": 90},
+    ])
+    assert bodyweight['measured_at'].tolist() == [pd.Timestamp("2024-03-01 07:00"), pd.Timestamp("2024-03-01 09:00")]
+
+    sets = pd.DataFrame({'start_time': df['start_time'], 'e1rm': [116.7], 'set_volume': [500.0]})
+    aligned = relative_strength.add_relative_strength(sets, bodyweight)
+    assert aligned['bodyweight_kg'].tolist() == [80]
+    assert aligned['relative_volume'].tolist() == [6.25]
+
+def test_calendar_dates_stay_on_their_day(local_timezone):
+    bodyweight = relative_strength.bodyweight_history([
+        {"date": "2024-03-02", "weight_kg": 81},
+        {"date": "2024-03-01", "weight_kg": 80},
+        {"date": "2024-03-03", "weight_kg": 0},
+    ])
+    assert bodyweight['measured_at'].tolist() == [pd.Timestamp("2024-03-01"), pd.Timestamp("2024-03-02")]
+    assert bodyweight['bodyweight_kg'].tolist() == [80, 81]
\ No newline at end of file
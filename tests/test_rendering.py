@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from modules import rendering
+
+def test_small_values_are_sent_as_float32():
+    weights = np.array([60.125, 102.5, 0.333333, np.nan])
+    fig = rendering.compact_figure(go.Figure(go.Scatter(x=[1, 2, 3, 4], y=weights)))
+    y = fig.data[0].y
+    assert y.dtype == np.float32
+    np.testing.assert_allclose(y[:3], [60.12, 102.5, 0.33], atol=1e-4)
+
+def test_large_values_keep_their_precision():
+    # Weekly tonnage of a long history, beyond what float32 holds to 2 decimals
+    tonnage = np.array([41_943.04, 123_456.78, 16_777_217.0, 9_876_543.21])
+    fig = rendering.compact_figure(go.Figure(go.Bar(x=list(range(4)), y=tonnage)))
+    y = np.asarray(fig.data[0].y, dtype=float)
+    np.testing.assert_array_equal(y, tonnage)
+
+def test_dense_traces_switch_to_webgl_and_day_dates_drop_their_time():
+    dates = pd.date_range("2020-01-01", periods=rendering.WEBGL_THRESHOLD + 1, freq="D")
+    fig = go.Figure([go.Scatter(x=dates, y=np.arange(len(dates), dtype=float), line={'shape': 'spline'}),
+                     go.Scatter(x=dates[:10], y=np.arange(10.0))])
+    fig = rendering.compact_figure(fig, mode="auto")
+    assert [trace.type for trace in fig.data] == ['scattergl', 'scatter']
+    assert fig.data[0].line.shape == 'linear'
+    assert list(fig.data[1].x[:2]) == ['2020-01-01', '2020-01-02']
+    assert rendering.compact_figure(go.Figure(go.Scatter(x=[1, 2], y=[1.0, 2.0])), mode="svg").data[0].type == 'scatter'
\ No newline at end of file
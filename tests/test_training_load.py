@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import training_load
+
+@pytest.fixture(scope="module")
+def load(df):
+    return training_load.build_training_load(df)
+
+def test_daily_volume_matches_the_sets(df, load):
+    daily = training_load.training_load_range(load)['daily_volume']
+    expected = df.groupby('workout_date')['volume'].sum()
+    np.testing.assert_allclose(daily[expected.index], expected)
+    assert daily.drop(expected.index).eq(0).all()
+    assert daily.index[0] == df['workout_date'].min() and daily.index[-1] == df['workout_date'].max()
+
+    chest = training_load.training_load_range(load, 'chest')['daily_volume']
+    assert chest.sum() == pytest.approx(df.loc[df['muscle_group'] == 'chest', 'volume'].sum())
+
+def test_metrics_match_pandas_windows(load):
+    days = training_load.training_load_range(load)
+    daily = days['daily_volume']
+
+    # Both loads start from zero before the first day
+    for name, span in [('acute_load', training_load.ACUTE_DAYS), ('chronic_load', training_load.CHRONIC_DAYS)]:
+        expected = pd.concat([pd.Series([0.0]), daily.reset_index(drop=True)]).ewm(span=span, adjust=False).mean()[1:]
+        np.testing.assert_allclose(days[name], expected, rtol=1e-9, atol=1e-6)
+
+    weekly = daily.rolling(training_load.ACUTE_DAYS, min_periods=1).sum()
+    np.testing.assert_allclose(days['weekly_tonnage'], weekly, atol=1e-6)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.testing.assert_allclose(days['acwr'], days['acute_load'] / days['chronic_load'].where(days['chronic_load'] > 0))
+
+    window = daily.rolling(training_load.ACUTE_DAYS, min_periods=1)
+    monotony = (window.sum() / training_load.ACUTE_DAYS) / window.apply(
+        lambda values: np.pad(values, (training_load.ACUTE_DAYS - len(values), 0)).std())
+    rated = days['monotony'].notna()
+    np.testing.assert_allclose(days.loc[rated, 'monotony'], monotony[rated], rtol=1e-6)
+
+def test_weekly_tonnage_and_ranges(df, load):
+    start, end = pd.Timestamp("2015-02-04").date(), pd.Timestamp("2015-04-20").date()
+    weeks = training_load.weekly_tonnage(load, start_date=start, end_date=end)
+
+    in_range = df[(df['workout_date'] >= pd.Timestamp(start)) & (df['workout_date'] <= pd.Timestamp(end))]
+    expected = in_range.groupby(in_range['workout_date'].dt.to_period('W-SUN').dt.start_time)['volume'].sum()
+    assert (weeks.index.weekday == 0).all()
+    np.testing.assert_allclose(weeks[expected.index], expected)
+    assert weeks.sum() == pytest.approx(in_range['volume'].sum())
+
+    days = training_load.training_load_range(load, start_date=start, end_date=end)
+    assert days.index[0].date() == start and days.index[-1].date() == end
+    assert training_load.weekly_tonnage(load, start_date=pd.Timestamp("2030-01-01").date()).empty
\ No newline at end of file